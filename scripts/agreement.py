@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from batch_validate import INVALID
+from build_from_opendata_jabar import OPENDATA_JABAR_FILE, warn_invalid_postal_codes
+from pos_indonesia import POS_JSONL_FILE, read_pos_indonesia_jsonl
+from regions_id import load_regions_id
+from vector_engine import Source, lookup, read_opendata_jabar
+
+# ============================================================
+# CROSS-SOURCE AGREEMENT AND AUGMENTED CONFIDENCE
+#
+# OpenData Jabar and Pos Indonesia postal codes are joined onto every
+# region-id village in one vectorized pass. Where a village has both,
+# the sources agree or not; those outcomes are rolled up into agreement
+# rates per district, regency and province. Independently, a Pos
+# Indonesia postal code is "shared" when another village of the same
+# district carries it in either source.
+#
+# Every village with a Pos Indonesia postal code gets a confidence in
+# BUILD.md's AUGMENTED range (0.3 – 0.6):
+#   - OpenData Jabar has the village: CONFIDENCE_MAX if it agrees,
+#     CONFIDENCE_MIN if it does not
+#   - otherwise MIN + (MAX - MIN) * (AREA_WEIGHT * area agreement rate
+#     + SIBLING_WEIGHT * shared), using the narrowest area with at
+#     least MIN_OVERLAP villages in both sources (district, regency,
+#     province, then national)
+# Scores are rounded to CONFIDENCE_DECIMALS and depend only on the
+# inputs, so builds stay deterministic.
+# ============================================================
+
+FORMAT = 1
+
+CONFIDENCE_MIN = 0.3
+CONFIDENCE_MAX = 0.6
+CONFIDENCE_DECIMALS = 2
+
+AREA_WEIGHT = 0.5
+SIBLING_WEIGHT = 0.5
+
+# Villages in both sources an area needs before its own rate is used
+MIN_OVERLAP = 5
+
+# Rate used when no area has any overlap at all
+PRIOR_RATE = 0.5
+
+# Anything that changes a score; builds put it in their parameters
+PARAMETERS = {
+    "format": FORMAT,
+    "confidence_min": CONFIDENCE_MIN,
+    "confidence_max": CONFIDENCE_MAX,
+    "confidence_decimals": CONFIDENCE_DECIMALS,
+    "area_weight": AREA_WEIGHT,
+    "sibling_weight": SIBLING_WEIGHT,
+    "min_overlap": MIN_OVERLAP,
+    "prior_rate": PRIOR_RATE,
+}
+
+# Narrowest first, with their key in the statistics
+AREA_LEVELS = {"district": "districts", "regency": "regencies", "province": "provinces"}
+
+# 5-digit postal codes
+POSTAL_SPACE = 100_000
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def rate(agree, both):
+    return round(agree / both, 4) if both else None
+
+
+def _postal(villages_codes, source: Source):
+    """Per-village postal code of ``source`` (INVALID where absent)."""
+    postal = np.full(len(villages_codes), INVALID, dtype=np.int64)
+    hit, pos = lookup(source.codes, villages_codes)
+    postal[hit] = source.postal[pos[hit]]
+    return hit, postal
+
+# ============================================================
+# ANALYSIS
+# ============================================================
+
+class Agreement:
+    """
+    Usage:
+      agreement = analyze(villages, official_source, pos_source)
+      agreement.confidence          # float64 per VillageTable row, NaN = no Pos code
+      agreement.confidence_map()    # village_code → confidence
+      agreement.write(path)
+    """
+
+    def __init__(self, villages, confidence, stats):
+        self.villages = villages
+        self.confidence = confidence
+        self.stats = stats
+
+    def confidence_map(self):
+        """village_code (str) → confidence for villages with a Pos code."""
+        rows = np.flatnonzero(~np.isnan(self.confidence))
+        codes = np.frombuffer(self.villages.village_codes, dtype=np.int64)[rows]
+        return dict(zip(codes.astype(str).tolist(), self.confidence[rows].tolist()))
+
+    def write(self, path: Path):
+        tmp = Path(path).with_name(Path(path).name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        tmp.replace(path)
+
+
+def analyze(villages, official: Source, pos: Source) -> Agreement:
+    codes = np.frombuffer(villages.village_codes, dtype=np.int64)
+    has_official, official_postal = _postal(codes, official)
+    has_pos, pos_postal = _postal(codes, pos)
+    has_official &= official_postal != INVALID
+
+    both = has_official & has_pos
+    agree = both & (official_postal == pos_postal)
+
+    district = np.frombuffer(villages.village_district, dtype=np.uint32).astype(np.int64)
+    regency = np.frombuffer(villages.district_regency, dtype=np.uint32)[district].astype(np.int64)
+    province = np.frombuffer(villages.regency_province, dtype=np.uint32)[regency].astype(np.int64)
+    areas = {"district": district, "regency": regency, "province": province}
+
+    # ---- shared with a sibling: another village of the district claims it ----
+    # A village claims each distinct postal code it has once
+    valid_pos = has_pos & (pos_postal != INVALID)
+    claims_pos = valid_pos & ~agree
+    keys = np.concatenate(
+        (
+            district[has_official] * POSTAL_SPACE + official_postal[has_official],
+            district[claims_pos] * POSTAL_SPACE + pos_postal[claims_pos],
+        )
+    )
+    claimed, claims = np.unique(keys, return_counts=True)
+    shared = np.zeros(len(codes), dtype=bool)
+    pos_rows = np.flatnonzero(valid_pos)
+    if len(pos_rows):
+        at = np.searchsorted(claimed, district[pos_rows] * POSTAL_SPACE + pos_postal[pos_rows])
+        shared[pos_rows] = claims[at] > 1
+
+    # ---- agreement rates per area ----
+    national_both = int(both.sum())
+    national_agree = int(agree.sum())
+    area_rate = np.full(len(codes), PRIOR_RATE if not national_both else national_agree / national_both)
+    resolved = np.zeros(len(codes), dtype=bool)
+    counts = {}
+    for level in AREA_LEVELS:
+        size = len(getattr(villages, f"{level}_codes"))
+        area = areas[level]
+        level_counts = {
+            "villages": np.bincount(area, minlength=size),
+            "both": np.bincount(area[both], minlength=size),
+            "agree": np.bincount(area[agree], minlength=size),
+            "pos": np.bincount(area[has_pos], minlength=size),
+            "shared": np.bincount(area[shared], minlength=size),
+        }
+        counts[level] = level_counts
+        use = ~resolved & (level_counts["both"][area] >= MIN_OVERLAP)
+        area_rate[use] = level_counts["agree"][area[use]] / level_counts["both"][area[use]]
+        resolved |= use
+
+    # ---- per-record confidence ----
+    span = CONFIDENCE_MAX - CONFIDENCE_MIN
+    score = CONFIDENCE_MIN + span * (AREA_WEIGHT * area_rate + SIBLING_WEIGHT * shared)
+    score = np.where(both, np.where(agree, CONFIDENCE_MAX, CONFIDENCE_MIN), score)
+    score = np.clip(np.round(score, CONFIDENCE_DECIMALS), CONFIDENCE_MIN, CONFIDENCE_MAX)
+    confidence = np.where(has_pos, score, np.nan)
+
+    values, value_counts = np.unique(confidence[has_pos], return_counts=True)
+    stats = {
+        "format": FORMAT,
+        "parameters": PARAMETERS,
+        "villages": len(codes),
+        "opendata_jabar": int(has_official.sum()),
+        "pos_indonesia": int(has_pos.sum()),
+        "both": national_both,
+        "agree": national_agree,
+        "agreement_rate": rate(national_agree, national_both),
+        "pos_shared_with_sibling": int(shared.sum()),
+        "confidence": {
+            f"{v:.{CONFIDENCE_DECIMALS}f}": int(n)
+            for v, n in zip(values.tolist(), value_counts.tolist())
+        },
+    }
+    for level, key in reversed(AREA_LEVELS.items()):
+        c = counts[level]
+        level_codes = getattr(villages, f"{level}_codes")
+        level_names = getattr(villages, f"{level}_names")
+        stats[key] = [
+            {
+                "code": str(level_codes[a]),
+                "name": level_names[a],
+                "villages": int(c["villages"][a]),
+                "both": int(c["both"][a]),
+                "agree": int(c["agree"][a]),
+                "agreement_rate": rate(int(c["agree"][a]), int(c["both"][a])),
+                "pos_indonesia": int(c["pos"][a]),
+                "pos_shared_with_sibling": int(c["shared"][a]),
+            }
+            for a in np.argsort(np.asarray(level_codes), kind="stable").tolist()
+            if c["villages"][a]
+        ]
+    return Agreement(villages, confidence, stats)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="OpenData Jabar vs Pos Indonesia agreement and AUGMENTED confidence"
+    )
+    parser.add_argument(
+        "--regions",
+        default="regions_id.csv",
+        help="Path to regions_id.csv",
+    )
+    parser.add_argument(
+        "--opendata",
+        default=str(OPENDATA_JABAR_FILE),
+        help="OpenData Jabar CSV",
+    )
+    parser.add_argument(
+        "--pos",
+        default=str(POS_JSONL_FILE),
+        help="Pos Indonesia JSONL",
+    )
+    parser.add_argument(
+        "--output",
+        default="source_agreement.json",
+        help="Agreement statistics output JSON",
+    )
+
+    args = parser.parse_args()
+    for path in (args.regions, args.opendata, args.pos):
+        if not Path(path).exists():
+            die(f"Missing input: {path}")
+
+    villages = load_regions_id(Path(args.regions))
+    try:
+        official = read_opendata_jabar(Path(args.opendata))
+    except ValueError as exc:
+        die(str(exc))
+    warn_invalid_postal_codes("OpenData Jabar", official.rejected)
+    pos = Source.from_mapping(read_pos_indonesia_jsonl(Path(args.pos)))
+
+    agreement = analyze(villages, official, pos)
+    agreement.write(Path(args.output))
+
+    s = agreement.stats
+    print(f"Villages in both sources : {s['both']}")
+    print(f"Agreement rate           : {s['agreement_rate']}")
+    print(f"Pos codes shared         : {s['pos_shared_with_sibling']} of {s['pos_indonesia']}")
+    print(f"Confidence               : {s['confidence']}")
+    print(f"→ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import csv
+import io
+import json
+from array import array
+from itertools import accumulate
+from operator import sub
+from pathlib import Path
+
+# ============================================================
+# STREAMING ARTIFACT WRITERS
+#
+# Records are written one at a time as they are produced, so a build
+# never holds the full dataset in memory. Output bytes are identical to
+# csv.DictWriter.writerows() and json.dump(records, indent=2) over the
+# same records in the same order.
+#
+# Each record is serialised to a byte fragment. Writers remember where
+# every village's fragment starts and ends, and can reuse the fragment
+# from a previous build instead of serialising again (see
+# incremental.py).
+# ============================================================
+
+class _Artifact:
+    """Fragment bookkeeping shared by the CSV and JSON writers."""
+
+    def __init__(self, path: Path, previous=None):
+        self.path = Path(path)
+        self.previous = previous
+        self.count = 0
+        self.reused = 0
+        self.codes = array("q")
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self._file = None
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._offset = 0
+
+    def __enter__(self):
+        self._file = self._tmp.open("wb")
+        self._emit(self.header())
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self._emit(self.footer())
+        self._file.close()
+        if exc_type is None:
+            self._tmp.replace(self.path)
+        else:
+            self._tmp.unlink()
+
+    def _emit(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+    def header(self) -> bytes:
+        return b""
+
+    def footer(self) -> bytes:
+        return b""
+
+    def separator(self) -> bytes:
+        return b""
+
+    def serialize(self, record) -> bytes:
+        raise NotImplementedError
+
+    def write(self, record):
+        code = record["village_code"]
+        fragment = None
+        if self.previous is not None:
+            fragment = self.previous.reuse(code)
+        if fragment is None:
+            fragment = self.serialize(record)
+        else:
+            self.reused += 1
+        self.write_fragment(code, fragment)
+
+    def write_fragment(self, village_code, fragment: bytes):
+        """Append a record already serialised by serialize()."""
+        self._emit(self.separator())
+        self.codes.append(int(village_code))
+        self.starts.append(self._offset)
+        self._emit(fragment)
+        self.ends.append(self._offset)
+        self.count += 1
+
+    def write_fragments(self, village_codes, fragments):
+        """
+        Append a batch of records already serialised by serialize().
+        Every record after the first one written shares one separator.
+        """
+        if not fragments:
+            return
+        self.write_fragment(village_codes[0], fragments[0])
+        rest = fragments[1:]
+        if not rest:
+            return
+        separator = self.separator()
+        lengths = list(map(len, rest))
+        ends = list(accumulate((len(separator) + n for n in lengths), initial=self._offset))[1:]
+        self.codes.extend(map(int, village_codes[1:]))
+        self.starts.extend(map(sub, ends, lengths))
+        self.ends.extend(ends)
+        self.count += len(rest)
+        self._emit(separator + separator.join(rest))
+
+
+class CsvArtifact(_Artifact):
+    """CSV artifact with a fixed header; extra record keys are ignored."""
+
+    def __init__(self, path: Path, fieldnames, previous=None):
+        super().__init__(path, previous)
+        self.fieldnames = list(fieldnames)
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(
+            self._buffer, fieldnames=self.fieldnames, extrasaction="ignore"
+        )
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writeheader()
+        return self._take()
+
+    def serialize(self, record) -> bytes:
+        self._writer.writerow(record)
+        return self._take()
+
+
+class JsonArrayArtifact(_Artifact):
+    """
+    JSON array artifact, pretty-printed with indent=2.
+    When ``fieldnames`` is given, only those keys are written.
+    """
+
+    def __init__(self, path: Path, fieldnames=None, previous=None):
+        super().__init__(path, previous)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+
+    def header(self) -> bytes:
+        return b"["
+
+    def footer(self) -> bytes:
+        return b"\n]" if self.count else b"]"
+
+    def separator(self) -> bytes:
+        return b",\n  " if self.count else b"\n  "
+
+    def serialize(self, record) -> bytes:
+        if self.fieldnames is not None:
+            record = {k: record[k] for k in self.fieldnames}
+        body = json.dumps(record, ensure_ascii=False, indent=2)
+        return body.replace("\n", "\n  ").encode("utf-8")
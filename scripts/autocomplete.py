@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from postal_lookup import StringTable, decode_postal_code, load_index, read_columns, write_columns
+from regions_id import normalize_name
+
+# ============================================================
+# AUTOCOMPLETE INDEX
+#
+# Built at release time from an enriched artifact and shipped as its
+# own memory-mapped file (same column layout as postal_codes*.bin).
+#
+# Every village, district, regency and province name is normalised
+# (ASCII, lowercase) and split into words. Each level has a sorted
+# token column with a parallel entry column (village row or area
+# index), so the villages matching a prefix are one bisect plus a
+# contiguous scan. Villages are sorted by village_code, so an area's
+# villages are a contiguous row range stored as <level>_start/_end.
+#
+# Results are ranked by the level the prefix matched: village names
+# first, then district, regency and province names; within a level by
+# token (an exact word before its extensions), then village_code.
+# ============================================================
+
+AUTOCOMPLETE_MAGIC = b"PCIDAC01"
+FORMAT = 1
+
+SEARCH_LEVELS = ("village", "district", "regency", "province")
+AREA_LEVELS = SEARCH_LEVELS[1:]
+
+# Upper bound on candidate villages checked against the other words of
+# a multi-word query, so a vague query cannot scan the whole country
+MAX_CANDIDATES = 20_000
+
+# Sorts after every normalised (ASCII) token sharing a prefix
+PREFIX_END = "\x7f"
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def tokenize(name: str):
+    """Distinct normalised words of a name, in order."""
+    return list(dict.fromkeys(normalize_name(name).split()))
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def _token_columns(names):
+    """Sorted (token, entry) pairs of ``names`` as two columns."""
+    pairs = sorted(
+        (token, entry)
+        for entry in range(len(names))
+        for token in tokenize(names[entry])
+    )
+    return StringTable.build(t for t, _ in pairs), array("I", (e for _, e in pairs))
+
+
+def build_autocomplete(index):
+    """Autocomplete columns for an enriched PostalCodeIndex."""
+    if not index.enriched:
+        raise ValueError("Autocomplete requires an enriched artifact")
+    c = index.columns
+    n = len(index)
+
+    columns = {
+        "village_codes": c["village_codes"],
+        "postal_codes": c["postal_codes"],
+        "village_names": c["village_names"],
+        "district_index": c["district_index"],
+        "district_parent": c["district_parent"],
+        "regency_parent": c["regency_parent"],
+    }
+
+    # Area of every row at each level, then each area's row range
+    area = c["district_index"]
+    for level in AREA_LEVELS:
+        columns[f"{level}_codes"] = c[f"{level}_codes"]
+        columns[f"{level}_names"] = c[f"{level}_names"]
+        count = len(c[f"{level}_codes"])
+        start = array("I", [n]) * count
+        end = array("I", [0]) * count
+        previous = None
+        for row in range(n):
+            a = area[row]
+            if a != previous:
+                if start[a] != n:
+                    raise ValueError(
+                        f"Villages of {level} {c[f'{level}_codes'][a]} are not "
+                        "contiguous in village_code order"
+                    )
+                start[a] = row
+                previous = a
+            end[a] = row + 1
+        columns[f"{level}_start"] = start
+        columns[f"{level}_end"] = end
+        if level != AREA_LEVELS[-1]:
+            parent = c[f"{level}_parent"]
+            area = array("I", (parent[a] for a in area))
+
+    names = {"village": c["village_names"]}
+    names.update({level: c[f"{level}_names"] for level in AREA_LEVELS})
+    for level in SEARCH_LEVELS:
+        tokens, entries = _token_columns(names[level])
+        columns[f"{level}_tokens"] = tokens
+        columns[f"{level}_token_entry"] = entries
+    return columns
+
+
+def write_autocomplete(path: Path, index):
+    """Write the autocomplete artifact for an enriched PostalCodeIndex."""
+    write_columns(
+        path,
+        build_autocomplete(index),
+        {"format": FORMAT, "records": len(index)},
+        magic=AUTOCOMPLETE_MAGIC,
+    )
+
+# ============================================================
+# QUERY
+# ============================================================
+
+class Autocomplete:
+    """
+    Usage:
+      ac = Autocomplete.open("postal_codes_pos_indonesia_autocomplete.bin")
+      ac.search("cibeu", limit=10)
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._cache = {}  # (level, area) → normalised words
+
+    @classmethod
+    def open(cls, path):
+        columns, header = read_columns(path, magic=AUTOCOMPLETE_MAGIC)
+        if header.get("format") != FORMAT:
+            raise ValueError(f"Unsupported autocomplete format: {header.get('format')}")
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns["village_codes"])
+
+    def _areas(self, row):
+        c = self.columns
+        d = c["district_index"][row]
+        r = c["district_parent"][d]
+        return d, r, c["regency_parent"][r]
+
+    def _area_words(self, level, i):
+        key = (level, i)
+        words = self._cache.get(key)
+        if words is None:
+            words = self._cache[key] = tokenize(self.columns[f"{level}_names"][i])
+        return words
+
+    def _words(self, row):
+        """Normalised words of a village's full address."""
+        words = tokenize(self.columns["village_names"][row])
+        for level, i in zip(AREA_LEVELS, self._areas(row)):
+            words += self._area_words(level, i)
+        return words
+
+    def result(self, row, level):
+        c = self.columns
+        d, r, p = self._areas(row)
+        return {
+            "village_code": str(c["village_codes"][row]),
+            "village_name": c["village_names"][row],
+            "postal_code": decode_postal_code(c["postal_codes"][row]),
+            "district_code": str(c["district_codes"][d]),
+            "district_name": c["district_names"][d],
+            "regency_code": str(c["regency_codes"][r]),
+            "regency_name": c["regency_names"][r],
+            "province_code": str(c["province_codes"][p]),
+            "province_name": c["province_names"][p],
+            "matched": level,
+        }
+
+    def _rows(self, level, prefix):
+        """Village rows whose ``level`` name has a word starting with ``prefix``."""
+        c = self.columns
+        tokens = c[f"{level}_tokens"]
+        entries = c[f"{level}_token_entry"]
+        lo = bisect_left(tokens, prefix)
+        hi = bisect_left(tokens, prefix + PREFIX_END, lo)
+        for j in range(lo, hi):
+            entry = entries[j]
+            if level == "village":
+                yield entry
+            else:
+                yield from range(c[f"{level}_start"][entry], c[f"{level}_end"][entry])
+
+    def search(self, query: str, limit: int = 10):
+        """
+        Villages matching every word of ``query`` as a word prefix of
+        their village, district, regency or province name.
+        """
+        words = normalize_name(query).split()
+        if not words or limit <= 0:
+            return []
+        # The longest word is usually the most selective
+        driver = max(words, key=len)
+        others = list(words)
+        others.remove(driver)
+
+        results = []
+        seen = set()
+        checked = 0
+        for level in SEARCH_LEVELS:
+            for row in self._rows(level, driver):
+                if row in seen:
+                    continue
+                seen.add(row)
+                if others:
+                    checked += 1
+                    if checked > MAX_CANDIDATES:
+                        return results
+                    address = self._words(row)
+                    if not all(any(w.startswith(o) for w in address) for o in others):
+                        continue
+                results.append(self.result(row, level))
+                if len(results) >= limit:
+                    return results
+        return results
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or query the village / district / regency autocomplete index"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build the autocomplete artifact")
+    build.add_argument(
+        "artifact",
+        help="Enriched artifact: postal_codes*_enriched.csv or *.bin",
+    )
+    build.add_argument(
+        "--output",
+        required=True,
+        help="Autocomplete artifact output (*.bin)",
+    )
+
+    query = sub.add_parser("query", help="Print matches for a prefix")
+    query.add_argument(
+        "index",
+        help="Autocomplete artifact",
+    )
+    query.add_argument(
+        "prefix",
+        help="Query text, e.g. 'cibeu' or 'sukamaju bogor'",
+    )
+    query.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Maximum results",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            write_autocomplete(Path(args.output), load_index(args.artifact))
+        except ValueError as exc:
+            die(str(exc))
+        print(f"→ {args.output}")
+        return
+
+    ac = Autocomplete.open(args.index)
+    started = time.perf_counter()
+    results = ac.search(args.prefix, args.limit)
+    elapsed = time.perf_counter() - started
+    json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    print(f"{len(results)} results in {elapsed * 1000:.3f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from postal_lookup import LEVELS, NO_POSTAL_CODE, load_index
+
+# ============================================================
+# VECTORIZED (postal_code, village_code) VALIDATION
+#
+# Validates whole columns of claimed (postal_code, village_code) pairs
+# against an enriched artifact in one call. Codes are integers; the
+# village lookup is a searchsorted over the sorted village_code column.
+# Postal codes are mapped to dense ids through a 100k-entry table, and
+# every administrative level keeps a bitmap over (area, postal id), so
+# "is this postal code used anywhere in the village's district" is one
+# gather per row. No Python object is created per row.
+# ============================================================
+
+# Verdict codes, in order of precedence (uint8 values are the positions)
+VERDICTS = (
+    "exact",           # postal code of the village itself
+    "same_district",   # used by another village in the same district
+    "same_regency",
+    "same_province",
+    "wrong_province",  # a known postal code, used only in other provinces
+    "unknown",         # village_code or postal_code not in the dataset
+)
+EXACT, SAME_DISTRICT, SAME_REGENCY, SAME_PROVINCE, WRONG_PROVINCE, UNKNOWN = range(
+    len(VERDICTS)
+)
+
+# 5-digit postal codes
+POSTAL_SPACE = 100_000
+
+INVALID = -1
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+# ============================================================
+# ENCODING
+# ============================================================
+
+def encode_codes(values, digits=None) -> np.ndarray:
+    """
+    Encode a column of codes as int64; INVALID where a value is not a
+    canonical digit string (or, with ``digits``, not exactly that long).
+    Accepts integer arrays, string arrays and plain sequences.
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        return np.zeros(values.shape, dtype=np.int64)
+    if values.dtype.kind in "iu":
+        out = values.astype(np.int64)
+        bad = out < 0
+        if digits is not None:
+            bad |= out >= 10 ** digits
+        out[bad] = INVALID
+        return out
+
+    if values.dtype.kind == "O":
+        values = values.astype(str)
+    if values.dtype.kind == "S":
+        chars = values.view(np.uint8)
+    elif values.dtype.kind == "U":
+        chars = values.view(np.uint32)
+    else:
+        raise TypeError(f"Unsupported code column dtype: {values.dtype}")
+
+    # Fixed-width strings as a (rows, width) matrix of code points, NUL-padded
+    width = values.dtype.itemsize // chars.itemsize
+    chars = chars.reshape(-1, width)
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    lengths = is_digit.sum(axis=1)
+    # Digits, then NUL padding only
+    ok = (is_digit | (chars == 0)).all(axis=1) & (lengths == (chars != 0).sum(axis=1))
+    ok &= ~(is_digit[:, 1:] & ~is_digit[:, :-1]).any(axis=1)
+    ok &= (lengths > 0) & (lengths <= 18)
+    if digits is None:
+        ok &= chars[:, 0] != ord("0")
+    else:
+        ok &= lengths == digits
+
+    out = np.zeros(len(chars), dtype=np.int64)
+    for j in range(min(width, int(lengths.max()), 18)):
+        digit = chars[:, j].astype(np.int64) - ord("0")
+        out = np.where(is_digit[:, j], out * 10 + digit, out)
+    out[~ok] = INVALID
+    return out.reshape(values.shape)
+
+
+def _bitmap(size: int, keys: np.ndarray) -> np.ndarray:
+    """Packed bitmap of ``size`` bits with ``keys`` set."""
+    bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+    np.bitwise_or.at(bits, keys >> 3, (1 << (keys & 7)).astype(np.uint8))
+    return bits
+
+
+def _test_bits(bits: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    return ((bits[keys >> 3] >> (keys & 7).astype(np.uint8)) & 1).astype(bool)
+
+# ============================================================
+# VALIDATOR
+# ============================================================
+
+class BatchValidator:
+    """
+    Usage:
+      validator = BatchValidator.load("postal_codes_pos_indonesia.bin")
+      verdicts = validator.validate(postal_codes, village_codes)  # uint8
+      names = validator.names(verdicts)
+    """
+
+    def __init__(self, index):
+        if not index.enriched:
+            raise ValueError("Batch validation requires an enriched artifact")
+        c = index.columns
+
+        self.village_codes = np.asarray(index.village_codes, dtype=np.int64)
+        postal = np.asarray(index.postal_codes, dtype=np.int64)
+        assigned = postal != NO_POSTAL_CODE
+
+        # postal_code → dense id (-1 = not used by any village)
+        known = np.unique(postal[assigned])
+        self.postal_ids = np.full(POSTAL_SPACE, INVALID, dtype=np.int64)
+        self.postal_ids[known] = np.arange(len(known))
+        self.n_postal = len(known)
+        self.village_postal = np.where(assigned, postal, INVALID)
+
+        # Per-village area index at every level, and which postal ids
+        # occur in each area
+        self.areas = {}
+        self.level_bits = {}
+        area = np.asarray(c["district_index"], dtype=np.int64)
+        for level in LEVELS:
+            self.areas[level] = area
+            count = len(c[f"{level}_codes"])
+            keys = area[assigned] * self.n_postal + self.postal_ids[postal[assigned]]
+            self.level_bits[level] = _bitmap(count * self.n_postal, keys)
+            if level != LEVELS[-1]:
+                area = np.asarray(c[f"{level}_parent"], dtype=np.int64)[area]
+
+    @classmethod
+    def load(cls, path):
+        return cls(load_index(path))
+
+    def validate(self, postal_codes, village_codes) -> np.ndarray:
+        """One verdict code (see VERDICTS) per (postal_code, village_code) row."""
+        postal = encode_codes(postal_codes, digits=5)
+        village = encode_codes(village_codes)
+        if postal.shape != village.shape:
+            raise ValueError("postal_codes and village_codes differ in length")
+
+        rows = np.searchsorted(self.village_codes, village)
+        rows[rows == len(self.village_codes)] = 0
+        found = (self.village_codes[rows] == village) & (village != INVALID)
+
+        in_range = (postal >= 0) & (postal < POSTAL_SPACE)
+        postal_id = np.full(postal.shape, INVALID, dtype=np.int64)
+        postal_id[in_range] = self.postal_ids[postal[in_range]]
+        found &= postal_id != INVALID
+        rows = rows[found]
+        postal_id = postal_id[found]
+
+        verdict = np.full(int(found.sum()), WRONG_PROVINCE, dtype=np.uint8)
+        # Narrowest level last, so it takes precedence
+        for code, level in zip(
+            (SAME_PROVINCE, SAME_REGENCY, SAME_DISTRICT), reversed(LEVELS)
+        ):
+            keys = self.areas[level][rows] * self.n_postal + postal_id
+            verdict[_test_bits(self.level_bits[level], keys)] = code
+        verdict[self.village_postal[rows] == postal[found]] = EXACT
+
+        verdicts = np.full(village.shape, UNKNOWN, dtype=np.uint8)
+        verdicts[found] = verdict
+        return verdicts
+
+    @staticmethod
+    def names(verdicts) -> np.ndarray:
+        """Verdict names for an array of verdict codes."""
+        return np.asarray(VERDICTS)[verdicts]
+
+    @staticmethod
+    def counts(verdicts):
+        """verdict name → number of rows."""
+        counts = np.bincount(verdicts, minlength=len(VERDICTS))
+        return {name: int(n) for name, n in zip(VERDICTS, counts)}
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def read_pairs(path: Path):
+    """(postal_codes, village_codes) string columns of a CSV."""
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"postal_code", "village_code"} - set(reader.fieldnames or [])
+        if missing:
+            die(f"{path} missing columns: {', '.join(sorted(missing))}")
+        rows = [(row["postal_code"] or "", row["village_code"] or "") for row in reader]
+    if not rows:
+        return np.array([], dtype=str), np.array([], dtype=str)
+    postal, village = zip(*rows)
+    return np.array(postal), np.array(village)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate (postal_code, village_code) pairs against an enriched artifact"
+    )
+    parser.add_argument(
+        "artifact",
+        help="Enriched artifact: postal_codes*_enriched.csv or *.bin",
+    )
+    parser.add_argument(
+        "--input",
+        required=True,
+        help="CSV with postal_code and village_code columns",
+    )
+    parser.add_argument(
+        "--output",
+        help="CSV of input rows with a verdict column (default: counts only)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        validator = BatchValidator.load(args.artifact)
+    except ValueError as exc:
+        die(str(exc))
+    postal, village = read_pairs(Path(args.input))
+
+    started = time.perf_counter()
+    verdicts = validator.validate(postal, village)
+    elapsed = time.perf_counter() - started
+
+    if args.output:
+        names = validator.names(verdicts)
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["postal_code", "village_code", "verdict"])
+            writer.writerows(zip(postal.tolist(), village.tolist(), names.tolist()))
+
+    json.dump(validator.counts(verdicts), sys.stdout, indent=2)
+    print()
+    rate = len(verdicts) / elapsed if elapsed else float("inf")
+    print(f"Validated {len(verdicts)} pairs in {elapsed:.3f}s ({rate:,.0f}/s)", file=sys.stderr)
+    if args.output:
+        print(f"→ {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_report import peak_rss_mb
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Generated inputs are kept here, one directory per (villages, seed)
+CACHE_DIR = PROJECT_ROOT / ".cache" / "benchmark"
+
+SCHEMA_PATH = PROJECT_ROOT / "schema" / "postal_code.schema.json"
+
+# Stage slowdowns under this many seconds are treated as noise
+MIN_REGRESSION_SECONDS = 0.05
+
+# Bump when the generator output changes
+GENERATOR_VERSION = 1
+
+STAGES = [
+    "load",
+    "sort",
+    "agreement",
+    "build_records",
+    "write_csv",
+    "write_json",
+    "sha256",
+    "validate",
+    "coverage",
+]
+
+# Real Kemendagri province codes (38 provinces)
+PROVINCE_CODES = [
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 31, 32, 33, 34, 35, 36, 51, 52, 53,
+    61, 62, 63, 64, 65, 71, 72, 73, 74, 75, 76, 81, 82, 91, 92, 93, 94, 95, 96,
+]
+
+# Shape of the real hierarchy (~83k villages): villages per district and
+# districts per regency; larger sizes widen the tree up to the code widths
+VILLAGES_PER_DISTRICT = 11.5
+DISTRICTS_PER_REGENCY = 14
+MAX_UNITS = 99            # 2-digit regency / district codes
+MAX_VILLAGES = 999        # 4-digit village suffix, per village type
+
+# OpenData Jabar only covers West Java
+OPENDATA_PROVINCE = 32
+OPENDATA_RATE = 0.98
+POS_RATE = 0.97
+POS_DUPLICATE_RATE = 0.02
+
+SYLLABLES = [
+    "ba", "ja", "ka", "ma", "na", "ra", "sa", "ta", "wa", "ya", "bu", "lu",
+    "mu", "su", "tu", "di", "ki", "li", "ni", "ri", "si", "ti", "go", "ko",
+    "lo", "mo", "ro", "so", "to", "ng", "an", "ang", "ung", "ing", "er",
+]
+SUFFIXES = ["", "", "", " Utara", " Selatan", " Barat", " Timur", " Baru", " Lama", " Jaya"]
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def parse_size(value: str) -> int:
+    """'83k' → 83000, '1M' → 1000000."""
+    value = value.strip()
+    scale = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}.get(value[-1:], 1)
+    number = value[:-1] if scale != 1 else value
+    try:
+        return int(float(number) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+# ============================================================
+# INPUT GENERATOR
+# ============================================================
+
+def _name(rnd) -> str:
+    word = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+    return word.capitalize() + rnd.choice(SUFFIXES)
+
+
+def _shape(villages: int):
+    """(regencies per province, districts per regency, villages per district)."""
+    districts = villages / VILLAGES_PER_DISTRICT
+    regencies = min(MAX_UNITS, max(1, round(districts / DISTRICTS_PER_REGENCY / len(PROVINCE_CODES))))
+    per_regency = min(MAX_UNITS, max(1, round(districts / regencies / len(PROVINCE_CODES))))
+    per_district = villages / (len(PROVINCE_CODES) * regencies * per_regency)
+    if per_district > 2 * MAX_VILLAGES:
+        die(f"{villages} villages do not fit the 10-digit village code space")
+    return regencies, per_regency, per_district
+
+
+def generate_inputs(directory: Path, villages: int, seed: int):
+    """
+    Write regions_id.csv, an OpenData Jabar CSV and a Pos Indonesia
+    JSONL for ``villages`` villages under ``directory``.
+    """
+    rnd = random.Random(seed)
+    regencies, per_regency, per_district = _shape(villages)
+    districts_total = len(PROVINCE_CODES) * regencies * per_regency
+
+    directory.mkdir(parents=True, exist_ok=True)
+    regions_path = directory / "regions_id.csv"
+    opendata_path = directory / "opendata_jabar.csv"
+    pos_path = directory / "village_postal_codes.jsonl"
+
+    written = 0
+    district_no = 0
+    with regions_path.open("w", newline="", encoding="utf-8") as regions_f, \
+            opendata_path.open("w", newline="", encoding="utf-8") as opendata_f, \
+            pos_path.open("w", encoding="utf-8") as pos_f:
+        regions_csv = csv.writer(regions_f)
+        regions_csv.writerow(
+            [
+                "province_code", "province_name", "regency_code", "regency_name",
+                "regency_type", "district_code", "district_name",
+                "village_code", "village_name", "village_type",
+            ]
+        )
+        opendata_csv = csv.writer(opendata_f)
+        opendata_csv.writerow(["id", "kemendagri_kode_desa_kelurahan", "kode_pos"])
+
+        for province in PROVINCE_CODES:
+            province_name = "Provinsi " + _name(rnd)
+            for r in range(1, regencies + 1):
+                regency_code = f"{province}{r:02d}"
+                regency_type = "city" if r > 70 else "regency"
+                regency_name = ("Kota " if regency_type == "city" else "") + _name(rnd)
+                for d in range(1, per_regency + 1):
+                    district_code = f"{regency_code}{d:02d}"
+                    district_name = _name(rnd)
+                    district_no += 1
+
+                    # Spread the remaining villages over the remaining districts
+                    remaining = villages - written
+                    left = districts_total - district_no + 1
+                    count = remaining // left
+                    if left > 1:
+                        count = round(count * rnd.uniform(0.6, 1.4))
+                    count = max(0, min(count, remaining, 2 * MAX_VILLAGES))
+
+                    urban = round(count * 0.1)
+                    postal_base = 10000 + (int(regency_code) * 37) % 89000
+                    for v in range(count):
+                        if v < urban:
+                            village_code = f"{district_code}{1001 + v}"
+                            village_type = "urban_village"
+                        else:
+                            village_code = f"{district_code}{2001 + v - urban}"
+                            village_type = "village"
+                        postal_code = f"{postal_base + d * 10 + v % 10:05d}"
+                        regions_csv.writerow(
+                            [
+                                province, province_name, regency_code, regency_name,
+                                regency_type, district_code, district_name,
+                                village_code, _name(rnd), village_type,
+                            ]
+                        )
+                        if province == OPENDATA_PROVINCE and rnd.random() < OPENDATA_RATE:
+                            dotted = f"{village_code[:2]}.{village_code[2:4]}.{village_code[4:6]}.{village_code[6:]}"
+                            opendata_csv.writerow([written, dotted, postal_code])
+                        if rnd.random() < POS_RATE:
+                            pos_f.write(json.dumps({"village_code": village_code, "postal_code": postal_code}) + "\n")
+                            if rnd.random() < POS_DUPLICATE_RATE:
+                                pos_f.write(json.dumps({"village_code": village_code, "postal_code": postal_code}) + "\n")
+                        written += 1
+
+    return {
+        "regions": regions_path,
+        "opendata": opendata_path,
+        "pos": pos_path,
+        "shape": {
+            "provinces": len(PROVINCE_CODES),
+            "regencies": len(PROVINCE_CODES) * regencies,
+            "districts": districts_total,
+            "villages": written,
+        },
+    }
+
+
+def cached_inputs(villages: int, seed: int):
+    directory = CACHE_DIR / f"v{GENERATOR_VERSION}-{villages}-{seed}"
+    marker = directory / "shape.json"
+    if marker.exists():
+        with marker.open(encoding="utf-8") as f:
+            shape = json.load(f)
+        return {
+            "regions": directory / "regions_id.csv",
+            "opendata": directory / "opendata_jabar.csv",
+            "pos": directory / "village_postal_codes.jsonl",
+            "shape": shape,
+        }, 0.0
+
+    started = time.perf_counter()
+    inputs = generate_inputs(directory, villages, seed)
+    with marker.open("w", encoding="utf-8") as f:
+        json.dump(inputs["shape"], f)
+    return inputs, time.perf_counter() - started
+
+# ============================================================
+# STAGES
+# ============================================================
+
+class StageClock:
+    """Accumulated wall time and peak RSS per pipeline stage."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.rss = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+            self.mark(name)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def mark(self, name):
+        self.rss[name] = peak_rss_mb()
+
+    def report(self):
+        return {
+            name: {"seconds": round(self.seconds[name], 3), "peak_rss_mb": self.rss[name]}
+            for name in STAGES
+            if name in self.seconds
+        }
+
+
+def _timed(clock, name, iterable):
+    """Yield from ``iterable``, charging the time spent producing items to ``name``."""
+    it = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            clock.add(name, time.perf_counter() - started)
+            return
+        clock.add(name, time.perf_counter() - started)
+        yield item
+
+
+def run_stages(inputs_dir: Path, workers: int):
+    """
+    Run the Derived Full-Coverage pipeline on generated inputs.
+
+    Records stream through build_records → write_csv → write_json in
+    one pass as in build_derived.py; each record's time is charged to
+    the stage that spent it. Peak RSS is the process peak at the end of
+    each stage.
+    """
+    from agreement import analyze
+    from artifact_writers import CsvArtifact, JsonArrayArtifact
+    from build_derived import RECORD_FIELDS, MergeStats, merge_join
+    from build_from_opendata_jabar import load_opendata_jabar
+    from pos_indonesia import read_pos_indonesia_jsonl
+    from coverage import compute_coverage
+    from regions_id import load_regions_id
+    from validate_schema import validate_artifact
+    from vector_engine import Source
+
+    out_dir = inputs_dir / "out"
+    out_dir.mkdir(exist_ok=True)
+    csv_path = out_dir / "postal_codes.csv"
+    json_path = out_dir / "postal_codes.json"
+    clock = StageClock()
+
+    with clock.stage("load"), contextlib.redirect_stdout(sys.stderr):
+        regions = load_regions_id(inputs_dir / "regions_id.csv", cache_dir=None)
+        official = load_opendata_jabar(inputs_dir / "opendata_jabar.csv")
+        pos = read_pos_indonesia_jsonl(inputs_dir / "village_postal_codes.jsonl", workers=workers)
+
+    with clock.stage("sort"):
+        official_sorted = Source.from_mapping(official)
+        pos_sorted = Source.from_mapping(pos)
+
+    with clock.stage("agreement"):
+        confidence = analyze(regions, official_sorted, pos_sorted).confidence_map()
+
+    stats = MergeStats()
+    records = _timed(
+        clock,
+        "build_records",
+        merge_join(regions, official_sorted.items(), pos_sorted.items(), confidence, stats),
+    )
+    with CsvArtifact(csv_path, RECORD_FIELDS) as csv_out, JsonArrayArtifact(json_path, RECORD_FIELDS) as json_out:
+        for record in records:
+            started = time.perf_counter()
+            csv_out.write(record)
+            middle = time.perf_counter()
+            json_out.write(record)
+            clock.add("write_csv", middle - started)
+            clock.add("write_json", time.perf_counter() - middle)
+    for name in ("build_records", "write_csv", "write_json"):
+        clock.mark(name)
+    del official_sorted, pos_sorted, confidence
+
+    with clock.stage("sha256"):
+        for path in (csv_path, json_path):
+            h = hashlib.sha256()
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+
+    with clock.stage("validate"):
+        with SCHEMA_PATH.open(encoding="utf-8") as f:
+            schema = json.load(f)
+        section = validate_artifact(json_path, schema, workers)
+
+    with clock.stage("coverage"):
+        compute_coverage(
+            regions,
+            {"OPENDATA_JABAR": official.keys(), "POSINDONESIA_SCRAPE": pos.keys()},
+        )
+
+    return {
+        "villages": len(regions),
+        "records": csv_out.count,
+        "official": stats.official,
+        "augmented": stats.augmented,
+        "validation_errors": section["errors"],
+        "output_bytes": {
+            csv_path.name: csv_path.stat().st_size,
+            json_path.name: json_path.stat().st_size,
+        },
+        "stages": clock.report(),
+        "total_seconds": round(sum(clock.seconds.values()), 3),
+    }
+
+# ============================================================
+# COMPARISON
+# ============================================================
+
+def compare(previous, current, threshold: float):
+    """Print per-stage timings against a previous results file."""
+    old_runs = {run["villages"]: run for run in previous.get("runs", [])}
+    regressions = 0
+    for run in current["runs"]:
+        old = old_runs.get(run["villages"])
+        if old is None:
+            continue
+        print(f"Villages {run['villages']} vs {previous.get('commit') or 'previous run'}")
+        for stage in STAGES + ["total"]:
+            if stage == "total":
+                before, after = old["total_seconds"], run["total_seconds"]
+            elif stage in run["stages"] and stage in old["stages"]:
+                before = old["stages"][stage]["seconds"]
+                after = run["stages"][stage]["seconds"]
+            else:
+                continue
+            ratio = after / before if before else float("inf")
+            flag = ""
+            if ratio > threshold and after - before >= MIN_REGRESSION_SECONDS:
+                flag = "  ← slower"
+                regressions += 1
+            print(f"- {stage:<13} {before:>9.3f}s → {after:>9.3f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the build pipeline on synthetic inputs"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="83k,1M",
+        help="Comma-separated village counts, e.g. 83k,1M,10M",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="Generator seed",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for parsing and validation",
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="Results output JSON",
+    )
+    parser.add_argument(
+        "--compare",
+        help="Previous results JSON to compare against",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Slowdown ratio reported as a regression",
+    )
+    parser.add_argument(
+        "--run-stages",
+        metavar="INPUTS_DIR",
+        help=argparse.SUPPRESS,  # child process entry point
+    )
+
+    args = parser.parse_args()
+
+    if args.run_stages:
+        json.dump(run_stages(Path(args.run_stages), args.workers), sys.stdout)
+        return
+
+    try:
+        sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    except argparse.ArgumentTypeError as exc:
+        die(str(exc))
+
+    results = {
+        "commit": git_commit(),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "seed": args.seed,
+        "runs": [],
+    }
+
+    for size in sizes:
+        inputs, generated = cached_inputs(size, args.seed)
+        print(f"Villages {size}: inputs {'generated in %.1fs' % generated if generated else 'cached'}")
+
+        # Fresh process per size so peak RSS is not carried over
+        child = subprocess.run(
+            [
+                sys.executable, __file__,
+                "--run-stages", str(inputs["regions"].parent),
+                "--workers", str(args.workers),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode != 0:
+            sys.stderr.write(child.stderr)
+            die(f"benchmark run failed for {size} villages")
+        run = json.loads(child.stdout)
+        run["shape"] = inputs["shape"]
+        results["runs"].append(run)
+
+        for stage, entry in run["stages"].items():
+            print(f"- {stage:<13} {entry['seconds']:>9.3f}s  peak {entry['peak_rss_mb']:>8.1f} MiB")
+        print(f"- {'total':<13} {run['total_seconds']:>9.3f}s")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"→ {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(previous, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
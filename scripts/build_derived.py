@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from agreement import PARAMETERS as AGREEMENT_PARAMETERS, analyze
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from build_from_opendata_jabar import load_opendata_jabar, warn_invalid_postal_codes
+from build_from_pos_indonesia import load_pos_indonesia_jsonl
+from build_report import BuildReport
+from incremental import IncrementalBuild
+from pos_indonesia import read_pos_indonesia_jsonl
+from postal_lookup import IndexBuilder, write_binary
+from vector_engine import Source, Tier, join, read_opendata_jabar
+
+# ============================================================
+# CONFIG — PINNED & REPRODUCIBLE
+# ============================================================
+
+# Derived Full-Coverage Release (BUILD.md): region-id villages,
+# OFFICIAL from OpenData Jabar, AUGMENTED from Pos Indonesia.
+
+REGION_ID_RELEASE = "v1.0.1"
+
+# Inputs (repo-relative)
+REGIONS_ID_FILE = Path("regions_id.csv")
+OPENDATA_JABAR_FILE = Path(
+    "data/sources/opendata-jabar/dispusipda-kode_pos_kab_kota_indonesia_data.csv"
+)
+POS_JSONL_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl"
+)
+OVERRIDES_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/postal_ingest_name_overrides.csv"
+)
+
+# Build metadata
+BUILD_YEAR = datetime.now(timezone.utc).year
+
+# OFFICIAL (per BUILD.md)
+SOURCE_OFFICIAL = "OPENDATA_JABAR"
+CONFIDENCE_OFFICIAL = 0.7
+OFFICIAL_YEAR = 2023
+
+# AUGMENTED (per BUILD.md: confidence 0.3 – 0.6, year = build year);
+# confidence is per village, from OpenData Jabar agreement (agreement.py)
+SOURCE_AUGMENTED = "POSINDONESIA_SCRAPE"
+
+# Outputs
+OUTPUT_CSV = Path("postal_codes.csv")
+OUTPUT_JSON = Path("postal_codes.json")
+OUTPUT_ENRICHED_CSV = Path("postal_codes_enriched.csv")
+OUTPUT_BIN = Path("postal_codes.bin")
+OUTPUT_AGREEMENT = Path("postal_codes_agreement.json")
+MANIFEST_FILE = Path("build_manifest_derived.json")
+REPORT_FILE = Path("build_report_derived.json")
+
+# BUILD_ENGINE: "records" merge-joins dict records one village at a time;
+# "vectorized" joins integer code columns (scripts/vector_engine.py).
+# Both write the same bytes.
+ENGINES = ("records", "vectorized")
+
+RECORD_FIELDS = [
+    "postal_code",
+    "village_code",
+    "village_name",
+    "village_type",
+    "source",
+    "confidence",
+    "year",
+    "status",
+]
+ENRICHED_FIELDS = RECORD_FIELDS + [
+    "district_code",
+    "district_name",
+    "regency_code",
+    "regency_name",
+    "province_code",
+    "province_name",
+]
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ============================================================
+# BUILD LOGIC
+# ============================================================
+
+class MergeStats:
+    def __init__(self):
+        self.official = 0
+        self.augmented = 0
+        self.unassigned = 0
+        self.unmatched_official = 0
+        self.unmatched_augmented = 0
+
+
+def merge_join(villages, official, augmented, confidence, stats: MergeStats):
+    """
+    Single linear pass over three inputs sorted by village_code:
+      - villages  : VillageTable (region-id, ground truth)
+      - official  : iterable of (village_code, postal_code), ascending
+      - augmented : iterable of (village_code, postal_code), ascending
+    ``confidence`` maps village_code → AUGMENTED confidence.
+
+    Yields one enriched record per village. OFFICIAL wins over
+    AUGMENTED; source codes absent from region-id are skipped and
+    counted. Only the current head of each input is held in memory.
+    """
+    official = iter(official)
+    augmented = iter(augmented)
+    o = next(official, None)
+    a = next(augmented, None)
+
+    for i, code in enumerate(villages.codes()):
+        while o is not None and o[0] < code:
+            stats.unmatched_official += 1
+            o = next(official, None)
+        while a is not None and a[0] < code:
+            stats.unmatched_augmented += 1
+            a = next(augmented, None)
+
+        meta = villages.village(i)
+        record = {
+            "postal_code": None,
+            "village_code": code,
+            "village_name": meta["village_name"],
+            "village_type": meta["village_type"],
+            "source": "NONE",
+            "confidence": 0.0,
+            "year": BUILD_YEAR,
+            "status": "UNASSIGNED",
+        }
+
+        if o is not None and o[0] == code:
+            record.update(
+                {
+                    "postal_code": o[1],
+                    "source": SOURCE_OFFICIAL,
+                    "confidence": CONFIDENCE_OFFICIAL,
+                    "year": OFFICIAL_YEAR,
+                    "status": "OFFICIAL",
+                }
+            )
+            stats.official += 1
+        elif a is not None and a[0] == code:
+            record.update(
+                {
+                    "postal_code": a[1],
+                    "source": SOURCE_AUGMENTED,
+                    "confidence": confidence[code],
+                    "status": "AUGMENTED",
+                }
+            )
+            stats.augmented += 1
+        else:
+            stats.unassigned += 1
+
+        if o is not None and o[0] == code:
+            o = next(official, None)
+        if a is not None and a[0] == code:
+            a = next(augmented, None)
+
+        for key in ENRICHED_FIELDS[len(RECORD_FIELDS):]:
+            record[key] = meta[key]
+        yield record
+
+    if o is not None:
+        stats.unmatched_official += 1 + sum(1 for _ in official)
+    if a is not None:
+        stats.unmatched_augmented += 1 + sum(1 for _ in augmented)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    for path, label in (
+        (REGIONS_ID_FILE, "regions_id.csv"),
+        (OPENDATA_JABAR_FILE, "OpenData Jabar CSV"),
+        (POS_JSONL_FILE, "POS Indonesia JSONL"),
+    ):
+        if not path.exists():
+            die(f"Missing {label}: {path}")
+
+    engine = os.environ.get("BUILD_ENGINE") or ENGINES[0]
+    if engine not in ENGINES:
+        die(f"BUILD_ENGINE must be one of {', '.join(ENGINES)}, not {engine!r}")
+    vectorized = engine == "vectorized"
+
+    report = BuildReport("derived", REPORT_FILE)
+
+    build = IncrementalBuild(
+        MANIFEST_FILE,
+        {
+            "region_id_release": REGION_ID_RELEASE,
+            "build_year": BUILD_YEAR,
+            "official": [SOURCE_OFFICIAL, CONFIDENCE_OFFICIAL, OFFICIAL_YEAR],
+            "augmented": [SOURCE_AUGMENTED, AGREEMENT_PARAMETERS],
+            "fields": ENRICHED_FIELDS,
+        },
+    )
+    with report.stage("load_regions") as stage:
+        villages = build.villages("regions_id", REGIONS_ID_FILE)
+        stage.rows_out = len(villages)
+    if vectorized:
+        # Sources are parsed straight into code columns; a changed input
+        # means a full rebuild, which this engine always does anyway
+        with report.stage("load_opendata_jabar") as stage:
+            build.source("opendata_jabar", OPENDATA_JABAR_FILE)
+            try:
+                official = read_opendata_jabar(OPENDATA_JABAR_FILE)
+            except ValueError as exc:
+                die(str(exc))
+            warn_invalid_postal_codes("OpenData Jabar", official.rejected)
+            stage.rows_out = len(official)
+        with report.stage("load_pos_indonesia") as stage:
+            build.source("pos_indonesia", POS_JSONL_FILE)
+            augmented = Source.from_mapping(load_pos_indonesia_jsonl(POS_JSONL_FILE))
+            stage.rows_out = len(augmented)
+    else:
+        with report.stage("load_opendata_jabar") as stage:
+            official_map = build.mapping(
+                "opendata_jabar", OPENDATA_JABAR_FILE, load_opendata_jabar
+            )
+            stage.rows_out = len(official_map)
+        with report.stage("load_pos_indonesia") as stage:
+            pos_map = build.mapping(
+                "pos_indonesia",
+                POS_JSONL_FILE,
+                load_pos_indonesia_jsonl,
+                parse_tail=read_pos_indonesia_jsonl,
+            )
+            stage.rows_out = len(pos_map)
+
+    # AUGMENTED confidence follows from agreement with OpenData Jabar
+    with report.stage("agreement", rows_in=len(villages)) as stage:
+        if not vectorized:
+            # The merge streams these sorted columns; the dicts can go
+            official = Source.from_mapping(official_map)
+            augmented = Source.from_mapping(pos_map)
+            del official_map, pos_map
+        agreement = analyze(villages, official, augmented)
+        if vectorized:
+            confidence = agreement.confidence
+        else:
+            confidence = agreement.confidence_map()
+            build.derived("confidence", confidence)
+        stage.rows_out = len(augmented)
+    # Overrides steer the scrape, not any one record: a change (or the
+    # file appearing or going away) rebuilds everything
+    build.source("overrides", OVERRIDES_FILE)
+
+    outputs = [OUTPUT_CSV, OUTPUT_JSON, OUTPUT_ENRICHED_CSV, OUTPUT_BIN, OUTPUT_AGREEMENT]
+    if build.up_to_date(outputs):
+        with report.stage("sha256") as stage:
+            checksums = {path.name: sha256(path) for path in outputs}
+            stage.rows_in = len(checksums)
+        report.write(artifacts=checksums)
+
+        print("Build up to date (Derived Full-Coverage) — inputs unchanged")
+        for path in outputs:
+            print(f"- {path} sha256:{checksums[path.name]}")
+        return
+
+    stats = MergeStats()
+    if vectorized:
+        # One searchsorted per source over the village_code column;
+        # OFFICIAL is applied last so it wins over AUGMENTED
+        with report.stage("join", rows_in=len(villages)) as stage:
+            try:
+                release = join(
+                    villages,
+                    [
+                        Tier(official, "OFFICIAL", SOURCE_OFFICIAL,
+                             CONFIDENCE_OFFICIAL, OFFICIAL_YEAR),
+                        Tier(augmented, "AUGMENTED", SOURCE_AUGMENTED,
+                             confidence, BUILD_YEAR),
+                    ],
+                    BUILD_YEAR,
+                )
+            except ValueError as exc:
+                die(str(exc))
+            stage.rows_out = len(release)
+        stats.official, stats.augmented = release.matched
+        stats.unassigned = release.unassigned
+        stats.unmatched_official, stats.unmatched_augmented = release.unmatched
+        previous = dict.fromkeys((OUTPUT_CSV, OUTPUT_JSON, OUTPUT_ENRICHED_CSV))
+    else:
+        # A single linear pass over villages and the sorted source columns
+        # built for the agreement stage. Codes those columns could not hold
+        # cannot occur in region-id either.
+        records = merge_join(
+            villages, official.items(), augmented.items(), confidence, stats
+        )
+        stats.unmatched_official += official.unmatchable
+        stats.unmatched_augmented += augmented.unmatchable
+        previous = {
+            path: build.previous_artifact(path)
+            for path in (OUTPUT_CSV, OUTPUT_JSON, OUTPUT_ENRICHED_CSV)
+        }
+
+    index = IndexBuilder()
+    with report.stage("build_records", rows_in=len(villages)) as stage:
+        with CsvArtifact(
+            OUTPUT_CSV, RECORD_FIELDS, previous[OUTPUT_CSV]
+        ) as core_csv, JsonArrayArtifact(
+            OUTPUT_JSON, RECORD_FIELDS, previous[OUTPUT_JSON]
+        ) as core_json, CsvArtifact(
+            OUTPUT_ENRICHED_CSV, ENRICHED_FIELDS, previous[OUTPUT_ENRICHED_CSV]
+        ) as enriched_csv:
+            if vectorized:
+                for chunk in release.chunks():
+                    codes = release.codes[chunk].tolist()
+                    for writer, fields, kind in (
+                        (core_csv, RECORD_FIELDS, "csv"),
+                        (core_json, RECORD_FIELDS, "json"),
+                        (enriched_csv, ENRICHED_FIELDS, "csv"),
+                    ):
+                        writer.write_fragments(
+                            codes, release.fragments(fields, kind, chunk)
+                        )
+            else:
+                for record in records:
+                    core_csv.write(record)
+                    core_json.write(record)
+                    enriched_csv.write(record)
+                    index.add(record)
+        stage.rows_out = core_csv.count
+        stage.output(OUTPUT_CSV, OUTPUT_JSON, OUTPUT_ENRICHED_CSV)
+
+    with report.stage("write_binary", rows_in=core_csv.count) as stage:
+        write_binary(OUTPUT_BIN, release.index() if vectorized else index.build())
+        stage.output(OUTPUT_BIN)
+
+    with report.stage("write_agreement") as stage:
+        agreement.write(OUTPUT_AGREEMENT)
+        stage.output(OUTPUT_AGREEMENT)
+
+    with report.stage("manifest") as stage:
+        rebuild = build.finish(
+            [core_csv, core_json, enriched_csv], [OUTPUT_BIN, OUTPUT_AGREEMENT]
+        )["rebuild"]
+        stage.output(MANIFEST_FILE)
+
+    with report.stage("sha256") as stage:
+        checksums = {path.name: sha256(path) for path in outputs}
+        stage.rows_in = len(checksums)
+
+    total = core_csv.count
+    report.write(
+        rebuild=rebuild,
+        engine=engine,
+        records={
+            "total": total,
+            "official": stats.official,
+            "augmented": stats.augmented,
+            "unassigned": stats.unassigned,
+        },
+        artifacts=checksums,
+    )
+
+    print("Build complete — Derived Full-Coverage")
+    print(f"Region-ID release : {REGION_ID_RELEASE}")
+    print(f"Total villages    : {total}")
+    print(f"OFFICIAL          : {stats.official}")
+    print(f"AUGMENTED         : {stats.augmented}")
+    coverage = (total - stats.unassigned) / total * 100 if total else 0.0
+    print(f"Coverage          : {coverage:.2f}%")
+    if stats.unassigned:
+        print(
+            f"WARNING: {stats.unassigned} villages have no postal code signal "
+            "and are emitted as UNASSIGNED",
+            file=sys.stderr,
+        )
+    print(
+        f"Skipped source codes not in region-id: "
+        f"{stats.unmatched_official} OpenData Jabar, "
+        f"{stats.unmatched_augmented} Pos Indonesia"
+    )
+    for path in outputs:
+        print(f"- {path} sha256:{checksums[path.name]}")
+    print(f"- {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 
 import csv
-import json
 import hashlib
 import re
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from build_report import BuildReport
+from parallel_build import build_workers, parallel_records
+from postal_lookup import IndexBuilder, is_postal_code, write_binary
+from incremental import IncrementalBuild
+from regions_id import VILLAGE_COLUMNS
+
 # ============================================================
 # CONFIG — REPRODUCIBLE & EXPLICIT
 # ============================================================
@@ -28,6 +34,9 @@ OPENDATA_JABAR_FILE = (
 )
 OPENDATA_JABAR_YEAR = 2023
 
+# Skipped source rows listed individually in the load warning
+MAX_REPORTED_ROWS = 10
+
 # Build metadata
 BUILD_YEAR = datetime.now(timezone.utc).year
 BUILD_SOURCE = "OPENDATA_JABAR"
@@ -35,6 +44,20 @@ BUILD_SOURCE = "OPENDATA_JABAR"
 # Output (scoped, non-destructive)
 OUTPUT_CSV = PROJECT_ROOT / "postal_codes_opendata_jabar.csv"
 OUTPUT_JSON = PROJECT_ROOT / "postal_codes_opendata_jabar.json"
+OUTPUT_BIN = PROJECT_ROOT / "postal_codes_opendata_jabar.bin"
+MANIFEST_FILE = PROJECT_ROOT / "build_manifest_opendata_jabar.json"
+REPORT_FILE = PROJECT_ROOT / "build_report_opendata_jabar.json"
+
+RECORD_FIELDS = [
+    "postal_code",
+    "village_code",
+    "village_name",
+    "village_type",
+    "source",
+    "confidence",
+    "year",
+    "status",
+]
 
 # Confidence (per BUILD.md)
 CONFIDENCE_OFFICIAL = 0.7
@@ -64,40 +87,21 @@ def normalize_kemendagri_code(value: str) -> str:
 # LOADERS
 # ============================================================
 
-def load_regions_id(path: Path):
-    """
-    Load village ground truth from regions_id.csv
-    Required columns:
-      - village_code
-      - village_name
-      - village_type
-    """
-    villages = {}
-
-    if not path.exists():
-        die(f"Missing regions_id.csv: {path}")
-
-    with path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        required = {"village_code", "village_name", "village_type"}
-        missing = required - set(reader.fieldnames or [])
-        if missing:
-            die(f"regions_id.csv missing columns: {', '.join(sorted(missing))}")
-
-        for row in reader:
-            code = row["village_code"].strip()
-            if not code:
-                die("Empty village_code found in regions_id.csv")
-
-            villages[code] = {
-                "village_name": row["village_name"].strip(),
-                "village_type": row["village_type"].strip(),
-            }
-
-    if not villages:
-        die("No villages loaded from regions_id.csv")
-
-    return villages
+def warn_invalid_postal_codes(label, rejected):
+    """Report source rows skipped for a postal_code the schema rejects."""
+    if not rejected:
+        return
+    print(
+        f"WARNING: skipped {len(rejected)} {label} rows with an invalid postal_code",
+        file=sys.stderr,
+    )
+    for where, village_code, postal_code in rejected[:MAX_REPORTED_ROWS]:
+        print(
+            f"  - {where}: village_code {village_code}, postal_code {postal_code!r}",
+            file=sys.stderr,
+        )
+    if len(rejected) > MAX_REPORTED_ROWS:
+        print(f"  - ... and {len(rejected) - MAX_REPORTED_ROWS} more", file=sys.stderr)
 
 
 def load_opendata_jabar(path: Path):
@@ -106,8 +110,10 @@ def load_opendata_jabar(path: Path):
     Required columns:
       - kemendagri_kode_desa_kelurahan
       - kode_pos
+    Rows whose postal code is not 5 digits are skipped and reported.
     """
     mapping = {}
+    rejected = []
 
     if not path.exists():
         die(f"Missing OpenData Jabar file: {path}")
@@ -132,8 +138,12 @@ def load_opendata_jabar(path: Path):
                 continue
 
             if postal_code and postal_code != "0":
+                if not is_postal_code(postal_code):
+                    rejected.append((f"line {reader.line_num}", village_code, postal_code))
+                    continue
                 mapping[village_code] = postal_code
 
+    warn_invalid_postal_codes("OpenData Jabar", rejected)
     print(f"Loaded {len(mapping)} postal codes from OpenData Jabar")
     return mapping
 
@@ -141,14 +151,15 @@ def load_opendata_jabar(path: Path):
 # BUILD LOGIC
 # ============================================================
 
-def build_records(villages, official_map):
+def build_records(villages, official_map, rows=None):
     """
-    Build one record per village.
+    Yield one record per village, in village_code order (or the order
+    of ``rows``, a subset of VillageTable rows).
     OFFICIAL if available in OpenData Jabar, else UNASSIGNED.
     """
-    records = []
-
-    for village_code, meta in villages.items():
+    for i in range(len(villages)) if rows is None else rows:
+        meta = villages.village(i)
+        village_code = meta["village_code"]
         record = {
             "postal_code": None,
             "village_code": village_code,
@@ -171,49 +182,119 @@ def build_records(villages, official_map):
                 }
             )
 
-        records.append(record)
-
-    return records
-
-# ============================================================
-# OUTPUT
-# ============================================================
-
-def write_csv(path: Path, records):
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
-        writer.writeheader()
-        writer.writerows(records)
-
-
-def write_json(path: Path, records):
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+        yield record
 
 # ============================================================
 # MAIN
 # ============================================================
 
 def main():
-    villages = load_regions_id(REGIONS_ID_FILE)
-    official_map = load_opendata_jabar(OPENDATA_JABAR_FILE)
-
-    records = build_records(villages, official_map)
-    records.sort(key=lambda r: r["village_code"])
-
-    write_csv(OUTPUT_CSV, records)
-    write_json(OUTPUT_JSON, records)
+    try:
+        workers = build_workers()
+    except ValueError as exc:
+        die(str(exc))
+    report = BuildReport("opendata_jabar", REPORT_FILE)
+
+    # Anything that shapes a record's bytes; a change forces a full rebuild
+    build = IncrementalBuild(
+        MANIFEST_FILE,
+        {
+            "region_id_release": REGION_ID_RELEASE,
+            "build_year": BUILD_YEAR,
+            "source": BUILD_SOURCE,
+            "confidence": CONFIDENCE_OFFICIAL,
+            "year": OPENDATA_JABAR_YEAR,
+            "fields": RECORD_FIELDS,
+        },
+    )
+    with report.stage("load_regions") as stage:
+        villages = build.villages("regions_id", REGIONS_ID_FILE, VILLAGE_COLUMNS)
+        stage.rows_out = len(villages)
+    with report.stage("load_opendata_jabar") as stage:
+        official_map = build.mapping(
+            "opendata_jabar", OPENDATA_JABAR_FILE, load_opendata_jabar
+        )
+        stage.rows_out = len(official_map)
+
+    total = len(villages)
+    official = sum(1 for code in villages.codes() if code in official_map)
+
+    rebuild = None
+    parallel = False
+    if build.up_to_date([OUTPUT_CSV, OUTPUT_JSON, OUTPUT_BIN]):
+        print("Build up to date — OpenData Jabar (legacy), inputs unchanged")
+    else:
+        # VillageTable is sorted by village_code, so records stream out in
+        # deterministic order without a separate sort. Records of villages
+        # whose inputs did not change reuse their previous bytes; a full
+        # rebuild with BUILD_WORKERS > 1 serialises provinces in parallel
+        # and merges them back into village_code order.
+        previous_csv = build.previous_artifact(OUTPUT_CSV)
+        previous_json = build.previous_artifact(OUTPUT_JSON)
+        parallel = workers > 1 and previous_csv is None and previous_json is None
+        index = IndexBuilder()
+        with report.stage("build_records", rows_in=total) as stage:
+            with CsvArtifact(
+                OUTPUT_CSV, RECORD_FIELDS, previous_csv
+            ) as csv_out, JsonArrayArtifact(
+                OUTPUT_JSON, previous=previous_json
+            ) as json_out:
+                if parallel:
+                    for record, (csv_bytes, json_bytes) in parallel_records(
+                        build_records,
+                        villages,
+                        (official_map,),
+                        (csv_out, json_out),
+                        RECORD_FIELDS,
+                        workers,
+                    ):
+                        csv_out.write_fragment(record["village_code"], csv_bytes)
+                        json_out.write_fragment(record["village_code"], json_bytes)
+                        index.add(record)
+                else:
+                    for record in build_records(villages, official_map):
+                        csv_out.write(record)
+                        json_out.write(record)
+                        index.add(record)
+            stage.rows_out = csv_out.count
+            stage.output(OUTPUT_CSV, OUTPUT_JSON)
+
+        with report.stage("write_binary", rows_in=csv_out.count) as stage:
+            write_binary(OUTPUT_BIN, index.build())
+            stage.output(OUTPUT_BIN)
+
+        with report.stage("manifest") as stage:
+            rebuild = build.finish([csv_out, json_out], [OUTPUT_BIN])["rebuild"]
+            stage.output(MANIFEST_FILE)
+
+        print("Build complete — OpenData Jabar (legacy)")
+        print(
+            f"Rebuild          : {rebuild['mode']}, "
+            f"{rebuild['changed_villages']} changed villages, "
+            f"{rebuild['reused_records']} records reused"
+        )
+
+    with report.stage("sha256") as stage:
+        checksums = {
+            path.name: sha256(path) for path in (OUTPUT_CSV, OUTPUT_JSON, OUTPUT_BIN)
+        }
+        stage.rows_in = len(checksums)
 
-    total = len(records)
-    official = sum(1 for r in records if r["status"] == "OFFICIAL")
+    report.write(
+        rebuild=rebuild,
+        workers=workers if parallel else 1,
+        records={"total": total, "official": official},
+        artifacts=checksums,
+    )
 
-    print("Build complete — OpenData Jabar (legacy)")
     print(f"Region-ID release : {REGION_ID_RELEASE}")
     print(f"Total villages   : {total}")
     print(f"OFFICIAL         : {official}")
     print(f"Coverage         : {(official / total) * 100:.2f}%")
-    print(f"CSV  : {OUTPUT_CSV} (sha256: {sha256(OUTPUT_CSV)})")
-    print(f"JSON : {OUTPUT_JSON} (sha256: {sha256(OUTPUT_JSON)})")
+    print(f"CSV  : {OUTPUT_CSV} (sha256: {checksums[OUTPUT_CSV.name]})")
+    print(f"JSON : {OUTPUT_JSON} (sha256: {checksums[OUTPUT_JSON.name]})")
+    print(f"BIN  : {OUTPUT_BIN} (sha256: {checksums[OUTPUT_BIN.name]})")
+    print(f"REPORT: {REPORT_FILE}")
 
 
 if __name__ == "__main__":
@@ -1,31 +1,78 @@
 #!/usr/bin/env python3
 
-import csv
-import json
 import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 import sys
 
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from autocomplete import write_autocomplete
+from build_from_opendata_jabar import load_opendata_jabar
+from build_report import BuildReport
+from parallel_build import build_workers, parallel_records
+from pos_indonesia import POS_JSONL_FILE, read_pos_indonesia_jsonl
+from postal_lookup import IndexBuilder, write_binary
+from shards import SHARD_MANIFEST, ShardWriter
+from incremental import IncrementalBuild
+
+# Agreement scoring needs numpy; without it the build falls back to
+# UNSCORED_CONFIDENCE like it does without the OpenData Jabar CSV
+try:
+    from agreement import PARAMETERS as AGREEMENT_PARAMETERS, analyze
+    from vector_engine import Source
+except ImportError:
+    analyze = None
+
 # ============================================================
 # CONFIG — PINNED & REPRODUCIBLE
 # ============================================================
 
 # Inputs (repo-relative)
 REGIONS_ID_FILE = Path("regions_id.csv")
-POS_JSONL_FILE = Path(
-    "data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl"
+OPENDATA_JABAR_FILE = Path(
+    "data/sources/opendata-jabar/dispusipda-kode_pos_kab_kota_indonesia_data.csv"
+)
+OVERRIDES_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/postal_ingest_name_overrides.csv"
 )
 
 # Build metadata
 BUILD_YEAR = datetime.now(timezone.utc).year
 SOURCE_NAME = "POSINDONESIA_LOOKUP"
-CONFIDENCE_POS = 1.0
+# Confidence is per village, from OpenData Jabar agreement (agreement.py);
+# without numpy or the OpenData Jabar CSV every village gets the
+# AUGMENTED floor
+UNSCORED_CONFIDENCE = 0.3
 
 # Outputs
 OUTPUT_CORE_CSV = Path("postal_codes_pos_indonesia.csv")
 OUTPUT_CORE_JSON = Path("postal_codes_pos_indonesia.json")
 OUTPUT_ENRICHED_CSV = Path("postal_codes_pos_indonesia_enriched.csv")
+OUTPUT_BIN = Path("postal_codes_pos_indonesia.bin")
+OUTPUT_AUTOCOMPLETE = Path("postal_codes_pos_indonesia_autocomplete.bin")
+OUTPUT_AGREEMENT = Path("postal_codes_pos_indonesia_agreement.json")
+SHARD_DIR = Path("shards/pos_indonesia")
+MANIFEST_FILE = Path("build_manifest_pos_indonesia.json")
+REPORT_FILE = Path("build_report_pos_indonesia.json")
+
+CORE_FIELDS = [
+    "postal_code",
+    "village_code",
+    "village_name",
+    "village_type",
+    "source",
+    "confidence",
+    "year",
+    "status",
+]
+ENRICHED_FIELDS = CORE_FIELDS + [
+    "district_code",
+    "district_name",
+    "regency_code",
+    "regency_name",
+    "province_code",
+    "province_name",
+]
 
 # ============================================================
 # UTILITIES
@@ -47,78 +94,8 @@ def sha256(path: Path) -> str:
 # LOADERS
 # ============================================================
 
-def load_regions_id(path: Path):
-    """
-    Load flattened regions_id.csv
-    REQUIRED columns:
-      village_code, village_name, village_type,
-      district_code, district_name,
-      regency_code, regency_name,
-      province_code, province_name
-    """
-    villages = {}
-
-    with path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-        required = {
-            "village_code",
-            "village_name",
-            "village_type",
-            "district_code",
-            "district_name",
-            "regency_code",
-            "regency_name",
-            "province_code",
-            "province_name",
-        }
-
-        missing = required - set(reader.fieldnames or [])
-        if missing:
-            die(f"regions_id.csv missing columns: {', '.join(sorted(missing))}")
-
-        for row in reader:
-            code = row["village_code"].strip()
-            if not code:
-                die("Empty village_code in regions_id.csv")
-
-            villages[code] = {
-                "village_name": row["village_name"].strip(),
-                "village_type": row["village_type"].strip(),
-                "district_code": row["district_code"].strip(),
-                "district_name": row["district_name"].strip(),
-                "regency_code": row["regency_code"].strip(),
-                "regency_name": row["regency_name"].strip(),
-                "province_code": row["province_code"].strip(),
-                "province_name": row["province_name"].strip(),
-            }
-
-    if not villages:
-        die("No villages loaded from regions_id.csv")
-
-    return villages
-
-
 def load_pos_indonesia_jsonl(path: Path):
-    """
-    Load POS Indonesia scrape JSONL.
-    Expected keys per line:
-      village_code, postal_code
-    """
-    mapping = {}
-
-    with path.open(encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            obj = json.loads(line)
-            village_code = obj.get("village_code")
-            postal_code = obj.get("postal_code")
-
-            if not village_code or not postal_code:
-                continue
-
-            mapping[village_code] = postal_code
+    mapping = read_pos_indonesia_jsonl(path)
 
     if not mapping:
         die("No postal codes loaded from POS Indonesia JSONL")
@@ -129,30 +106,31 @@ def load_pos_indonesia_jsonl(path: Path):
 # BUILD LOGIC
 # ============================================================
 
-def build_records(villages, pos_map):
-    core_records = []
-    enriched_records = []
-
-    for village_code, meta in villages.items():
+def build_records(villages, pos_map, confidence, rows=None):
+    """
+    Yield one enriched record per ingested village, in village_code order
+    (or the order of ``rows``, a subset of VillageTable rows).
+    ``confidence`` maps village_code → AUGMENTED confidence.
+    The core artifacts are the first CORE_FIELDS of each record.
+    """
+    for i in range(len(villages)) if rows is None else rows:
+        village_code = villages.village_code(i)
         if village_code not in pos_map:
             # POS Indonesia ingestion is expected to be 100%
             continue
 
         postal_code = pos_map[village_code]
+        meta = villages.village(i)
 
-        core = {
+        yield {
             "postal_code": postal_code,
             "village_code": village_code,
             "village_name": meta["village_name"],
             "village_type": meta["village_type"],
             "source": SOURCE_NAME,
-            "confidence": CONFIDENCE_POS,
+            "confidence": confidence[village_code],
             "year": BUILD_YEAR,
             "status": "AUGMENTED",
-        }
-
-        enriched = {
-            **core,
             "district_code": meta["district_code"],
             "district_name": meta["district_name"],
             "regency_code": meta["regency_code"],
@@ -161,26 +139,6 @@ def build_records(villages, pos_map):
             "province_name": meta["province_name"],
         }
 
-        core_records.append(core)
-        enriched_records.append(enriched)
-
-    return core_records, enriched_records
-
-# ============================================================
-# OUTPUT
-# ============================================================
-
-def write_csv(path: Path, records):
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
-        writer.writeheader()
-        writer.writerows(records)
-
-
-def write_json(path: Path, records):
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
-
 # ============================================================
 # MAIN
 # ============================================================
@@ -192,24 +150,200 @@ def main():
     if not POS_JSONL_FILE.exists():
         die(f"Missing POS Indonesia JSONL: {POS_JSONL_FILE}")
 
-    villages = load_regions_id(REGIONS_ID_FILE)
-    pos_map = load_pos_indonesia_jsonl(POS_JSONL_FILE)
-
-    core, enriched = build_records(villages, pos_map)
-
-    # Deterministic ordering
-    core.sort(key=lambda r: r["village_code"])
-    enriched.sort(key=lambda r: r["village_code"])
-
-    write_csv(OUTPUT_CORE_CSV, core)
-    write_json(OUTPUT_CORE_JSON, core)
-    write_csv(OUTPUT_ENRICHED_CSV, enriched)
+    if analyze is None:
+        scored = False
+        print(
+            f"WARNING: numpy is not installed; every village gets confidence "
+            f"{UNSCORED_CONFIDENCE} (no agreement signal)",
+            file=sys.stderr,
+        )
+    elif not OPENDATA_JABAR_FILE.exists():
+        scored = False
+        print(
+            f"WARNING: Missing OpenData Jabar CSV: {OPENDATA_JABAR_FILE}; every "
+            f"village gets confidence {UNSCORED_CONFIDENCE} (no agreement signal)",
+            file=sys.stderr,
+        )
+    else:
+        scored = True
+
+    try:
+        workers = build_workers()
+    except ValueError as exc:
+        die(str(exc))
+    report = BuildReport("pos_indonesia", REPORT_FILE)
+
+    # Anything that shapes a record's bytes; a change forces a full rebuild
+    build = IncrementalBuild(
+        MANIFEST_FILE,
+        {
+            "build_year": BUILD_YEAR,
+            "source": SOURCE_NAME,
+            "confidence": AGREEMENT_PARAMETERS if scored else UNSCORED_CONFIDENCE,
+            "fields": ENRICHED_FIELDS,
+        },
+    )
+    with report.stage("load_regions") as stage:
+        villages = build.villages("regions_id", REGIONS_ID_FILE)
+        stage.rows_out = len(villages)
+    with report.stage("load_pos_indonesia") as stage:
+        pos_map = build.mapping(
+            "pos_indonesia",
+            POS_JSONL_FILE,
+            load_pos_indonesia_jsonl,
+            parse_tail=read_pos_indonesia_jsonl,
+        )
+        stage.rows_out = len(pos_map)
+
+    # Confidence follows from agreement with OpenData Jabar; a village
+    # whose score moved is rebuilt like one whose postal code changed
+    agreement = None
+    if scored:
+        with report.stage("load_opendata_jabar") as stage:
+            official_map = build.mapping(
+                "opendata_jabar", OPENDATA_JABAR_FILE, load_opendata_jabar
+            )
+            stage.rows_out = len(official_map)
+        with report.stage("agreement", rows_in=len(villages)) as stage:
+            agreement = analyze(
+                villages, Source.from_mapping(official_map), Source.from_mapping(pos_map)
+            )
+            confidence = agreement.confidence_map()
+            build.derived("confidence", confidence)
+            stage.rows_out = len(confidence)
+    else:
+        confidence = dict.fromkeys(pos_map, UNSCORED_CONFIDENCE)
+        # Statistics of an earlier scored build would no longer apply
+        OUTPUT_AGREEMENT.unlink(missing_ok=True)
+    # Overrides steer the scrape, not any one record: a change (or the
+    # file appearing or going away) rebuilds everything
+    build.source("overrides", OVERRIDES_FILE)
+
+    outputs = [
+        OUTPUT_CORE_CSV,
+        OUTPUT_CORE_JSON,
+        OUTPUT_ENRICHED_CSV,
+        OUTPUT_BIN,
+        OUTPUT_AUTOCOMPLETE,
+        *([OUTPUT_AGREEMENT] if scored else []),
+        SHARD_DIR / SHARD_MANIFEST,
+    ]
+    if build.up_to_date(outputs):
+        with report.stage("sha256") as stage:
+            checksums = {path.name: sha256(path) for path in outputs}
+            stage.rows_in = len(checksums)
+        report.write(rebuild=None, artifacts=checksums)
+
+        print("Build up to date (POS Indonesia) — inputs unchanged")
+        for path in outputs:
+            print(f"- {path} sha256:{checksums[path.name]}")
+        return
+
+    # Deterministic ordering comes from VillageTable (sorted by village_code);
+    # each record is written to every artifact and then dropped. Records of
+    # villages whose inputs did not change reuse their previous bytes; a
+    # full rebuild with BUILD_WORKERS > 1 serialises provinces in parallel
+    # and merges them back into village_code order.
+    previous = {
+        path: build.previous_artifact(path)
+        for path in (OUTPUT_CORE_CSV, OUTPUT_CORE_JSON, OUTPUT_ENRICHED_CSV)
+    }
+    parallel = workers > 1 and not any(previous.values())
+    index = IndexBuilder()
+    with report.stage("build_records", rows_in=len(villages)) as stage:
+        with CsvArtifact(
+            OUTPUT_CORE_CSV, CORE_FIELDS, previous[OUTPUT_CORE_CSV]
+        ) as core_csv, JsonArrayArtifact(
+            OUTPUT_CORE_JSON, CORE_FIELDS, previous[OUTPUT_CORE_JSON]
+        ) as core_json, CsvArtifact(
+            OUTPUT_ENRICHED_CSV, ENRICHED_FIELDS, previous[OUTPUT_ENRICHED_CSV]
+        ) as enriched_csv, ShardWriter(
+            SHARD_DIR, OUTPUT_CORE_CSV.stem, CORE_FIELDS
+        ) as shards:
+            writers = (core_csv, core_json, enriched_csv)
+            if parallel:
+                for record, fragments in parallel_records(
+                    build_records,
+                    villages,
+                    (pos_map, confidence),
+                    writers,
+                    ENRICHED_FIELDS,
+                    workers,
+                ):
+                    for writer, fragment in zip(writers, fragments):
+                        writer.write_fragment(record["village_code"], fragment)
+                    index.add(record)
+                    shards.write(record, fragments[:2])
+            else:
+                for record in build_records(villages, pos_map, confidence):
+                    for writer in writers:
+                        writer.write(record)
+                    index.add(record)
+                    shards.write(record)
+        stage.rows_out = core_csv.count
+        stage.output(OUTPUT_CORE_CSV, OUTPUT_CORE_JSON, OUTPUT_ENRICHED_CSV)
+        stage.output(*(SHARD_DIR / f["path"] for s in shards.shards for f in s["files"].values()))
+
+    # Binary artifact carries the enriched columns, so it supports rollups
+    with report.stage("write_binary", rows_in=core_csv.count) as stage:
+        lookup_index = index.build()
+        write_binary(OUTPUT_BIN, lookup_index)
+        stage.output(OUTPUT_BIN)
+
+    # Name search for address forms, shipped as its own artifact
+    with report.stage("write_autocomplete", rows_in=core_csv.count) as stage:
+        write_autocomplete(OUTPUT_AUTOCOMPLETE, lookup_index)
+        stage.output(OUTPUT_AUTOCOMPLETE)
+
+    # Agreement rates behind the confidence values, by regency and district
+    if agreement is not None:
+        with report.stage("write_agreement") as stage:
+            agreement.write(OUTPUT_AGREEMENT)
+            stage.output(OUTPUT_AGREEMENT)
+
+    with report.stage("manifest") as stage:
+        manifest = build.finish(
+            [core_csv, core_json, enriched_csv],
+            [
+                OUTPUT_BIN,
+                OUTPUT_AUTOCOMPLETE,
+                *([OUTPUT_AGREEMENT] if scored else []),
+                shards.manifest_path,
+            ],
+        )
+        stage.output(MANIFEST_FILE)
+    rebuild = manifest["rebuild"]
+
+    with report.stage("sha256") as stage:
+        checksums = {path.name: sha256(path) for path in outputs}
+        stage.rows_in = len(checksums)
+
+    report.write(
+        rebuild=rebuild,
+        workers=workers if parallel else 1,
+        records={"total": core_csv.count},
+        artifacts=checksums,
+    )
 
     print("Build complete (POS Indonesia)")
-    print(f"- Core CSV      : {OUTPUT_CORE_CSV}  sha256:{sha256(OUTPUT_CORE_CSV)}")
-    print(f"- Core JSON     : {OUTPUT_CORE_JSON} sha256:{sha256(OUTPUT_CORE_JSON)}")
-    print(f"- Enriched CSV  : {OUTPUT_ENRICHED_CSV} sha256:{sha256(OUTPUT_ENRICHED_CSV)}")
-    print(f"- Records       : {len(core)} villages")
+    print(
+        f"- Rebuild       : {rebuild['mode']}, "
+        f"{rebuild['changed_villages']} changed villages, "
+        f"{rebuild['reused_records']} records reused"
+        + (f", {workers} workers" if parallel else "")
+    )
+    print(f"- Core CSV      : {OUTPUT_CORE_CSV}  sha256:{checksums[OUTPUT_CORE_CSV.name]}")
+    print(f"- Core JSON     : {OUTPUT_CORE_JSON} sha256:{checksums[OUTPUT_CORE_JSON.name]}")
+    print(f"- Enriched CSV  : {OUTPUT_ENRICHED_CSV} sha256:{checksums[OUTPUT_ENRICHED_CSV.name]}")
+    print(f"- Binary        : {OUTPUT_BIN} sha256:{checksums[OUTPUT_BIN.name]}")
+    print(f"- Autocomplete  : {OUTPUT_AUTOCOMPLETE} sha256:{checksums[OUTPUT_AUTOCOMPLETE.name]}")
+    if scored:
+        print(f"- Agreement     : {OUTPUT_AGREEMENT} sha256:{checksums[OUTPUT_AGREEMENT.name]}")
+    else:
+        print(f"- Agreement     : none, confidence {UNSCORED_CONFIDENCE} throughout")
+    print(f"- Shards        : {len(shards.shards)} provinces in {SHARD_DIR}/")
+    print(f"- Records       : {core_csv.count} villages")
+    print(f"- Report        : {REPORT_FILE}")
 
 
 if __name__ == "__main__":
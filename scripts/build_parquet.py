@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import hashlib
+import sys
+from itertools import groupby
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Explicit column types. Codes stay strings (schema/postal_code.schema.json);
+# low-cardinality columns are dictionary-encoded.
+DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+
+ARROW_SCHEMA = pa.schema(
+    [
+        pa.field("postal_code", pa.string()),
+        pa.field("village_code", pa.string(), nullable=False),
+        pa.field("village_name", pa.string(), nullable=False),
+        pa.field("village_type", DICT_STRING, nullable=False),
+        pa.field("source", DICT_STRING, nullable=False),
+        pa.field("confidence", pa.float64(), nullable=False),
+        pa.field("year", pa.int16(), nullable=False),
+        pa.field("status", DICT_STRING, nullable=False),
+        pa.field("district_code", DICT_STRING, nullable=False),
+        pa.field("district_name", DICT_STRING, nullable=False),
+        pa.field("regency_code", DICT_STRING, nullable=False),
+        pa.field("regency_name", DICT_STRING, nullable=False),
+        pa.field("province_code", DICT_STRING, nullable=False),
+        pa.field("province_name", DICT_STRING, nullable=False),
+    ]
+)
+
+CONVERTERS = {
+    "postal_code": lambda v: v or None,
+    "confidence": float,
+    "year": int,
+}
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ============================================================
+# LOADERS
+# ============================================================
+
+def read_rows(path: Path):
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = set(ARROW_SCHEMA.names) - set(reader.fieldnames or [])
+        if missing:
+            die(f"{path} missing columns: {', '.join(sorted(missing))}")
+        yield from reader
+
+
+def collect_dictionaries(path: Path):
+    """
+    First pass: the sorted value set of every dictionary-encoded column.
+    Every batch is encoded against these same dictionaries, which keeps
+    the Arrow IPC file valid (no dictionary replacement between batches)
+    and the output deterministic.
+    """
+    names = [f.name for f in ARROW_SCHEMA if pa.types.is_dictionary(f.type)]
+    values = {name: set() for name in names}
+    for row in read_rows(path):
+        for name in names:
+            values[name].add(row[name])
+    return {name: sorted(v) for name, v in values.items()}
+
+
+def province_batches(path: Path, dictionaries):
+    """
+    Second pass: yield one RecordBatch per province. The artifact is
+    sorted by village_code, which keeps each province contiguous, so
+    only one province is held in memory at a time.
+    """
+    encoders = {
+        name: ({v: i for i, v in enumerate(values)}, pa.array(values, pa.string()))
+        for name, values in dictionaries.items()
+    }
+
+    seen = set()
+    for province, rows in groupby(read_rows(path), key=lambda r: r["province_code"]):
+        if province in seen:
+            die(f"{path} is not sorted by province (village_code)")
+        seen.add(province)
+
+        columns = {name: [] for name in ARROW_SCHEMA.names}
+        for row in rows:
+            for name, values in columns.items():
+                convert = CONVERTERS.get(name)
+                values.append(convert(row[name]) if convert else row[name])
+
+        arrays = []
+        for field in ARROW_SCHEMA:
+            values = columns[field.name]
+            if field.name in encoders:
+                lookup, dictionary = encoders[field.name]
+                indices = pa.array([lookup[v] for v in values], pa.int32())
+                arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+
+        yield pa.RecordBatch.from_arrays(arrays, schema=ARROW_SCHEMA)
+
+# ============================================================
+# OUTPUT
+# ============================================================
+
+def write_columnar(source: Path, parquet_path: Path, arrow_path: Path):
+    """
+    Write Parquet (one row group per province, with column statistics
+    for predicate pushdown) and an Arrow IPC file (one record batch per
+    province). Returns the number of rows written.
+    """
+    rows = 0
+    with pq.ParquetWriter(
+        parquet_path,
+        ARROW_SCHEMA,
+        compression="zstd",
+        use_dictionary=True,
+        write_statistics=True,
+    ) as parquet, pa.OSFile(str(arrow_path), "wb") as sink, \
+            ipc.new_file(sink, ARROW_SCHEMA) as arrow:
+        for batch in province_batches(source, collect_dictionaries(source)):
+            parquet.write_table(
+                pa.Table.from_batches([batch]), row_group_size=batch.num_rows
+            )
+            arrow.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write typed Parquet and Arrow IPC files from the enriched artifact"
+    )
+    parser.add_argument(
+        "--input",
+        default="postal_codes_pos_indonesia_enriched.csv",
+        help="Enriched artifact CSV (build_from_pos_indonesia.py)",
+    )
+    parser.add_argument(
+        "--parquet",
+        default="postal_codes_pos_indonesia_enriched.parquet",
+        help="Parquet output",
+    )
+    parser.add_argument(
+        "--arrow",
+        default="postal_codes_pos_indonesia_enriched.arrow",
+        help="Arrow IPC file output",
+    )
+
+    args = parser.parse_args()
+
+    source = Path(args.input)
+    if not source.exists():
+        die(f"Missing enriched artifact: {source}")
+
+    parquet_path = Path(args.parquet)
+    arrow_path = Path(args.arrow)
+    rows = write_columnar(source, parquet_path, arrow_path)
+
+    print("Columnar build complete")
+    print(f"- Records : {rows}")
+    print(f"- Parquet : {parquet_path} sha256:{sha256(parquet_path)}")
+    print(f"- Arrow   : {arrow_path} sha256:{sha256(arrow_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ============================================================
+# BUILD INSTRUMENTATION
+#
+# Every stage of a build runs inside ``report.stage(name)``. A stage
+# records wall and CPU time (including reaped worker processes), the
+# process peak RSS at its end, rows in / out and the bytes of the files
+# it wrote. The report is written as JSON next to the artifacts so
+# release CI can compare stage timings between runs.
+#
+# Opt-in, via the environment (builds take no arguments):
+#   BUILD_PROFILE=cprofile  cProfile per stage, dumped to
+#                           <report>.<stage>.prof, top functions inlined
+#   BUILD_PROFILE=sample    wall-clock stack sampling of the main thread
+#   BUILD_TRACEMALLOC=1     Python heap peak per stage (slows the build)
+# ============================================================
+
+REPORT_FORMAT = 1
+
+PROFILE_MODES = ("cprofile", "sample")
+
+# Functions listed per stage in the report when profiling
+PROFILE_TOP = 20
+
+# Seconds between stack samples in BUILD_PROFILE=sample
+SAMPLE_INTERVAL = 0.005
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus its reaped children."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _frame_label(code) -> str:
+    return f"{Path(code.co_filename).name}:{code.co_firstlineno}({code.co_name})"
+
+# ============================================================
+# PROFILERS
+# ============================================================
+
+class _CProfiler:
+    def __init__(self, dump_path: Path):
+        self.dump_path = dump_path
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.profile.dump_stats(self.dump_path)
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)
+        return {
+            "mode": "cprofile",
+            "dump": str(self.dump_path),
+            "top_cumulative": [
+                {
+                    "function": f"{Path(file).name}:{line}({func})",
+                    "calls": calls,
+                    "self_seconds": round(tottime, 4),
+                    "cumulative_seconds": round(cumtime, 4),
+                }
+                for (file, line, func), (_, calls, tottime, cumtime, _) in rows[:PROFILE_TOP]
+            ],
+        }
+
+
+class _Sampler:
+    """Counts the innermost frames of the main thread at a fixed interval."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.thread_id = threading.main_thread().ident
+        self.leaf = Counter()
+        self.inclusive = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.leaf[_frame_label(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                label = _frame_label(frame.f_code)
+                if label not in seen:
+                    seen.add(label)
+                    self.inclusive[label] += 1
+                frame = frame.f_back
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        total = self.samples or 1
+        return {
+            "mode": "sample",
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "top_self": [
+                {"function": label, "percent": round(100 * n / total, 1)}
+                for label, n in self.leaf.most_common(PROFILE_TOP)
+            ],
+            "top_inclusive": [
+                {"function": label, "percent": round(100 * n / total, 1)}
+                for label, n in self.inclusive.most_common(PROFILE_TOP)
+            ],
+        }
+
+# ============================================================
+# REPORT
+# ============================================================
+
+class Stage:
+    """Counters a stage fills in while it runs."""
+
+    def __init__(self, name: str, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.outputs = []
+
+    def output(self, *paths):
+        """Count the final size of ``paths`` as bytes written by this stage."""
+        self.outputs.extend(Path(p) for p in paths)
+
+
+class BuildReport:
+    """
+    Usage:
+      report = BuildReport("opendata_jabar", "build_report_opendata_jabar.json")
+      with report.stage("load") as stage:
+          ...
+          stage.rows_out = len(mapping)
+      report.write(summary={...})
+    """
+
+    def __init__(self, build: str, path: Path, profile=None, trace_memory=None):
+        self.build = build
+        self.path = Path(path)
+        self.profile = profile if profile is not None else os.environ.get("BUILD_PROFILE") or None
+        if self.profile is not None and self.profile not in PROFILE_MODES:
+            raise ValueError(
+                f"BUILD_PROFILE must be one of {', '.join(PROFILE_MODES)}, not {self.profile!r}"
+            )
+        if trace_memory is None:
+            trace_memory = os.environ.get("BUILD_TRACEMALLOC", "") not in ("", "0")
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_at = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._cpu = cpu_seconds()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _profiler(self, name: str):
+        if self.profile == "cprofile":
+            return _CProfiler(self.path.with_name(f"{self.path.stem}.{name}.prof"))
+        if self.profile == "sample":
+            return _Sampler()
+        return None
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in=None):
+        stage = Stage(name, rows_in)
+        profiler = self._profiler(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if profiler is not None:
+            profiler.start()
+        wall = time.perf_counter()
+        cpu = cpu_seconds()
+        try:
+            yield stage
+        finally:
+            entry = {
+                "name": name,
+                "wall_seconds": round(time.perf_counter() - wall, 4),
+                "cpu_seconds": round(cpu_seconds() - cpu, 4),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            if profiler is not None:
+                entry["profile"] = profiler.stop()
+            if self.trace_memory:
+                entry["tracemalloc_peak_mb"] = round(
+                    tracemalloc.get_traced_memory()[1] / (1 << 20), 1
+                )
+            entry["rows_in"] = stage.rows_in
+            entry["rows_out"] = stage.rows_out
+            entry["bytes_written"] = sum(
+                p.stat().st_size for p in stage.outputs if p.exists()
+            )
+            self.stages.append(entry)
+
+    def write(self, **extra):
+        """Write the report; ``extra`` keys are added at top level."""
+        report = {
+            "format": REPORT_FORMAT,
+            "build": self.build,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "profile": self.profile,
+            "totals": {
+                "wall_seconds": round(time.perf_counter() - self._wall, 4),
+                "cpu_seconds": round(cpu_seconds() - self._cpu, 4),
+                "peak_rss_mb": peak_rss_mb(),
+                "bytes_written": sum(s["bytes_written"] for s in self.stages),
+            },
+            "stages": self.stages,
+            **extra,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        tmp.replace(self.path)
+        return report
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import hashlib
+import sqlite3
+import sys
+from pathlib import Path
+
+from regions_id import load_regions_id
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Release names stored in postal_codes.release
+RELEASE_BASELINE = "baseline"
+RELEASE_DERIVED = "derived"
+
+SCHEMA = """
+CREATE TABLE metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE villages (
+    village_code  TEXT PRIMARY KEY,
+    village_name  TEXT NOT NULL,
+    village_type  TEXT NOT NULL,
+    district_code TEXT NOT NULL,
+    district_name TEXT NOT NULL,
+    regency_code  TEXT NOT NULL,
+    regency_name  TEXT NOT NULL,
+    province_code TEXT NOT NULL,
+    province_name TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE postal_codes (
+    release       TEXT NOT NULL,
+    village_code  TEXT NOT NULL REFERENCES villages (village_code),
+    postal_code   TEXT,
+    source        TEXT NOT NULL,
+    confidence    REAL NOT NULL,
+    year          INTEGER NOT NULL,
+    status        TEXT NOT NULL,
+    district_code TEXT NOT NULL,
+    regency_code  TEXT NOT NULL,
+    PRIMARY KEY (release, village_code)
+) WITHOUT ROWID;
+"""
+
+# Created after the bulk insert; cheaper than maintaining them per row
+INDEXES = """
+CREATE INDEX idx_postal_codes_village_code ON postal_codes (village_code);
+CREATE INDEX idx_postal_codes_postal_code ON postal_codes (postal_code, regency_code);
+CREATE INDEX idx_postal_codes_district_code ON postal_codes (district_code);
+CREATE INDEX idx_postal_codes_regency_code ON postal_codes (regency_code);
+CREATE INDEX idx_villages_district_code ON villages (district_code);
+CREATE INDEX idx_villages_regency_code ON villages (regency_code);
+"""
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ============================================================
+# ROWS
+# ============================================================
+
+def village_rows(villages):
+    for i in range(len(villages)):
+        v = villages.village(i)
+        yield (
+            v["village_code"],
+            v["village_name"],
+            v["village_type"],
+            v["district_code"],
+            v["district_name"],
+            v["regency_code"],
+            v["regency_name"],
+            v["province_code"],
+            v["province_name"],
+        )
+
+
+def postal_code_rows(release, path: Path, villages):
+    """
+    Rows for one built artifact CSV, in file (village_code) order.
+    District and regency codes come from regions_id.csv.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            code = row["village_code"]
+            i = villages.index(code)
+            if i < 0:
+                die(f"{path}: village_code {code} not in regions_id.csv")
+            v = villages.village(i)
+            yield (
+                release,
+                code,
+                row["postal_code"] or None,
+                row["source"],
+                float(row["confidence"]),
+                int(row["year"]),
+                row["status"],
+                v["district_code"],
+                v["regency_code"],
+            )
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def build_sqlite(output: Path, villages, artifacts, metadata):
+    """
+    Write a fresh database. Rows are inserted in a fixed order inside
+    one transaction and indexes are built afterwards, so the same inputs
+    produce the same file bytes for a given SQLite version.
+    """
+    tmp = output.with_suffix(output.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    conn = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        conn.execute("PRAGMA page_size = 4096")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+
+        conn.executescript(SCHEMA)
+
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO metadata VALUES (?, ?)", sorted(metadata.items())
+        )
+        conn.executemany(
+            "INSERT INTO villages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            village_rows(villages),
+        )
+        for release, path in artifacts:
+            conn.executemany(
+                "INSERT INTO postal_codes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                postal_code_rows(release, path, villages),
+            )
+        conn.execute("COMMIT")
+
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    tmp.replace(output)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build an indexed SQLite database from the release artifacts"
+    )
+    parser.add_argument(
+        "--regions",
+        default="regions_id.csv",
+        help="Path to regions_id.csv",
+    )
+    parser.add_argument(
+        "--baseline",
+        default="postal_codes_opendata_jabar.csv",
+        help="Baseline artifact CSV (build_from_opendata_jabar.py)",
+    )
+    parser.add_argument(
+        "--derived",
+        default="postal_codes_pos_indonesia.csv",
+        help="Derived artifact CSV (build_from_pos_indonesia.py)",
+    )
+    parser.add_argument(
+        "--output",
+        default="postal_codes.sqlite",
+        help="SQLite database output",
+    )
+
+    args = parser.parse_args()
+
+    artifacts = []
+    metadata = {}
+    for release, path in (
+        (RELEASE_BASELINE, Path(args.baseline)),
+        (RELEASE_DERIVED, Path(args.derived)),
+    ):
+        if not path.exists():
+            die(f"Missing {release} artifact: {path}")
+        artifacts.append((release, path))
+        metadata[f"{release}_sha256"] = sha256(path)
+
+    regions_path = Path(args.regions)
+    villages = load_regions_id(regions_path)
+    metadata["regions_id_sha256"] = sha256(regions_path)
+
+    output = Path(args.output)
+    build_sqlite(output, villages, artifacts, metadata)
+
+    print("SQLite build complete")
+    print(f"- Villages : {len(villages)}")
+    print(f"- Database : {output} sha256:{sha256(output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import os
+from pathlib import Path
+
+# ============================================================
+# BYTE-RANGE SPLITTING
+#
+# Large line-oriented artifacts are split into ranges that each start at
+# a record boundary, so worker processes can parse them independently.
+# ============================================================
+
+SCAN_CHUNK = 1 << 16
+
+
+def _next_boundary(f, position: int, boundary: bytes, skip: int, end: int) -> int:
+    """First offset ≥ ``position`` where a record starts, or ``end``."""
+    f.seek(position)
+    carry = b""
+    base = position
+    while base < end:
+        chunk = f.read(SCAN_CHUNK)
+        if not chunk:
+            break
+        data = carry + chunk
+        i = data.find(boundary)
+        if i >= 0:
+            return min(base - len(carry) + i + skip, end)
+        carry = data[-(len(boundary) - 1):] if len(boundary) > 1 else b""
+        base += len(chunk)
+    return end
+
+
+def split_ranges(path, parts: int, boundary: bytes = b"\n", skip=None, start: int = 0):
+    """
+    Split ``path`` from byte ``start`` to EOF into at most ``parts``
+    contiguous (start, end) ranges. Every range except the first begins
+    ``skip`` bytes into an occurrence of ``boundary`` (by default right
+    after it), so no record straddles two ranges.
+    """
+    if skip is None:
+        skip = len(boundary)
+    end = os.path.getsize(path)
+    if start >= end:
+        return []
+    parts = max(1, parts)
+    step = (end - start) // parts
+
+    cuts = [start]
+    with Path(path).open("rb") as f:
+        for k in range(1, parts):
+            target = max(start + k * step, cuts[-1]) - skip
+            cut = _next_boundary(f, max(target, cuts[-1]), boundary, skip, end)
+            if cut > cuts[-1] and cut < end:
+                cuts.append(cut)
+    cuts.append(end)
+    return list(zip(cuts, cuts[1:]))
+
+
+def read_range(path, start: int, end: int) -> bytes:
+    with Path(path).open("rb") as f:
+        f.seek(start)
+        return f.read(end - start)
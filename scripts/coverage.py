@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from build_from_opendata_jabar import OPENDATA_JABAR_FILE
+from build_report import BuildReport
+from coverage_opendata_jabar import load_opendata_jabar_csv
+from pos_indonesia import POS_JSONL_FILE, read_pos_indonesia_jsonl
+from regions_id import load_regions_id
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+# name → (source label, default path, loader returning village codes)
+SOURCES = {
+    "opendata_jabar": (
+        "OPENDATA_JABAR",
+        OPENDATA_JABAR_FILE,
+        load_opendata_jabar_csv,
+    ),
+    "pos_indonesia": (
+        "POSINDONESIA_SCRAPE",
+        POS_JSONL_FILE,
+        lambda path: read_pos_indonesia_jsonl(Path(path)).keys(),
+    ),
+}
+
+LEVELS = ("province", "regency", "district")
+
+CSV_FIELDS = [
+    "source",
+    "level",
+    "code",
+    "name",
+    "total_villages",
+    "matched",
+    "missing",
+    "coverage_percent",
+]
+
+# ------------------------------------------------------------
+# Utilities
+# ------------------------------------------------------------
+
+def percent(matched, total):
+    return round((matched / total) * 100, 2) if total else 0.0
+
+
+def encode_codes(codes):
+    """Integer-encode village codes; codes that cannot match are dropped."""
+    return np.fromiter(
+        (int(c) for c in codes if c.isdigit() and c[0] != "0"),
+        dtype=np.int64,
+    )
+
+# ------------------------------------------------------------
+# Coverage engine
+# ------------------------------------------------------------
+
+def group_ids(regions):
+    """Per-village province / regency / district row indices."""
+    district = np.frombuffer(regions.village_district, dtype=np.uint32)
+    regency = np.frombuffer(regions.district_regency, dtype=np.uint32)[district]
+    province = np.frombuffer(regions.regency_province, dtype=np.uint32)[regency]
+    return {"province": province, "regency": regency, "district": district}
+
+
+def matched_mask(village_codes, source_codes):
+    """Boolean mask over villages: True where the source has the code."""
+    mask = np.zeros(len(village_codes), dtype=bool)
+    if not len(source_codes) or not len(village_codes):
+        return mask
+    pos = np.searchsorted(village_codes, source_codes)
+    pos[pos == len(village_codes)] = 0
+    hit = village_codes[pos] == source_codes
+    mask[pos[hit]] = True
+    return mask
+
+
+def compute_coverage(regions, sources):
+    """
+    Coverage of every source at global, province, regency and district
+    level. ``sources`` maps a source label to its village codes.
+
+    Every village is tagged with its integer group index per level once;
+    each (source, level) breakdown is then two bincounts.
+    """
+    village_codes = np.frombuffer(regions.village_codes, dtype=np.int64)
+    groups = group_ids(regions)
+    names = {
+        "province": (regions.province_codes, regions.province_names),
+        "regency": (regions.regency_codes, regions.regency_names),
+        "district": (regions.district_codes, regions.district_names),
+    }
+    totals = {
+        level: np.bincount(groups[level], minlength=len(names[level][0]))
+        for level in LEVELS
+    }
+
+    report = {}
+    for label, codes in sources.items():
+        mask = matched_mask(village_codes, encode_codes(codes))
+        matched = int(mask.sum())
+        entry = {
+            "total_villages": len(village_codes),
+            "matched": matched,
+            "missing": len(village_codes) - matched,
+            "coverage_percent": percent(matched, len(village_codes)),
+        }
+        for level in LEVELS:
+            hits = np.bincount(
+                groups[level][mask], minlength=len(names[level][0])
+            )
+            level_codes, level_names = names[level]
+            entry[level] = [
+                {
+                    "code": str(level_codes[g]),
+                    "name": level_names[g],
+                    "total_villages": int(totals[level][g]),
+                    "matched": int(hits[g]),
+                    "missing": int(totals[level][g] - hits[g]),
+                    "coverage_percent": percent(
+                        int(hits[g]), int(totals[level][g])
+                    ),
+                }
+                for g in np.argsort(np.asarray(level_codes), kind="stable")
+                if totals[level][g]
+            ]
+        report[label] = entry
+    return report
+
+
+def diff_coverage(previous, current):
+    """
+    Per-area changes against a previous report, largest drop first.
+    Areas (or sources) present in only one report are skipped.
+    """
+    changes = []
+    for label, entry in current.items():
+        old_entry = previous.get(label)
+        if not old_entry:
+            continue
+        rows = [("global", "", "", old_entry, entry)]
+        for level in LEVELS:
+            old_rows = {row["code"]: row for row in old_entry.get(level, [])}
+            for row in entry[level]:
+                old = old_rows.get(row["code"])
+                if old is not None:
+                    rows.append((level, row["code"], row["name"], old, row))
+
+        for level, code, name, old, new in rows:
+            delta = new["matched"] - old["matched"]
+            if delta == 0 and new["total_villages"] == old["total_villages"]:
+                continue
+            changes.append(
+                {
+                    "source": label,
+                    "level": level,
+                    "code": code,
+                    "name": name,
+                    "matched_before": old["matched"],
+                    "matched_after": new["matched"],
+                    "matched_delta": delta,
+                    "coverage_percent_before": old["coverage_percent"],
+                    "coverage_percent_after": new["coverage_percent"],
+                    "coverage_percent_delta": round(
+                        new["coverage_percent"] - old["coverage_percent"], 2
+                    ),
+                }
+            )
+
+    changes.sort(key=lambda c: (c["coverage_percent_delta"], c["matched_delta"]))
+    return changes
+
+# ------------------------------------------------------------
+# Output
+# ------------------------------------------------------------
+
+def write_csv(path: Path, report):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for label, entry in report.items():
+            writer.writerow(
+                {
+                    "source": label,
+                    "level": "global",
+                    "code": "",
+                    "name": "",
+                    **{k: entry[k] for k in CSV_FIELDS[4:]},
+                }
+            )
+            for level in LEVELS:
+                for row in entry[level]:
+                    writer.writerow({"source": label, "level": level, **row})
+
+# ------------------------------------------------------------
+# Main
+# ------------------------------------------------------------
+
+def parse_source(value: str):
+    name, sep, path = value.partition("=")
+    if name not in SOURCES:
+        raise argparse.ArgumentTypeError(
+            f"unknown source {name!r} (expected one of: {', '.join(SOURCES)})"
+        )
+    return name, Path(path) if sep else SOURCES[name][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Province / regency / district coverage of every source vs region-id"
+    )
+    parser.add_argument(
+        "--regions",
+        default="regions_id.csv",
+        help="Path to regions_id.csv",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        type=parse_source,
+        metavar="NAME[=PATH]",
+        help=f"Source to measure (repeatable; default: all of {', '.join(SOURCES)})",
+    )
+    parser.add_argument(
+        "--report",
+        default="coverage.json",
+        help="Coverage report output JSON",
+    )
+    parser.add_argument(
+        "--csv",
+        default="coverage.csv",
+        help="Flat coverage breakdown output CSV",
+    )
+    parser.add_argument(
+        "--previous",
+        help="Previous coverage report to diff against (default: existing --report)",
+    )
+    parser.add_argument(
+        "--diff",
+        default="coverage_diff.json",
+        help="Coverage changes output JSON",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of largest drops to print",
+    )
+    parser.add_argument(
+        "--build-report",
+        default="build_report_coverage.json",
+        help="Per-stage timing report output JSON",
+    )
+
+    args = parser.parse_args()
+    build_report = BuildReport("coverage", Path(args.build_report))
+
+    selected = args.source or [(name, SOURCES[name][1]) for name in SOURCES]
+
+    previous_path = Path(args.previous or args.report)
+    previous = None
+    if previous_path.exists():
+        with open(previous_path, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    with build_report.stage("load_regions") as stage:
+        regions = load_regions_id(Path(args.regions))
+        stage.rows_out = len(regions)
+    sources = {}
+    for name, path in selected:
+        label, _, loader = SOURCES[name]
+        with build_report.stage(f"load_{name}") as stage:
+            sources[label] = loader(path)
+            stage.rows_out = len(sources[label])
+
+    with build_report.stage("compute", rows_in=len(regions)) as stage:
+        coverage = compute_coverage(regions, sources)
+        stage.rows_out = len(coverage)
+    generated_at = datetime.now(timezone.utc).isoformat()
+
+    # ---- coverage report ----
+    report = {
+        "baseline": "regions_id",
+        "generated_at": generated_at,
+        "sources": coverage,
+    }
+    with build_report.stage("write") as stage:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        write_csv(Path(args.csv), coverage)
+        stage.output(args.report, args.csv)
+
+    # ---- diff against previous run ----
+    changes = []
+    if previous is not None:
+        with build_report.stage("diff") as stage:
+            changes = diff_coverage(previous.get("sources", {}), coverage)
+            with open(args.diff, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "previous_generated_at": previous.get("generated_at"),
+                        "generated_at": generated_at,
+                        "changes": changes,
+                    },
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            stage.rows_out = len(changes)
+            stage.output(args.diff)
+
+    build_report.write()
+
+    # ---- summary ----
+    for label, entry in coverage.items():
+        print(f"Coverage {label}")
+        print(f"- Total villages : {entry['total_villages']}")
+        print(f"- Matched        : {entry['matched']}")
+        print(f"- Missing        : {entry['missing']}")
+        print(f"- Coverage       : {entry['coverage_percent']}%")
+
+    if previous is not None:
+        drops = [c for c in changes if c["matched_delta"] < 0]
+        print(f"Coverage drops since {previous.get('generated_at')}: {len(drops)}")
+        for c in drops[:args.top]:
+            area = f"{c['level']} {c['code']} {c['name']}".strip()
+            print(
+                f"- {c['source']} {area}: "
+                f"{c['coverage_percent_before']}% → {c['coverage_percent_after']}% "
+                f"({c['matched_delta']:+d})"
+            )
+        print(f"→ {args.diff}")
+    print(f"→ {args.report}")
+    print(f"→ {args.csv}")
+    print(f"→ {args.build_report}")
+
+
+if __name__ == "__main__":
+    main()
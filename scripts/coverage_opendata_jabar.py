@@ -7,6 +7,9 @@ import re
 from datetime import datetime, timezone
 from pathlib import Path
 
+from build_report import BuildReport
+from regions_id import load_regions_id
+
 
 # ------------------------------------------------------------
 # Utilities
@@ -21,27 +24,6 @@ def normalize_kemendagri_code(value: str) -> str:
 # Loaders
 # ------------------------------------------------------------
 
-def load_regions_id(path: Path):
-    villages = {}
-
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            code = row["village_code"].strip()
-            villages[code] = {
-                "village_code": code,
-                "village_name": row.get("village_name"),
-                "district_code": row.get("district_code"),
-                "district_name": row.get("district_name"),
-                "regency_code": row.get("regency_code"),
-                "regency_name": row.get("regency_name"),
-                "province_code": row.get("province_code"),
-                "province_name": row.get("province_name"),
-            }
-
-    return villages
-
-
 def load_opendata_jabar_csv(path: Path):
     seen = set()
 
@@ -91,14 +73,26 @@ def main():
         default="failed_villages_opendata_jabar.jsonl",
         help="Missing villages output",
     )
+    parser.add_argument(
+        "--build-report",
+        default="build_report_coverage_opendata_jabar.json",
+        help="Per-stage timing report output JSON",
+    )
 
     args = parser.parse_args()
+    build_report = BuildReport("coverage_opendata_jabar", Path(args.build_report))
 
-    regions = load_regions_id(Path(args.regions))
-    seen = load_opendata_jabar_csv(Path(args.opendata))
+    with build_report.stage("load_regions") as stage:
+        regions = load_regions_id(Path(args.regions), required={"village_code"})
+        stage.rows_out = len(regions)
+    with build_report.stage("load_opendata_jabar") as stage:
+        seen = load_opendata_jabar_csv(Path(args.output))
+        stage.rows_out = len(seen)
 
     total = len(regions)
-    matched = sum(1 for code in regions if code in seen)
+    with build_report.stage("match", rows_in=total) as stage:
+        matched = sum(1 for code in regions.codes() if code in seen)
+        stage.rows_out = matched
     missing = total - matched
 
     # ---- coverage report ----
@@ -112,16 +106,22 @@ def main():
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    with open(args.coverage, "w", encoding="utf-8") as f:
-        json.dump(coverage, f, indent=2, ensure_ascii=False)
-
-    # ---- failed villages ----
-    with open(args.failed, "w", encoding="utf-8") as f:
-        for code, v in regions.items():
-            if code not in seen:
-                f.write(
-                    json.dumps(v, ensure_ascii=False) + "\n"
-                )
+    with build_report.stage("write", rows_in=missing) as stage:
+        with open(args.coverage, "w", encoding="utf-8") as f:
+            json.dump(coverage, f, indent=2, ensure_ascii=False)
+
+        # ---- failed villages ----
+        with open(args.failed, "w", encoding="utf-8") as f:
+            for i, code in enumerate(regions.codes()):
+                if code not in seen:
+                    v = regions.village(i)
+                    del v["village_type"]
+                    f.write(
+                        json.dumps(v, ensure_ascii=False) + "\n"
+                    )
+        stage.rows_out = missing
+        stage.output(args.coverage, args.failed)
+    build_report.write()
 
     # ---- summary ----
     print("Coverage OpenData Jabar")
@@ -131,6 +131,7 @@ def main():
     print(f"- Coverage       : {coverage['coverage_percent']}%")
     print(f"→ {args.coverage}")
     print(f"→ {args.failed}")
+    print(f"→ {args.build_report}")
 
 
 if __name__ == "__main__":
@@ -3,13 +3,14 @@
 import argparse
 import json
 from datetime import datetime, timezone
+from pathlib import Path
 
 from postal_code_id_ingester.ingest.region_id_loader import (
     load_villages_from_region_id
 )
-from postal_code_id_ingester.export.resume import (
-    load_seen_village_codes
-)
+
+from build_report import BuildReport
+from jsonl_store import JsonlStore
 
 
 def main():
@@ -36,28 +37,40 @@ def main():
         default="failed_villages_pos_indonesia.jsonl",
         help="Missing villages output (JSONL)",
     )
+    parser.add_argument(
+        "--build-report",
+        default="build_report_coverage_pos_indonesia.json",
+        help="Per-stage timing report output JSON",
+    )
 
     args = parser.parse_args()
+    build_report = BuildReport("coverage_pos_indonesia", Path(args.build_report))
 
     # ------------------------------------------------------------
     # Load ground truth (region-id)
     # ------------------------------------------------------------
-    villages = load_villages_from_region_id(args.regions)
+    with build_report.stage("load_regions") as stage:
+        villages = load_villages_from_region_id(args.regions)
+        stage.rows_out = len(villages)
     total = len(villages)
     print(f"Total villages in region-id: {total}")
 
     # ------------------------------------------------------------
     # Load ingested village codes
     # ------------------------------------------------------------
-    seen = load_seen_village_codes(args.output)
+    with build_report.stage("load_pos_indonesia") as stage:
+        seen = JsonlStore(args.output).codes()
+        stage.rows_out = len(seen)
     matched = len(seen)
 
     # ------------------------------------------------------------
     # Compute missing villages
     # ------------------------------------------------------------
-    missing_villages = [
-        v for v in villages if v.village_code not in seen
-    ]
+    with build_report.stage("match", rows_in=total) as stage:
+        missing_villages = [
+            v for v in villages if v.village_code not in seen
+        ]
+        stage.rows_out = total - len(missing_villages)
 
     # ------------------------------------------------------------
     # Coverage report
@@ -72,30 +85,34 @@ def main():
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    with open(args.coverage, "w", encoding="utf-8") as f:
-        json.dump(coverage, f, indent=2, ensure_ascii=False)
+    with build_report.stage("write", rows_in=len(missing_villages)) as stage:
+        with open(args.coverage, "w", encoding="utf-8") as f:
+            json.dump(coverage, f, indent=2, ensure_ascii=False)
 
-    # ------------------------------------------------------------
-    # Failed villages (JSONL)
-    # ------------------------------------------------------------
-    with open(args.failed, "w", encoding="utf-8") as f:
-        for v in missing_villages:
-            f.write(
-                json.dumps(
-                    {
-                        "village_code": v.village_code,
-                        "village_name": v.village,
-                        "district_code": v.district_code,
-                        "district_name": v.district,
-                        "regency_code": v.city_code,
-                        "regency_name": v.city,
-                        "province_code": v.province_code,
-                        "province_name": v.province,
-                    },
-                    ensure_ascii=False,
+        # --------------------------------------------------------
+        # Failed villages (JSONL)
+        # --------------------------------------------------------
+        with open(args.failed, "w", encoding="utf-8") as f:
+            for v in missing_villages:
+                f.write(
+                    json.dumps(
+                        {
+                            "village_code": v.village_code,
+                            "village_name": v.village,
+                            "district_code": v.district_code,
+                            "district_name": v.district,
+                            "regency_code": v.city_code,
+                            "regency_name": v.city,
+                            "province_code": v.province_code,
+                            "province_name": v.province,
+                        },
+                        ensure_ascii=False,
+                    )
+                    + "\n"
                 )
-                + "\n"
-            )
+        stage.rows_out = len(missing_villages)
+        stage.output(args.coverage, args.failed)
+    build_report.write()
 
     # ------------------------------------------------------------
     # Console summary
@@ -107,6 +124,7 @@ def main():
     print(f"- Coverage       : {coverage['coverage_percent']}%")
     print(f"→ {args.coverage}")
     print(f"→ {args.failed}")
+    print(f"→ {args.build_report}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import mmap
+import pickle
+from bisect import bisect_left
+from pathlib import Path
+
+import regions_id
+
+# ============================================================
+# INCREMENTAL BUILDS
+#
+# A build manifest records the fingerprint (size + sha256) of every
+# input, the build parameters and the sha256 of every output. Parsed
+# inputs are cached under .cache/incremental/ keyed by their sha256, and
+# each text artifact keeps a sidecar index of where every village's
+# record starts and ends.
+#
+# On the next build:
+#   - parameters changed, or no usable previous state  → full rebuild
+#   - an input changed → diff its cached parse against the new one to
+#     find the villages whose records can change
+#   - the Pos Indonesia JSONL only grew → parse just the appended bytes
+# Unchanged villages then reuse their record bytes from the previous
+# artifact instead of being serialised again.
+# ============================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = PROJECT_ROOT / ".cache" / "incremental"
+
+MANIFEST_VERSION = 1
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def fingerprint(path: Path, prefix_size=None):
+    """
+    Size and sha256 of ``path``. With ``prefix_size``, also the sha256
+    of its first ``prefix_size`` bytes (computed in the same pass).
+    """
+    h = hashlib.sha256()
+    prefix = None
+    size = 0
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            if prefix_size is not None and prefix is None:
+                if size + len(chunk) >= prefix_size:
+                    h.update(chunk[:prefix_size - size])
+                    prefix = h.copy()
+                    h.update(chunk[prefix_size - size:])
+                    size += len(chunk)
+                    continue
+            h.update(chunk)
+            size += len(chunk)
+
+    result = {"path": str(path), "size": size, "sha256": h.hexdigest()}
+    if prefix is not None:
+        result["prefix_sha256"] = prefix.hexdigest()
+    return result
+
+
+def _cache_file(name: str, digest: str, suffix: str) -> Path:
+    return CACHE_DIR / f"{name}-{digest}{suffix}"
+
+
+def _load_pickle(path: Path):
+    if not path.exists():
+        return None
+    try:
+        with path.open("rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _save_pickle(path: Path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+
+
+def _prune(name: str, suffix: str, keep: Path):
+    """Drop cache entries for ``name`` other than ``keep``."""
+    for stale in CACHE_DIR.glob(f"{name}-*{suffix}"):
+        if stale != keep:
+            stale.unlink()
+
+
+def diff_maps(old, new):
+    """Keys added, removed or changed between two mappings."""
+    changed = {k for k, v in new.items() if k not in old or old[k] != v}
+    changed.update(k for k in old if k not in new)
+    return changed
+
+
+def diff_tables(old, new):
+    """Village codes whose regions_id.csv row differs between two tables."""
+    changed = set()
+    for i, code in enumerate(new.codes()):
+        j = old.index(code)
+        if j < 0 or old.village(j) != new.village(i):
+            changed.add(code)
+    changed.update(code for code in old.codes() if new.index(code) < 0)
+    return changed
+
+# ============================================================
+# PREVIOUS ARTIFACTS
+# ============================================================
+
+class ArtifactPatch:
+    """
+    Read access to the record fragments of a previous artifact.
+    ``reuse(code)`` returns the old bytes for an unchanged village.
+    """
+
+    def __init__(self, path: Path, fragments, changed):
+        self.codes, self.starts, self.ends = fragments
+        self.changed = changed
+        with Path(path).open("rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def reuse(self, village_code):
+        if village_code in self.changed:
+            return None
+        key = int(village_code)
+        i = bisect_left(self.codes, key)
+        if i == len(self.codes) or self.codes[i] != key:
+            return None
+        return self._data[self.starts[i]:self.ends[i]]
+
+# ============================================================
+# BUILD
+# ============================================================
+
+class IncrementalBuild:
+    """
+    Tracks inputs and outputs of one build script across runs.
+
+    Usage:
+      build = IncrementalBuild(manifest_path, params)
+      villages = build.villages("regions_id", path)
+      mapping = build.mapping("opendata_jabar", path, parse)
+      if build.up_to_date(outputs): ...
+      writer = CsvArtifact(path, fields, previous=build.previous_artifact(path))
+      ...
+      build.finish(writers, other_outputs)
+    """
+
+    def __init__(self, manifest_path: Path, params):
+        self.manifest_path = Path(manifest_path)
+        self.params = params
+        self.inputs = {}
+        self.changed = set()
+
+        previous = {}
+        if self.manifest_path.exists():
+            with self.manifest_path.open(encoding="utf-8") as f:
+                previous = json.load(f)
+        if (
+            previous.get("manifest_version") != MANIFEST_VERSION
+            or previous.get("params") != params
+        ):
+            previous = {}
+        self.previous = previous
+        self.full = not previous
+
+    def _previous_input(self, name):
+        return self.previous.get("inputs", {}).get(name)
+
+    # ---------------- inputs ----------------
+
+    def source(self, name, path: Path):
+        """
+        Record an input parsed outside the cache (e.g. by the vectorized
+        engine) or one that does not map to villages (e.g. overrides); a
+        change forces a full rebuild. A missing file is an absent input.
+        """
+        previous = self._previous_input(name)
+        if not Path(path).exists():
+            if previous:
+                self.full = True
+            return
+        current = self.inputs[name] = fingerprint(path)
+        if not previous or previous["sha256"] != current["sha256"]:
+            self.full = True
+
+    def derived(self, name, mapping):
+        """
+        Record a village_code → value mapping computed from the inputs
+        (e.g. confidence scores); villages whose value changed since the
+        previous build are rebuilt.
+        """
+        previous = self._previous_input(name)
+        digest = hashlib.sha256(
+            pickle.dumps(mapping, protocol=pickle.HIGHEST_PROTOCOL)
+        ).hexdigest()
+        self.inputs[name] = {"records": len(mapping), "sha256": digest}
+
+        if not previous:
+            self.full = True
+        elif previous["sha256"] != digest:
+            old = _load_pickle(_cache_file(name, previous["sha256"], ".pickle"))
+            if old is None:
+                self.full = True
+            else:
+                self.changed |= diff_maps(old, mapping)
+
+        cache = _cache_file(name, digest, ".pickle")
+        if not cache.exists():
+            _save_pickle(cache, mapping)
+        _prune(name, ".pickle", cache)
+
+    def villages(self, name, path: Path, required=regions_id.REQUIRED_COLUMNS):
+        """Load regions_id.csv, diffing against the previous table."""
+        previous = self._previous_input(name)
+        current = self.inputs[name] = fingerprint(path)
+        table = regions_id.load_regions_id(path, required=required)
+
+        if previous and previous["sha256"] != current["sha256"]:
+            old = regions_id.cached_table(previous["sha256"])
+            if old is None:
+                self.full = True
+            else:
+                self.changed |= diff_tables(old, table)
+        return table
+
+    def mapping(self, name, path: Path, parse, parse_tail=None):
+        """
+        Load a village_code → postal_code mapping via ``parse(path)``.
+
+        The parsed mapping is cached by sha256. If ``parse_tail`` is
+        given and the file only had lines appended since the previous
+        build, ``parse_tail(path, offset)`` parses just the new bytes
+        and is merged over the cached mapping (later lines win).
+        """
+        previous = self._previous_input(name)
+        prefix_size = previous["size"] if previous and parse_tail else None
+        current = fingerprint(path, prefix_size)
+        prefix_sha256 = current.pop("prefix_sha256", None)
+        self.inputs[name] = current
+
+        cache = _cache_file(name, current["sha256"], ".pickle")
+        old = None
+        if previous:
+            old = _load_pickle(_cache_file(name, previous["sha256"], ".pickle"))
+
+        if old is not None and previous["sha256"] == current["sha256"]:
+            return old
+
+        if (
+            old is not None
+            and prefix_sha256 == previous["sha256"]
+            and _ends_with_newline(path, previous["size"])
+        ):
+            mapping = old
+            for key, value in parse_tail(path, previous["size"]).items():
+                if mapping.get(key) != value:
+                    self.changed.add(key)
+                    mapping[key] = value
+        else:
+            mapping = parse(path)
+            if old is None:
+                self.full = True
+            else:
+                self.changed |= diff_maps(old, mapping)
+
+        _save_pickle(cache, mapping)
+        _prune(name, ".pickle", cache)
+        return mapping
+
+    # ---------------- outputs ----------------
+
+    def up_to_date(self, outputs):
+        """True when no input changed and every output is as recorded."""
+        if self.full or self.changed:
+            return False
+        recorded = self.previous.get("outputs", {})
+        return all(
+            path.exists() and recorded.get(path.name) == fingerprint(path)["sha256"]
+            for path in map(Path, outputs)
+        )
+
+    def previous_artifact(self, path: Path):
+        """ArtifactPatch for reusing unchanged records of ``path``, or None."""
+        if self.full:
+            return None
+        path = Path(path)
+        digest = self.previous.get("outputs", {}).get(path.name)
+        if digest is None or not path.exists():
+            return None
+        if fingerprint(path)["sha256"] != digest:
+            return None
+        fragments = _load_pickle(_cache_file(path.name, digest, ".idx"))
+        if fragments is None:
+            return None
+        return ArtifactPatch(path, fragments, self.changed)
+
+    def finish(self, writers, outputs=()):
+        """
+        Save fragment indexes for ``writers`` and write the manifest
+        covering them plus any other ``outputs``.
+        """
+        recorded = {}
+        reused = 0
+        # Full when no writer had a previous artifact to patch
+        full = self.full or all(writer.previous is None for writer in writers)
+        for writer in writers:
+            digest = fingerprint(writer.path)["sha256"]
+            recorded[writer.path.name] = digest
+            idx = _cache_file(writer.path.name, digest, ".idx")
+            _save_pickle(idx, (writer.codes, writer.starts, writer.ends))
+            _prune(writer.path.name, ".idx", idx)
+            reused += writer.reused
+        for path in map(Path, outputs):
+            recorded[path.name] = fingerprint(path)["sha256"]
+
+        manifest = {
+            "manifest_version": MANIFEST_VERSION,
+            "params": self.params,
+            "inputs": self.inputs,
+            "outputs": dict(sorted(recorded.items())),
+            "rebuild": {
+                "mode": "full" if full else "incremental",
+                "changed_villages": len(self.changed),
+                "reused_records": reused,
+            },
+        }
+        with self.manifest_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        return manifest
+
+
+def _ends_with_newline(path: Path, size: int) -> bool:
+    """Whether byte ``size - 1`` of ``path`` is a newline (or size is 0)."""
+    if size == 0:
+        return True
+    with Path(path).open("rb") as f:
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
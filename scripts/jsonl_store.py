@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from postal_lookup import is_postal_code
+
+# ============================================================
+# APPEND-ONLY JSONL STORE
+#
+# The ingestion output (village_postal_codes.jsonl) is only ever
+# appended to. A sidecar index (<file>.idx) maps every village_code to
+# the byte offset of its latest line with a valid (5-digit) postal_code,
+# plus the offsets of its other lines (superseded, or without one).
+# That is the line read_pos_indonesia_jsonl keeps for the village, so
+# membership and reads agree with what the builds see. Opening the
+# store only indexes the bytes appended since the index was saved, so
+# membership checks and per-village reads never rescan the file.
+#
+# Compaction rewrites the file sorted by village_code with one line per
+# village — the indexed line, or the latest line of a village that has
+# no postal_code at all — and reports codes whose lines disagreed on
+# postal_code. A partial last line (a writer mid-append) is carried
+# over unchanged. Appends and compaction hold an advisory lock on
+# <file>.lock, so a compaction never swaps the file under an appender.
+# ============================================================
+
+STORE_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl"
+)
+
+# Bump when the pickled index layout changes
+INDEX_FORMAT = 3
+
+# Bytes hashed at each end of the indexed prefix to detect rewrites
+CHECK_BYTES = 1 << 16
+
+VILLAGE_CODE_RE = re.compile(rb'"village_code"\s*:\s*"([^"\\]*)"')
+POSTAL_CODE_RE = re.compile(rb'"postal_code"\s*:\s*"([^"\\]*)"')
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def _prefix_check(f, size: int) -> str:
+    """sha256 of the first and last CHECK_BYTES of the first ``size`` bytes."""
+    h = hashlib.sha256()
+    f.seek(0)
+    h.update(f.read(min(size, CHECK_BYTES)))
+    f.seek(max(0, size - CHECK_BYTES))
+    h.update(f.read(min(size, CHECK_BYTES)))
+    return h.hexdigest()
+
+
+def _line_entry(line: bytes):
+    """
+    (village_code, has postal_code) of one JSONL line, without a full
+    parse when possible; village_code is None for unusable lines.
+    A line has a postal_code when read_pos_indonesia_jsonl would use it:
+    a 5-digit string.
+
+    The regexes only see top-level keys on a flat object: a nested
+    object may carry keys of the same name, so those lines are parsed.
+    """
+    if line.count(b"{") == 1:
+        code = VILLAGE_CODE_RE.findall(line)
+        postal = POSTAL_CODE_RE.findall(line)
+        if len(code) == 1 and len(postal) == 1:
+            return code[0].decode("utf-8"), is_postal_code(postal[0].decode("utf-8"))
+    try:
+        obj = json.loads(line)
+        code, postal = obj.get("village_code"), obj.get("postal_code")
+    except (ValueError, AttributeError):
+        return None, False
+    return (str(code) if code else None), is_postal_code(postal)
+
+# ============================================================
+# STORE
+# ============================================================
+
+class JsonlStore:
+    """
+    Indexed view of an append-only JSONL file keyed by village_code.
+
+    Usage:
+      store = JsonlStore(path)
+      if code not in store: ...
+      store.get(code)            # latest object with a postal_code, or None
+      store.append(objs)         # append lines and index them
+      store.compact(report_path) # sorted, deduplicated rewrite
+    """
+
+    def __init__(self, path: Path = STORE_FILE):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.offsets = {}   # village_code → offset of its latest line with a postal_code
+        self.history = {}   # village_code → offsets of its other lines, in file order
+        self.size = 0       # bytes of self.path covered by the index
+        self.lines = 0
+        self._load_index()
+        self.refresh()
+
+    # ---------------- index ----------------
+
+    def _load_index(self):
+        if not self.index_path.exists() or not self.path.exists():
+            return
+        try:
+            with self.index_path.open("rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            return  # unreadable index; rebuilt by refresh()
+        if state.get("format") != INDEX_FORMAT:
+            return
+        size = state["size"]
+        if size > os.path.getsize(self.path):
+            return
+        with self.path.open("rb") as f:
+            if _prefix_check(f, size) != state["check"]:
+                return
+        self.offsets = state["offsets"]
+        self.history = state["history"]
+        self.size = size
+        self.lines = state["lines"]
+
+    def save_index(self):
+        with self.path.open("rb") as f:
+            check = _prefix_check(f, self.size)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(
+                {
+                    "format": INDEX_FORMAT,
+                    "size": self.size,
+                    "check": check,
+                    "lines": self.lines,
+                    "offsets": self.offsets,
+                    "history": self.history,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        tmp.replace(self.index_path)
+
+    def _index(self, code, usable: bool, position: int):
+        """Index the line at ``position``."""
+        if usable:
+            previous = self.offsets.get(code)
+            self.offsets[code] = position
+            if previous is None:
+                return
+            position = previous
+        self.history.setdefault(code, []).append(position)
+        self.history[code].sort()
+
+    def refresh(self):
+        """Index complete lines appended since the last refresh."""
+        if not self.path.exists():
+            return 0
+        end = os.path.getsize(self.path)
+        if end == self.size:
+            return 0
+
+        added = 0
+        with self.path.open("rb") as f:
+            f.seek(self.size)
+            position = self.size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial last line; picked up once completed
+                code, usable = _line_entry(line) if line.strip() else (None, False)
+                if code is not None:
+                    self._index(code, usable, position)
+                    added += 1
+                position += len(line)
+        self.size = position
+        self.lines += added
+        self.save_index()
+        return added
+
+    # ---------------- reads ----------------
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, village_code):
+        return village_code in self.offsets
+
+    def codes(self):
+        """Set-like view of every village_code with a postal_code."""
+        return self.offsets.keys()
+
+    def _read(self, f, offset: int):
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def get(self, village_code):
+        """Latest object with a postal_code for ``village_code``, or None."""
+        offset = self.offsets.get(village_code)
+        if offset is None:
+            return None
+        with self.path.open("rb") as f:
+            return self._read(f, offset)
+
+    def _offsets(self, village_code):
+        """Offsets of every line of ``village_code``, in file order."""
+        offsets = list(self.history.get(village_code, ()))
+        if village_code in self.offsets:
+            offsets.append(self.offsets[village_code])
+        return sorted(offsets)
+
+    def versions(self, village_code):
+        """Every object written for ``village_code``, oldest first."""
+        with self.path.open("rb") as f:
+            return [self._read(f, offset) for offset in self._offsets(village_code)]
+
+    def duplicates(self):
+        """Codes written more than once."""
+        return [
+            code for code, offsets in self.history.items()
+            if len(offsets) + (code in self.offsets) > 1
+        ]
+
+    # ---------------- writes ----------------
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive advisory lock shared by every writer of the file."""
+        with self.lock_path.open("a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, objs, save: bool = True):
+        """
+        Append objects (each with a village_code) and index them.
+        With ``save=False`` the sidecar is left for a later
+        ``save_index()``; lines it misses are re-indexed on open.
+        """
+        with self._locked():
+            self.refresh()
+            with self.path.open("ab") as f:
+                position = f.tell()
+                if position != self.size:
+                    die(f"{self.path} ends with an incomplete line; fix it before appending")
+                for obj in objs:
+                    code = str(obj["village_code"])
+                    line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    self._index(code, is_postal_code(obj.get("postal_code")), position)
+                    position += len(line)
+                    self.lines += 1
+            self.size = position
+            if save:
+                self.save_index()
+
+    def compact(self, report_path: Path = None):
+        """
+        Rewrite the file sorted by village_code with one line per
+        village: the latest line with a postal_code (the one the builds
+        use), else the latest line. Returns the conflicts (codes whose
+        lines disagree on a postal_code), also written to
+        ``report_path`` if given. A partial last line is kept at the end
+        and its size reported as ``partial_tail_bytes``.
+        """
+        with self._locked():
+            self.refresh()
+            conflicts = []
+            codes = sorted(self.offsets.keys() | self.history.keys())
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with self.path.open("rb") as src, tmp.open("wb") as dst:
+                for code in codes:
+                    kept = self.offsets.get(code, self.history.get(code, [None])[-1])
+                    src.seek(kept)
+                    line = src.readline()
+                    dst.write(line)
+
+                    if code in self.history:
+                        postal_codes = [
+                            self._read(src, offset).get("postal_code")
+                            for offset in self._offsets(code)
+                        ]
+                        if len({p for p in postal_codes if p}) > 1:
+                            conflicts.append(
+                                {
+                                    "village_code": code,
+                                    "postal_codes": postal_codes,
+                                    "kept": json.loads(line).get("postal_code"),
+                                }
+                            )
+
+                # Not indexed by refresh(); completed by a later append
+                src.seek(self.size)
+                tail = src.read()
+                dst.write(tail)
+
+            summary = {
+                "lines_before": self.lines,
+                "villages": len(codes),
+                "duplicates_dropped": self.lines - len(codes),
+                "conflicts": len(conflicts),
+                "partial_tail_bytes": len(tail),
+            }
+            tmp.replace(self.path)
+            self.offsets, self.history, self.size, self.lines = {}, {}, 0, 0
+            self.refresh()
+
+        if report_path is not None:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {**summary, "conflict_villages": conflicts},
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+        return summary, conflicts
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index, query and compact the append-only ingestion JSONL"
+    )
+    parser.add_argument(
+        "--path",
+        default=str(STORE_FILE),
+        help="Ingestion JSONL",
+    )
+    parser.add_argument(
+        "--get",
+        metavar="VILLAGE_CODE",
+        help="Print every line stored for a village",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Rewrite sorted with one line per village",
+    )
+    parser.add_argument(
+        "--report",
+        default="jsonl_store_conflicts.json",
+        help="Conflict report written by --compact",
+    )
+
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        die(f"Missing JSONL: {path}")
+    store = JsonlStore(path)
+
+    if args.get:
+        versions = store.versions(args.get)
+        if not versions:
+            die(f"village_code not in store: {args.get}")
+        for obj in versions:
+            print(json.dumps(obj, ensure_ascii=False))
+        return
+
+    if args.compact:
+        summary, conflicts = store.compact(Path(args.report))
+        print("Compaction complete")
+        print(f"- Lines before       : {summary['lines_before']}")
+        print(f"- Villages           : {summary['villages']}")
+        print(f"- Duplicates dropped : {summary['duplicates_dropped']}")
+        print(f"- Conflicts          : {summary['conflicts']}")
+        if summary["partial_tail_bytes"]:
+            print(
+                f"WARNING: kept a partial last line "
+                f"({summary['partial_tail_bytes']} bytes) at the end of {path}",
+                file=sys.stderr,
+            )
+        print(f"→ {path}")
+        print(f"→ {args.report}")
+        return
+
+    print(f"Indexed {path}")
+    print(f"- Lines      : {store.lines}")
+    print(f"- Villages   : {len(store)}")
+    print(f"- Duplicates : {len(store.duplicates())}")
+
+
+if __name__ == "__main__":
+    main()
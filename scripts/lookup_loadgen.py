@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+from postal_lookup import decode_postal_code, load_index
+
+# ------------------------------------------------------------
+# Load generator for lookup_server.py
+#
+# Opens --concurrency keep-alive connections and sends a weighted mix
+# of village, reverse postal code and batch lookups for --duration
+# seconds. Keys are drawn from the same artifact the server loaded;
+# --hot-fraction of requests go to a small hot set, so the server's
+# cache sees a realistic skew.
+# ------------------------------------------------------------
+
+USER_AGENT = "postal-code-id-loadgen/1"
+
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[i], 3)
+
+# ------------------------------------------------------------
+# Keep-alive client
+# ------------------------------------------------------------
+
+class Connection:
+    """One persistent HTTP/1.1 connection; reconnects when the server closes it."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, target: str, body: bytes = b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+        )
+        if body:
+            head += "Content-Type: application/json\r\n"
+        head += f"Content-Length: {len(body)}\r\n\r\n"
+        self.writer.write(head.encode("ascii") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+# ------------------------------------------------------------
+# Workload
+# ------------------------------------------------------------
+
+class Workload:
+    def __init__(self, village_codes, postal_codes, args):
+        self.village_codes = village_codes
+        self.postal_codes = postal_codes
+        self.batch_size = args.batch_size
+        self.hot_fraction = args.hot_fraction
+        self.hot = village_codes[: max(1, int(len(village_codes) * args.hot_set))]
+        self.kinds = ["village", "postal", "batch"]
+        self.weights = [float(w) for w in args.mix.split(":")]
+        if len(self.weights) != 3:
+            die("--mix expects three weights: village:postal:batch")
+
+    def village(self, rnd):
+        pool = self.hot if rnd.random() < self.hot_fraction else self.village_codes
+        return rnd.choice(pool)
+
+    def next(self, rnd):
+        """(kind, method, target, body) for one request."""
+        kind = rnd.choices(self.kinds, self.weights)[0]
+        if kind == "village":
+            return kind, "GET", f"/villages/{self.village(rnd)}", b""
+        if kind == "postal":
+            return kind, "GET", f"/postal-codes/{rnd.choice(self.postal_codes)}", b""
+        body = json.dumps(
+            {"village_codes": [self.village(rnd) for _ in range(self.batch_size)]}
+        ).encode("utf-8")
+        return kind, "POST", "/batch", body
+
+
+async def worker(n, host, port, workload, deadline, results):
+    rnd = random.Random(n)
+    connection = Connection(host, port)
+    try:
+        while time.monotonic() < deadline:
+            kind, method, target, body = workload.next(rnd)
+            started = time.perf_counter()
+            try:
+                status, _ = await connection.request(method, target, body)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                connection.close()
+                results["errors"] += 1
+                continue
+            results["latency"][kind].append((time.perf_counter() - started) * 1000)
+            if status >= 500:
+                results["errors"] += 1
+    finally:
+        connection.close()
+
+
+async def run(args):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+
+    index = load_index(args.artifact)
+    village_codes = [str(c) for c in index.village_codes]
+    postal_codes = sorted(
+        {decode_postal_code(p) for p in index.postal_codes} - {None}
+    )
+    random.Random(0).shuffle(village_codes)
+    workload = Workload(village_codes, postal_codes, args)
+
+    results = {"errors": 0, "latency": {kind: [] for kind in workload.kinds}}
+    started = time.monotonic()
+    deadline = started + args.duration
+    await asyncio.gather(
+        *(
+            worker(n, host, port, workload, deadline, results)
+            for n in range(args.concurrency)
+        )
+    )
+    elapsed = time.monotonic() - started
+
+    metrics_connection = Connection(host, port)
+    try:
+        _, body = await metrics_connection.request("GET", "/metrics")
+        server_metrics = json.loads(body)
+    finally:
+        metrics_connection.close()
+
+    report = {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 2),
+        "errors": results["errors"],
+        "requests": {},
+        "server_cache": server_metrics.get("cache"),
+    }
+    total = 0
+    for kind, values in results["latency"].items():
+        values.sort()
+        total += len(values)
+        report["requests"][kind] = {
+            "count": len(values),
+            "per_second": round(len(values) / elapsed, 1),
+            "p50_ms": percentile(values, 0.5),
+            "p90_ms": percentile(values, 0.9),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": round(values[-1], 3) if values else None,
+        }
+    report["total_requests"] = total
+    report["requests_per_second"] = round(total / elapsed, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure lookup_server.py throughput over keep-alive connections"
+    )
+    parser.add_argument(
+        "artifact",
+        help="Artifact the server was started with (keys are sampled from it)",
+    )
+    parser.add_argument(
+        "--url",
+        default="http://127.0.0.1:8080/",
+        help="Lookup server base URL",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=32,
+        help="Concurrent keep-alive connections",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=10.0,
+        help="Seconds to generate load for",
+    )
+    parser.add_argument(
+        "--mix",
+        default="8:1:1",
+        help="Relative weights of village:postal:batch requests",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Village codes per batch request",
+    )
+    parser.add_argument(
+        "--hot-set",
+        type=float,
+        default=0.01,
+        help="Fraction of villages in the hot set",
+    )
+    parser.add_argument(
+        "--hot-fraction",
+        type=float,
+        default=0.8,
+        help="Fraction of village lookups that hit the hot set",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the report JSON here as well",
+    )
+
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from postal_lookup import load_index
+
+# ------------------------------------------------------------
+# Postal code lookup service
+#
+# Loads one built artifact (ideally the memory-mapped *.bin, whose
+# pages are shared by every process on the host) and answers:
+#   GET  /villages/<village_code>     record, or 404
+#   GET  /postal-codes/<postal_code>  records sharing the postal code
+#   POST /batch                       {"village_codes": [...],
+#                                      "postal_codes": [...]}
+#   GET  /metrics                     latency histograms, cache hit rate
+#   GET  /healthz
+# over HTTP/1.1 with keep-alive. Serialised single-key answers are kept
+# in an LRU cache that batch requests draw from as well.
+# ------------------------------------------------------------
+
+SERVER_NAME = "postal-code-id-lookup/1"
+
+# Keys per batch request, request body and header limits
+MAX_BATCH = 1000
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_LINES = 100
+
+# Seconds an idle keep-alive connection is held open, and the time
+# allowed for each of a request's headers and body
+IDLE_TIMEOUT = 30.0
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+# ------------------------------------------------------------
+# Cache and metrics
+# ------------------------------------------------------------
+
+class LruCache:
+    """Bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class LatencyHistogram:
+    """Request latencies counted into fixed millisecond buckets."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding quantile ``q``."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max_ms
+
+    def stats(self):
+        buckets = {f"le_{b}": n for b, n in zip(self.bounds, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 4),
+            "buckets": buckets,
+        }
+
+# ------------------------------------------------------------
+# Lookups
+# ------------------------------------------------------------
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class LookupService:
+    def __init__(self, index, artifact: str, cache_size: int):
+        self.index = index
+        self.artifact = artifact
+        self.cache = LruCache(cache_size)
+        self.latency = {}
+        self.status = {}
+        self.connections_open = 0
+        self.connections_total = 0
+        self.started = time.monotonic()
+
+    # ---------------- single keys ----------------
+
+    def village_json(self, code: str) -> bytes:
+        """Serialised record for ``code``, or b"null"."""
+        key = ("village", code)
+        body = self.cache.get(key)
+        if body is None:
+            body = _dumps(self.index.get(code))
+            self.cache.put(key, body)
+        return body
+
+    def postal_json(self, code: str) -> bytes:
+        """Serialised list of records sharing ``code``."""
+        key = ("postal", code)
+        body = self.cache.get(key)
+        if body is None:
+            body = _dumps(self.index.villages_by_postal_code(code))
+            self.cache.put(key, body)
+        return body
+
+    # ---------------- batch ----------------
+
+    def batch_json(self, payload) -> bytes:
+        if not isinstance(payload, dict):
+            raise HttpError(400, "batch body must be a JSON object")
+        parts = []
+        total = 0
+        for field, lookup in (
+            ("village_codes", self.village_json),
+            ("postal_codes", self.postal_json),
+        ):
+            codes = payload.get(field, [])
+            if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+                raise HttpError(400, f"{field} must be a list of strings")
+            total += len(codes)
+            if total > MAX_BATCH:
+                raise HttpError(413, f"at most {MAX_BATCH} codes per batch")
+            entries = b",".join(_dumps(code) + b":" + lookup(code) for code in codes)
+            parts.append(_dumps(field) + b":{" + entries + b"}")
+        return b"{" + b",".join(parts) + b"}"
+
+    # ---------------- metrics ----------------
+
+    def observe(self, route: str, status: int, ms: float):
+        histogram = self.latency.get(route)
+        if histogram is None:
+            histogram = self.latency[route] = LatencyHistogram()
+        histogram.observe(ms)
+        self.status[status] = self.status.get(status, 0) + 1
+
+    def metrics(self):
+        return {
+            "artifact": self.artifact,
+            "records": len(self.index),
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "connections": {
+                "open": self.connections_open,
+                "total": self.connections_total,
+            },
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "cache": self.cache.stats(),
+            "latency": {
+                route: h.stats() for route, h in sorted(self.latency.items())
+            },
+        }
+
+    # ---------------- routing ----------------
+
+    def route(self, method: str, path: str, body: bytes):
+        """(route name, status, response body) for one request."""
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        name = parts[0] if parts and parts[0] else "/"
+
+        if name in ("villages", "postal-codes") and len(parts) == 2:
+            if method != "GET":
+                raise HttpError(405, "use GET")
+            if name == "villages":
+                found = self.village_json(parts[1])
+                return name, (404 if found == b"null" else 200), found
+            return name, 200, self.postal_json(parts[1])
+
+        if name == "batch" and len(parts) == 1:
+            if method != "POST":
+                raise HttpError(405, "use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(400, "batch body is not valid JSON")
+            return name, 200, self.batch_json(payload)
+
+        if name == "metrics" and len(parts) == 1:
+            return name, 200, _dumps(self.metrics())
+
+        if name == "healthz" and len(parts) == 1:
+            return name, 200, b'{"status":"ok"}'
+
+        raise HttpError(404, f"no route for {path}")
+
+# ------------------------------------------------------------
+# HTTP
+# ------------------------------------------------------------
+
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    return (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+        f"Server: {SERVER_NAME}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("ascii") + body
+
+
+async def _readline(reader):
+    try:
+        return await reader.readline()
+    except (asyncio.LimitOverrunError, ValueError):
+        raise HttpError(400, "request line or header too long")
+
+
+async def _read_headers(reader):
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await _readline(reader)
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raise HttpError(400, "too many header lines")
+
+
+async def _read_request(reader):
+    """
+    (method, target, version, headers, body), or None on a closed
+    connection. The headers and the body each get IDLE_TIMEOUT, so a
+    client trickling bytes (slowloris) cannot hold the connection open.
+    """
+    request_line = await asyncio.wait_for(_readline(reader), IDLE_TIMEOUT)
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "malformed request line")
+
+    try:
+        headers = await asyncio.wait_for(_read_headers(reader), IDLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HttpError(408, "headers not received in time")
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "malformed Content-Length")
+    if length < 0:
+        raise HttpError(400, "malformed Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"request body over {MAX_BODY_BYTES} bytes")
+    if not length:
+        return method, target, version, headers, b""
+    try:
+        body = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HttpError(408, "request body not received in time")
+    return method, target, version, headers, body
+
+
+async def handle(service: LookupService, reader, writer):
+    service.connections_open += 1
+    service.connections_total += 1
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                break
+            except HttpError as exc:
+                writer.write(_response(exc.status, _dumps({"error": str(exc)}), False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+
+            started = time.perf_counter()
+            method, target, version, headers, body = request
+            connection = headers.get("connection", "").lower()
+            if version == "HTTP/1.0":
+                keep_alive = connection == "keep-alive"
+            else:
+                keep_alive = connection != "close"
+
+            try:
+                route, status, payload = service.route(method, urlsplit(target).path, body)
+            except HttpError as exc:
+                route, status, payload = "error", exc.status, _dumps({"error": str(exc)})
+            except Exception as exc:  # keep serving other requests
+                route, status, payload = "error", 500, _dumps({"error": repr(exc)})
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            service.observe(route, status, (time.perf_counter() - started) * 1000)
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        service.connections_open -= 1
+        writer.close()
+
+
+async def serve(args):
+    started = time.perf_counter()
+    index = load_index(Path(args.artifact))
+    service = LookupService(index, args.artifact, args.cache_size)
+    print(
+        f"Loaded {len(index)} records from {args.artifact} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+    server = await asyncio.start_server(
+        lambda r, w: handle(service, r, w), args.host, args.port, backlog=1024
+    )
+    print(f"Postal code lookup on http://{args.host}:{args.port}/")
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            json.dump(service.metrics(), sys.stdout, indent=2)
+            print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTTP lookup service over a built postal code artifact"
+    )
+    parser.add_argument(
+        "artifact",
+        help="Path to postal_codes*.bin (memory-mapped), *.json or *.csv",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Listen address",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="Listen port",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Cached single-key responses (0 disables the cache)",
+    )
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
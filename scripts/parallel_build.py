@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================================================
+# PROVINCE-PARALLEL BUILDS
+#
+# VillageTable rows are partitioned by province_code. A process pool
+# builds the records of each partition and serialises them for every
+# artifact; a worker returns, per partition, the records' village codes
+# and field values plus one byte fragment per record and artifact.
+#
+# VillageTable rows are sorted by village_code, whose leading digits
+# are the province_code, so every partition is a contiguous run of
+# rows. The parent therefore needs no merge: it takes the partitions in
+# province order as they finish and appends their fragments through the
+# usual artifact writers, so artifact bytes, fragment indexes and
+# IndexBuilder input are exactly those of a sequential build. A
+# partition is dropped once written; only partitions that finish ahead
+# of an earlier, slower one wait in the parent.
+#
+# Opt-in, via the environment (builds take no arguments):
+#   BUILD_WORKERS=4   build with four processes
+# ============================================================
+
+DEFAULT_WORKERS = 1
+
+# Worker state, set once per process by _init_worker
+_WORKER = {}
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+def build_workers() -> int:
+    """Process count from BUILD_WORKERS (default: sequential build)."""
+    value = os.environ.get("BUILD_WORKERS") or DEFAULT_WORKERS
+    try:
+        workers = int(value)
+    except ValueError:
+        raise ValueError(f"BUILD_WORKERS must be an integer, not {value!r}")
+    if workers < 1:
+        raise ValueError(f"BUILD_WORKERS must be at least 1, not {workers}")
+    return workers
+
+# ============================================================
+# PARTITIONS
+# ============================================================
+
+def province_partitions(villages):
+    """
+    Row indexes of every province_code, in order of first appearance;
+    with rows sorted by village_code that is also village_code order.
+    """
+    partitions = {}
+    district_regency = villages.district_regency
+    regency_province = villages.regency_province
+    for i, d in enumerate(villages.village_district):
+        p = regency_province[district_regency[d]]
+        rows = partitions.get(p)
+        if rows is None:
+            rows = partitions[p] = array("I")
+        rows.append(i)
+    return list(partitions.values())
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+def _init_worker(build_records, villages, args, specs, fields):
+    _WORKER.update(
+        build_records=build_records,
+        villages=villages,
+        args=args,
+        serializers=[cls(os.devnull, fieldnames) for cls, fieldnames in specs],
+        fields=fields,
+    )
+
+
+def _build_partition(rows):
+    """(codes, field values, fragments per artifact) for one partition."""
+    serializers = _WORKER["serializers"]
+    fields = _WORKER["fields"]
+    codes = array("q")
+    values = []
+    blobs = [bytearray() for _ in serializers]
+    ends = [array("Q") for _ in serializers]
+
+    build_records = _WORKER["build_records"]
+    for record in build_records(_WORKER["villages"], *_WORKER["args"], rows):
+        codes.append(int(record["village_code"]))
+        values.append(tuple(record[f] for f in fields))
+        for serializer, blob, end in zip(serializers, blobs, ends):
+            blob += serializer.serialize(record)
+            end.append(len(blob))
+
+    return codes, values, [bytes(b) for b in blobs], ends
+
+
+def _records(partition, fields):
+    """(village_code, record, fragments) of one built partition, in order."""
+    codes, values, blobs, ends = partition
+    starts = [0] * len(blobs)
+    for i, code in enumerate(codes):
+        fragments = []
+        for j, blob in enumerate(blobs):
+            end = ends[j][i]
+            fragments.append(blob[starts[j]:end])
+            starts[j] = end
+        yield code, dict(zip(fields, values[i])), fragments
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def parallel_records(build_records, villages, args, writers, fields, workers):
+    """
+    Yield (record, fragments) in village_code order, where fragments[i]
+    is the record serialised by writers[i]. ``build_records(villages,
+    *args, rows)`` must yield the records of ``rows`` in row order;
+    records carry ``fields``.
+    """
+    specs = [(type(w), w.fieldnames) for w in writers]
+    partitions = province_partitions(villages)
+    last = -1
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(partitions)) or 1,
+        initializer=_init_worker,
+        initargs=(build_records, villages, tuple(args), specs, list(fields)),
+    ) as pool:
+        # map() hands results back in submission order, each as soon as
+        # it and every earlier partition are done
+        for partition in pool.map(_build_partition, partitions):
+            for code, record, fragments in _records(partition, fields):
+                if code <= last:
+                    raise ValueError(
+                        f"village_code {code} out of order: provinces are not contiguous"
+                    )
+                last = code
+                yield record, fragments
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_from_opendata_jabar import warn_invalid_postal_codes
+from byte_ranges import read_range, split_ranges
+from postal_lookup import is_postal_code
+
+# ============================================================
+# POS INDONESIA SCRAPE JSONL
+#
+# The one reader of the ingestion output, shared by the Pos Indonesia
+# and derived builds, coverage and the agreement analysis. It lives
+# apart from build_from_pos_indonesia.py so that agreement.py can use
+# it without importing the build that imports agreement.py.
+# ============================================================
+
+POS_JSONL_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl"
+)
+
+# JSONL reads of at least this many bytes are split across processes
+PARALLEL_MIN_BYTES = 8 << 20
+PARSE_WORKERS = os.cpu_count() or 1
+
+# ============================================================
+# LOADERS
+# ============================================================
+
+def parse_pos_indonesia_range(task):
+    """
+    (village_code → postal_code, rejected rows) for one newline-aligned
+    byte range. Lines whose postal code is not 5 digits are rejected.
+    """
+    path, start, end = task
+    mapping = {}
+    rejected = []
+
+    offset = start
+    for line in read_range(path, start, end).splitlines(keepends=True):
+        position, offset = offset, offset + len(line)
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        village_code = obj.get("village_code")
+        postal_code = obj.get("postal_code")
+
+        if not village_code or not postal_code:
+            continue
+        if not is_postal_code(postal_code):
+            rejected.append((f"byte {position}", village_code, postal_code))
+            continue
+
+        mapping[village_code] = postal_code
+
+    return mapping, rejected
+
+
+def read_pos_indonesia_jsonl(
+    path: Path, offset: int = 0, workers: int = PARSE_WORKERS
+):
+    """
+    Read POS Indonesia scrape JSONL from byte ``offset`` onwards.
+    Expected keys per line:
+      village_code, postal_code
+
+    Large files are split into newline-aligned byte ranges parsed in a
+    process pool. Partial maps are merged in file order, so a village
+    listed more than once keeps its last occurrence, as in a serial read.
+    """
+    size = path.stat().st_size
+    parallel = workers > 1 and size - offset >= PARALLEL_MIN_BYTES
+    ranges = split_ranges(path, workers * 4 if parallel else 1, start=offset)
+    tasks = [(str(path), start, end) for start, end in ranges]
+
+    if len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(parse_pos_indonesia_range, tasks))
+    else:
+        partials = [parse_pos_indonesia_range(task) for task in tasks]
+
+    mapping = {}
+    rejected = []
+    for partial, partial_rejected in partials:
+        mapping.update(partial)
+        rejected += partial_rejected
+
+    warn_invalid_postal_codes("POS Indonesia", rejected)
+    return mapping
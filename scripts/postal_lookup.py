@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import mmap
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+# ============================================================
+# IN-PROCESS LOOKUP OVER BUILT ARTIFACTS
+#
+# Records from postal_codes*.json / *.csv (schema/postal_code.schema.json,
+# optionally with the enriched administrative columns written by
+# build_from_pos_indonesia.py) are held as parallel typed columns, not
+# as one dict per village. Strings live in a single UTF-8 blob, so the
+# index holds a handful of Python objects regardless of dataset size and
+# its pages stay shared between forked workers.
+#
+# Lookups are binary searches over sorted integer columns.
+# ============================================================
+
+# Sentinel for a null postal_code (UNASSIGNED villages)
+NO_POSTAL_CODE = 0xFFFFFFFF
+
+LEVELS = ("district", "regency", "province")
+
+# ============================================================
+# ENCODING
+# ============================================================
+
+def encode_code(value):
+    """
+    Encode an administrative code (str or int) as an integer.
+    Returns None for values that are not canonical digit strings.
+    """
+    if isinstance(value, str):
+        if not value.isdigit() or value[0] == "0":
+            return None
+        return int(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_postal_code(value) -> bool:
+    """Whether ``value`` is a postal code the schema accepts: 5 ASCII digits."""
+    return isinstance(value, str) and len(value) == 5 and value.isascii() and value.isdigit()
+
+
+def encode_postal_code(value):
+    """Encode a 5-digit postal code (str or int); None/"" → NO_POSTAL_CODE."""
+    if value is None or value == "":
+        return NO_POSTAL_CODE
+    if isinstance(value, str):
+        if len(value) != 5 or not value.isdigit():
+            raise ValueError(f"Invalid postal_code: {value!r}")
+    return int(value)
+
+
+def decode_postal_code(value: int):
+    return None if value == NO_POSTAL_CODE else f"{value:05d}"
+
+
+def _require_code(value, column):
+    code = encode_code(value)
+    if code is None:
+        raise ValueError(f"Invalid {column}: {value!r}")
+    return code
+
+# ============================================================
+# STRING TABLE
+# ============================================================
+
+class StringTable:
+    """Immutable list of strings stored as one UTF-8 blob plus offsets."""
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings):
+        offsets = array("I", [0])
+        parts = []
+        size = 0
+        for s in strings:
+            b = s.encode("utf-8")
+            parts.append(b)
+            size += len(b)
+            offsets.append(size)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+# ============================================================
+# INDEX
+# ============================================================
+
+class PostalCodeIndex:
+    """
+    Read-only lookup index over one postal code artifact.
+
+    Columns (all sequences of equal length, sorted by village_code):
+      village_codes, postal_codes, confidence, year,
+      type_index, source_index, status_index, village_names
+    Enriched artifacts add ``district_index`` plus per-level tables, and
+    every index has reverse ``<key>_keys``/``<key>_rows`` pairs for
+    postal_code and each administrative level.
+    """
+
+    def __init__(self, columns, vocab):
+        self.columns = columns
+        self.vocab = vocab
+        self.village_codes = columns["village_codes"]
+        self.postal_codes = columns["postal_codes"]
+        self.village_names = columns["village_names"]
+        self.enriched = "district_index" in columns
+
+    def __len__(self):
+        return len(self.village_codes)
+
+    def __contains__(self, village_code):
+        return self._row(village_code) >= 0
+
+    # ---------------- construction ----------------
+
+    @classmethod
+    def from_records(cls, records):
+        """Build an index from an iterable of artifact records (dicts)."""
+        builder = IndexBuilder()
+        for record in records:
+            builder.add(record)
+        return builder.build()
+
+    # ---------------- row access ----------------
+
+    def _row(self, village_code) -> int:
+        key = encode_code(village_code)
+        if key is None:
+            return -1
+        codes = self.village_codes
+        i = bisect_left(codes, key)
+        if i < len(codes) and codes[i] == key:
+            return i
+        return -1
+
+    def record(self, i: int):
+        """Materialise row ``i`` as an artifact record."""
+        c = self.columns
+        v = self.vocab
+        rec = {
+            "postal_code": decode_postal_code(self.postal_codes[i]),
+            "village_code": str(self.village_codes[i]),
+            "village_name": self.village_names[i],
+            "village_type": v["village_type"][c["type_index"][i]],
+            "source": v["source"][c["source_index"][i]],
+            "confidence": c["confidence"][i],
+            "year": c["year"][i],
+            "status": v["status"][c["status_index"][i]],
+        }
+        if self.enriched:
+            d = c["district_index"][i]
+            r = c["district_parent"][d]
+            p = c["regency_parent"][r]
+            rec.update(
+                {
+                    "district_code": str(c["district_codes"][d]),
+                    "district_name": c["district_names"][d],
+                    "regency_code": str(c["regency_codes"][r]),
+                    "regency_name": c["regency_names"][r],
+                    "province_code": str(c["province_codes"][p]),
+                    "province_name": c["province_names"][p],
+                }
+            )
+        return rec
+
+    # ---------------- village_code → record ----------------
+
+    def get(self, village_code):
+        """Record for ``village_code``, or None."""
+        i = self._row(village_code)
+        return self.record(i) if i >= 0 else None
+
+    def get_many(self, village_codes):
+        """Records for a list/array of village codes (None where absent)."""
+        return [self.get(code) for code in village_codes]
+
+    def postal_code(self, village_code):
+        """Postal code for ``village_code`` without building a record."""
+        i = self._row(village_code)
+        return decode_postal_code(self.postal_codes[i]) if i >= 0 else None
+
+    def postal_code_many(self, village_codes):
+        return [self.postal_code(code) for code in village_codes]
+
+    # ---------------- postal_code → villages ----------------
+
+    def _rows_for(self, name, key):
+        keys = self.columns[f"{name}_keys"]
+        rows = self.columns[f"{name}_rows"]
+        return rows[bisect_left(keys, key):bisect_right(keys, key)]
+
+    def villages_by_postal_code(self, postal_code):
+        """All records sharing ``postal_code``, in village_code order."""
+        try:
+            key = encode_postal_code(postal_code)
+        except ValueError:
+            return []
+        if key == NO_POSTAL_CODE:
+            return []
+        return [self.record(i) for i in self._rows_for("postal", key)]
+
+    def villages_by_postal_code_many(self, postal_codes):
+        return [self.villages_by_postal_code(code) for code in postal_codes]
+
+    # ---------------- administrative rollups ----------------
+
+    def _level_rows(self, level, code):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level: {level!r}")
+        if not self.enriched:
+            raise ValueError("Rollups require an enriched artifact")
+        key = encode_code(code)
+        if key is None:
+            return []
+        return self._rows_for(level, key)
+
+    def villages_in(self, level, code):
+        """All records in a district/regency/province."""
+        return [self.record(i) for i in self._level_rows(level, code)]
+
+    def postal_codes_in(self, level, code):
+        """Sorted distinct postal codes used in a district/regency/province."""
+        postal = self.postal_codes
+        found = {postal[i] for i in self._level_rows(level, code)}
+        found.discard(NO_POSTAL_CODE)
+        return [decode_postal_code(p) for p in sorted(found)]
+
+    def postal_codes_in_many(self, level, codes):
+        return [self.postal_codes_in(level, code) for code in codes]
+
+    def rollup(self, level, code):
+        """
+        Summary of one district/regency/province:
+        name, parent codes, village count, status counts and postal codes.
+        """
+        rows = self._level_rows(level, code)
+        if not rows:
+            return None
+
+        first = self.record(rows[0])
+        summary = {}
+        for name in LEVELS[LEVELS.index(level):]:
+            summary[f"{name}_code"] = first[f"{name}_code"]
+            summary[f"{name}_name"] = first[f"{name}_name"]
+
+        status_names = self.vocab["status"]
+        status_index = self.columns["status_index"]
+        status = {}
+        for i in rows:
+            s = status_names[status_index[i]]
+            status[s] = status.get(s, 0) + 1
+
+        summary["villages"] = len(rows)
+        summary["status"] = dict(sorted(status.items()))
+        summary["postal_codes"] = self.postal_codes_in(level, code)
+        return summary
+
+# ============================================================
+# BUILD HELPERS
+# ============================================================
+
+class IndexBuilder:
+    """
+    Accumulates artifact records into columns, one record at a time, so
+    a build can feed the index while it streams its other artifacts.
+    """
+
+    def __init__(self):
+        self.codes = array("q")
+        self.postal = array("I")
+        self.confidence = array("d")
+        self.year = array("H")
+        self.type_index = array("B")
+        self.source_index = array("B")
+        self.status_index = array("B")
+        self.names = []
+        self.vocab = {"village_type": {}, "source": {}, "status": {}}
+        self.levels = None
+        self.district_index = array("I")
+
+    def add(self, record):
+        self.codes.append(_require_code(record["village_code"], "village_code"))
+        self.postal.append(encode_postal_code(record.get("postal_code")))
+        self.confidence.append(float(record["confidence"]))
+        self.year.append(int(record["year"]))
+        self.names.append(record["village_name"])
+        for field, column in (
+            ("village_type", self.type_index),
+            ("source", self.source_index),
+            ("status", self.status_index),
+        ):
+            values = self.vocab[field]
+            column.append(values.setdefault(record[field], len(values)))
+
+        if self.levels is None:
+            self.levels = _LevelTables() if "district_code" in record else False
+        if self.levels:
+            self.district_index.append(self.levels.add(record))
+
+    def build(self) -> PostalCodeIndex:
+        codes = self.codes
+        levels = self.levels
+        row_columns = {
+            "village_codes": codes,
+            "postal_codes": self.postal,
+            "confidence": self.confidence,
+            "year": self.year,
+            "type_index": self.type_index,
+            "source_index": self.source_index,
+            "status_index": self.status_index,
+        }
+        if levels:
+            row_columns["district_index"] = self.district_index
+        names = self.names
+
+        order = sorted(range(len(codes)), key=codes.__getitem__)
+        if any(codes[a] == codes[b] for a, b in zip(order, order[1:])):
+            raise ValueError("Duplicate village_code in artifact")
+        if order != list(range(len(codes))):
+            row_columns = {k: _permute(c, order) for k, c in row_columns.items()}
+            names = [names[i] for i in order]
+
+        columns = dict(row_columns)
+        columns["village_names"] = StringTable.build(names)
+        columns.update(_reverse_index("postal", columns["postal_codes"]))
+
+        if levels:
+            columns.update(levels.columns())
+            for level in LEVELS:
+                row_codes = levels.row_codes(level, columns["district_index"])
+                columns.update(_reverse_index(level, row_codes))
+
+        return PostalCodeIndex(columns, {k: list(v) for k, v in self.vocab.items()})
+
+
+class _LevelTables:
+    """Interned district/regency/province tables for enriched records."""
+
+    def __init__(self):
+        self.index = {level: {} for level in LEVELS}
+        self.codes = {level: array("q") for level in LEVELS}
+        self.names = {level: [] for level in LEVELS}
+        self.parents = {level: array("I") for level in LEVELS[:-1]}
+
+    def _add(self, level, record, parent):
+        code = _require_code(record[f"{level}_code"], f"{level}_code")
+        index = self.index[level]
+        i = index.get(code)
+        if i is None:
+            i = index[code] = len(self.codes[level])
+            self.codes[level].append(code)
+            self.names[level].append(record[f"{level}_name"])
+            if parent is not None:
+                self.parents[level].append(parent)
+        return i
+
+    def add(self, record) -> int:
+        p = self._add("province", record, None)
+        r = self._add("regency", record, p)
+        return self._add("district", record, r)
+
+    def row_codes(self, level, district_index):
+        """Per-row code of ``level`` for each village's district."""
+        codes = self.codes[level]
+        index = district_index
+        for parent in LEVELS[:LEVELS.index(level)]:
+            parents = self.parents[parent]
+            index = array("I", (parents[i] for i in index))
+        return array("q", (codes[i] for i in index))
+
+    def columns(self):
+        columns = {}
+        for level in LEVELS:
+            columns[f"{level}_codes"] = self.codes[level]
+            columns[f"{level}_names"] = StringTable.build(self.names[level])
+        for level in LEVELS[:-1]:
+            columns[f"{level}_parent"] = self.parents[level]
+        return columns
+
+
+def _permute(column, order):
+    return array(column.typecode, (column[i] for i in order))
+
+
+def _reverse_index(name, keys):
+    """Rows ordered by (key, village_code) plus the keys in that order."""
+    rows = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+    return {
+        f"{name}_keys": array(keys.typecode, (keys[i] for i in rows)),
+        f"{name}_rows": rows,
+    }
+
+# ============================================================
+# BINARY ARTIFACT
+#
+# Layout (little-endian):
+#   magic (8 bytes) | header length (u64) | header JSON | padding
+#   column data, each column 8-byte aligned
+#
+# The header names every column with its array typecode, offset (from
+# the start of column data) and item count, plus the small vocabularies.
+# Columns are mapped directly with memoryview.cast(), so opening the
+# file does no per-record work and its pages are shared through the
+# page cache by every process that maps it.
+# ============================================================
+
+BINARY_MAGIC = b"PCIDBIN1"
+BINARY_ALIGN = 8
+
+
+def _align(n: int) -> int:
+    return (n + BINARY_ALIGN - 1) // BINARY_ALIGN * BINARY_ALIGN
+
+
+def _flat_columns(columns):
+    """Yield (name, typecode, bytes) for every column, sorted by name."""
+    for name in sorted(columns):
+        column = columns[name]
+        if isinstance(column, StringTable):
+            yield f"{name}.offsets", "I", bytes(column.offsets)
+            yield f"{name}.blob", "B", bytes(column.blob)
+        elif isinstance(column, array):
+            yield name, column.typecode, column.tobytes()
+        else:
+            yield name, column.format, bytes(column)
+
+
+def write_columns(path: Path, columns, meta, magic: bytes = BINARY_MAGIC):
+    """
+    Write typed columns and StringTables in the binary layout above.
+    ``meta`` holds JSON-serialisable header entries besides "columns".
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("Binary artifacts are written little-endian only")
+
+    layout = {}
+    chunks = []
+    offset = 0
+    for name, typecode, data in _flat_columns(columns):
+        size = array(typecode).itemsize
+        layout[name] = [typecode, offset, len(data) // size]
+        padded = _align(len(data))
+        chunks.append(data + b"\0" * (padded - len(data)))
+        offset += padded
+
+    header = json.dumps(
+        {"columns": layout, **meta},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = magic + len(header).to_bytes(8, "little") + header
+    prefix += b"\0" * (_align(len(prefix)) - len(prefix))
+
+    with Path(path).open("wb") as f:
+        f.write(prefix)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def read_columns(path, magic: bytes = BINARY_MAGIC):
+    """Memory-map a file written by write_columns(); returns (columns, header)."""
+    if sys.byteorder != "little":
+        raise RuntimeError("Binary artifacts can only be mapped little-endian")
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    if bytes(view[:8]) != magic:
+        raise ValueError(f"Not a postal code binary artifact ({magic!r}): {path}")
+    header_len = int.from_bytes(view[8:16], "little")
+    header = json.loads(bytes(view[16:16 + header_len]))
+    base = _align(16 + header_len)
+
+    flat = {}
+    for name, (typecode, offset, count) in header["columns"].items():
+        start = base + offset
+        size = array(typecode).itemsize
+        flat[name] = view[start:start + count * size].cast(typecode)
+
+    columns = {}
+    for name, column in flat.items():
+        if name.endswith(".offsets"):
+            table = name[:-len(".offsets")]
+            columns[table] = StringTable(flat[f"{table}.blob"], column)
+        elif not name.endswith(".blob"):
+            columns[name] = column
+
+    return columns, header
+
+
+def write_binary(path: Path, index: PostalCodeIndex):
+    """Write ``index`` as a memory-mappable binary artifact."""
+    write_columns(path, index.columns, {"vocab": index.vocab})
+
+
+def open_binary(path) -> PostalCodeIndex:
+    """Memory-map a binary artifact written by write_binary()."""
+    columns, header = read_columns(path)
+    return PostalCodeIndex(columns, header["vocab"])
+
+# ============================================================
+# LOADERS
+# ============================================================
+
+def _csv_records(path: Path):
+    with path.open(newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def load_index(path) -> PostalCodeIndex:
+    """
+    Load a PostalCodeIndex from a built artifact:
+    postal_codes*.json, postal_codes*.csv, the enriched CSV or a
+    binary artifact (*.bin).
+    """
+    path = Path(path)
+    if path.suffix == ".bin":
+        return open_binary(path)
+    if path.suffix == ".json":
+        with path.open(encoding="utf-8") as f:
+            records = json.load(f)
+        return PostalCodeIndex.from_records(records)
+    if path.suffix == ".csv":
+        return PostalCodeIndex.from_records(_csv_records(path))
+    raise ValueError(f"Unsupported artifact type: {path}")
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Look up villages and postal codes in a built artifact"
+    )
+    parser.add_argument("artifact", help="Path to postal_codes*.json, *.csv or *.bin")
+    parser.add_argument("--village", nargs="*", default=[], help="Village codes")
+    parser.add_argument("--postal", nargs="*", default=[], help="Postal codes")
+    parser.add_argument(
+        "--rollup",
+        nargs=2,
+        metavar=("LEVEL", "CODE"),
+        help="District/regency/province summary (enriched artifacts only)",
+    )
+
+    args = parser.parse_args()
+    index = load_index(args.artifact)
+
+    result = {}
+    if args.village:
+        result["villages"] = dict(zip(args.village, index.get_many(args.village)))
+    if args.postal:
+        result["postal_codes"] = dict(
+            zip(args.postal, index.villages_by_postal_code_many(args.postal))
+        )
+    if args.rollup:
+        result["rollup"] = index.rollup(*args.rollup)
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+import csv
+import hashlib
+import pickle
+import re
+import sys
+import tempfile
+import unicodedata
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Parsed tables are cached here, keyed by the sha256 of regions_id.csv
+CACHE_DIR = PROJECT_ROOT / ".cache" / "regions_id"
+
+# Bump when the cached layout changes
+CACHE_FORMAT = 1
+
+# Every column; callers that use fewer pass their own ``required`` set.
+# A column that is neither required nor present loads as "" (names,
+# types) or 0 (codes of an administrative level).
+REQUIRED_COLUMNS = {
+    "village_code",
+    "village_name",
+    "village_type",
+    "district_code",
+    "district_name",
+    "regency_code",
+    "regency_name",
+    "province_code",
+    "province_name",
+}
+VILLAGE_COLUMNS = {"village_code", "village_name", "village_type"}
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg: str):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def normalize_name(value: str) -> str:
+    """'Tanjungbalai  Utara' → 'tanjungbalai utara' (ASCII, lowercase)."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = value.encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", value).split())
+
+
+def encode_code(value: str, column: str) -> int:
+    """
+    Encode an administrative code as an integer.
+    Codes must be plain digits without a leading zero so that the
+    encoding round-trips through str().
+    """
+    if not value.isdigit() or value[0] == "0":
+        die(f"Invalid {column} in regions_id.csv: {value!r}")
+    return int(value)
+
+# ============================================================
+# VILLAGE TABLE
+# ============================================================
+
+class VillageTable:
+    """
+    Column-oriented view of regions_id.csv, sorted by village_code.
+
+    Every village is one row across parallel columns. Districts,
+    regencies and provinces are stored once in their own columns and
+    referenced by index, so their names are never repeated per village.
+    """
+
+    COLUMNS = (
+        "village_codes",
+        "village_names",
+        "village_type_index",
+        "village_district",
+        "village_types",
+        "district_codes",
+        "district_names",
+        "district_regency",
+        "regency_codes",
+        "regency_names",
+        "regency_province",
+        "province_codes",
+        "province_names",
+    )
+
+    __slots__ = COLUMNS
+
+    def __init__(self, *columns):
+        for name, column in zip(self.COLUMNS, columns):
+            setattr(self, name, column)
+
+    def __len__(self):
+        return len(self.village_codes)
+
+    def __contains__(self, village_code):
+        return self.index(village_code) >= 0
+
+    def __reduce__(self):
+        return (VillageTable, tuple(getattr(self, name) for name in self.COLUMNS))
+
+    def index(self, village_code) -> int:
+        """Row index of a village_code (str or int), or -1 if absent."""
+        try:
+            key = int(village_code)
+        except (TypeError, ValueError):
+            return -1
+        codes = self.village_codes
+        i = bisect_left(codes, key)
+        if i < len(codes) and codes[i] == key:
+            return i
+        return -1
+
+    def village_code(self, i: int) -> str:
+        return str(self.village_codes[i])
+
+    def codes(self):
+        """Iterate village codes as strings, in ascending order."""
+        return map(str, self.village_codes)
+
+    def village(self, i: int):
+        """Full administrative record for row ``i``."""
+        d = self.village_district[i]
+        r = self.district_regency[d]
+        p = self.regency_province[r]
+        return {
+            "village_code": str(self.village_codes[i]),
+            "village_name": self.village_names[i],
+            "village_type": self.village_types[self.village_type_index[i]],
+            "district_code": str(self.district_codes[d]),
+            "district_name": self.district_names[d],
+            "regency_code": str(self.regency_codes[r]),
+            "regency_name": self.regency_names[r],
+            "province_code": str(self.province_codes[p]),
+            "province_name": self.province_names[p],
+        }
+
+# ============================================================
+# LOADERS
+# ============================================================
+
+class _Level:
+    """Interning dictionary for one administrative level."""
+
+    def __init__(self):
+        self.index = {}
+        self.codes = array("q")
+        self.names = []
+        self.parents = array("I")
+
+    def add(self, code: int, name: str, parent: int = 0) -> int:
+        i = self.index.get(code)
+        if i is None:
+            i = self.index[code] = len(self.codes)
+            self.codes.append(code)
+            self.names.append(sys.intern(name))
+            self.parents.append(parent)
+        return i
+
+
+def check_columns(header, required):
+    """die() unless ``header`` has every ``required`` column and village_code."""
+    missing = (set(required) | {"village_code"}) - set(header)
+    if missing:
+        die(f"regions_id.csv missing columns: {', '.join(sorted(missing))}")
+
+
+def _read_header(path: Path):
+    with path.open(newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def parse_regions_id(path: Path, required=REQUIRED_COLUMNS) -> VillageTable:
+    """
+    Parse regions_id.csv into a VillageTable.
+    Duplicate village codes resolve to the last occurrence.
+    """
+    provinces = _Level()
+    regencies = _Level()
+    districts = _Level()
+    types = {}
+    rows = {}
+    width = None
+
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        check_columns(header, required)
+        col = {name: header.index(name) for name in REQUIRED_COLUMNS if name in header}
+
+        def cell(row, name):
+            return row[col[name]].strip() if name in col else ""
+
+        def level_code(row, name):
+            return encode_code(cell(row, name), name) if name in col else 0
+
+        for row in reader:
+            code = cell(row, "village_code")
+            if not code:
+                die("Empty village_code in regions_id.csv")
+            if width is None:
+                width = len(code)
+            elif len(code) != width:
+                die(f"Inconsistent village_code width in regions_id.csv: {code!r}")
+
+            p = provinces.add(
+                level_code(row, "province_code"), cell(row, "province_name")
+            )
+            r = regencies.add(
+                level_code(row, "regency_code"), cell(row, "regency_name"), p
+            )
+            d = districts.add(
+                level_code(row, "district_code"), cell(row, "district_name"), r
+            )
+            t = types.setdefault(cell(row, "village_type"), len(types))
+
+            rows[encode_code(code, "village_code")] = (
+                sys.intern(cell(row, "village_name")),
+                t,
+                d,
+            )
+
+    if not rows:
+        die("No villages loaded from regions_id.csv")
+
+    village_codes = array("q", sorted(rows))
+    village_names = []
+    village_type_index = array("B")
+    village_district = array("I")
+    for code in village_codes:
+        name, t, d = rows[code]
+        village_names.append(name)
+        village_type_index.append(t)
+        village_district.append(d)
+
+    return VillageTable(
+        village_codes,
+        village_names,
+        village_type_index,
+        village_district,
+        list(types),
+        districts.codes,
+        districts.names,
+        districts.parents,
+        regencies.codes,
+        regencies.names,
+        regencies.parents,
+        provinces.codes,
+        provinces.names,
+    )
+
+
+def cache_path(digest: str, cache_dir: Path = CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{digest}.v{CACHE_FORMAT}.pickle"
+
+
+def cached_table(digest: str, cache_dir: Path = CACHE_DIR):
+    """Cached VillageTable for a regions_id.csv sha256, or None."""
+    cache_file = cache_path(digest, cache_dir)
+    if not cache_file.exists():
+        return None
+    try:
+        with cache_file.open("rb") as f:
+            table = pickle.load(f)
+    except Exception:
+        return None  # unreadable cache entry
+    return table if isinstance(table, VillageTable) else None
+
+
+def load_regions_id(
+    path: Path, cache_dir: Path = CACHE_DIR, required=REQUIRED_COLUMNS
+) -> VillageTable:
+    """
+    Load regions_id.csv as a VillageTable.
+
+    The parsed table is cached under ``cache_dir`` keyed by the CSV's
+    sha256, so unchanged inputs skip CSV parsing entirely. Pass
+    ``cache_dir=None`` to disable the cache. Only the ``required``
+    columns must be present (see REQUIRED_COLUMNS).
+    """
+    path = Path(path)
+    if not path.exists():
+        die(f"Missing regions_id.csv: {path}")
+
+    if cache_dir is None:
+        return parse_regions_id(path, required)
+
+    # The cached table depends only on the file, not on ``required``
+    check_columns(_read_header(path), required)
+    digest = sha256(path)
+    table = cached_table(digest, cache_dir)
+    if table is not None:
+        return table
+
+    table = parse_regions_id(path, required)
+
+    # A temp file of our own: concurrent builds may fill the same entry
+    cache_file = cache_path(digest, cache_dir)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cache_file.parent, prefix=cache_file.name, suffix=".tmp", delete=False
+    ) as f:
+        pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+    Path(f.name).replace(cache_file)
+
+    return table
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import ssl
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from jsonl_store import JsonlStore
+from regions_id import normalize_name
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+OUTPUT_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl"
+)
+OVERRIDES_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/postal_ingest_name_overrides.csv"
+)
+FAILED_FILE = Path("failed_villages_pos_indonesia.jsonl")
+CHECKPOINT_FILE = Path("reingest_checkpoint.jsonl")
+
+USER_AGENT = "postal-code-id-reingest/1"
+
+# Responses that mean "slow down" rather than "this lookup is wrong"
+THROTTLE_STATUS = {429, 502, 503, 504}
+
+# Transient server failures: retried with backoff like transport errors
+RETRY_STATUS = {500}
+
+# ------------------------------------------------------------
+# Utilities
+# ------------------------------------------------------------
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+class HttpError(Exception):
+    pass
+
+
+async def _readline(reader):
+    try:
+        return await reader.readline()
+    except (asyncio.LimitOverrunError, ValueError):
+        raise HttpError("status, header or chunk line too long")
+
+
+async def http_get(url: str):
+    """
+    Minimal HTTP/1.1 GET over asyncio streams.
+    Returns (status, headers, body).
+    """
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, port, ssl=ssl.create_default_context() if https else None
+    )
+    try:
+        writer.write(
+            (
+                f"GET {target} HTTP/1.1\r\n"
+                f"Host: {parts.netloc}\r\n"
+                f"User-Agent: {USER_AGENT}\r\n"
+                "Accept: application/json\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+        )
+        await writer.drain()
+
+        status_line = await _readline(reader)
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"malformed status line {status_line!r}")
+
+        headers = {}
+        while True:
+            line = await _readline(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                line = await _readline(reader)
+                try:
+                    size = int(line.split(b";")[0], 16)
+                except ValueError:
+                    raise HttpError(f"malformed chunk size {line!r}")
+                if size == 0:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await _readline(reader)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise HttpError(f"malformed content-length {headers['content-length']!r}")
+            body = await reader.readexactly(length)
+        else:
+            body = await reader.read()
+        return status, headers, body
+    finally:
+        writer.close()
+
+# ------------------------------------------------------------
+# Rate and concurrency control
+# ------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Caps the request rate at ``rate``/s with bursts of up to ``burst``.
+    ``pause(seconds)`` holds every caller back, e.g. for a Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            # Work out the wait under the lock but sleep outside it, so
+            # waiters sleep side by side instead of queueing on the lock
+            async with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class AimdLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Every success raises the limit by ``1 / limit`` (about +1 per full
+    window of requests); a throttled or failed request multiplies it by
+    ``decrease``, at most once per ``cooldown`` seconds so a burst of
+    failures from one window only backs off once.
+    """
+
+    def __init__(self, start, minimum, maximum, decrease=0.5, cooldown=1.0):
+        self.limit = float(start)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak = self.limit
+        self.decreased_at = 0.0
+        self.cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, ok: bool):
+        async with self.cond:
+            self.in_flight -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.peak = max(self.peak, self.limit)
+            else:
+                now = time.monotonic()
+                if now - self.decreased_at >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.decreased_at = now
+            self.cond.notify_all()
+
+# ------------------------------------------------------------
+# Loaders
+# ------------------------------------------------------------
+
+def load_failed(paths):
+    """
+    Group failed villages by district.
+    Returns {district_code: job} in district_code order.
+    """
+    jobs = {}
+    for path in paths:
+        if not path.exists():
+            die(f"Missing failed villages JSONL: {path}")
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                v = json.loads(line)
+                job = jobs.setdefault(
+                    v["district_code"],
+                    {
+                        "district_code": v["district_code"],
+                        "district_name": v["district_name"],
+                        "regency_name": v.get("regency_name", ""),
+                        "province_name": v.get("province_name", ""),
+                        "villages": {},
+                    },
+                )
+                job["villages"][v["village_code"]] = v["village_name"]
+    return dict(sorted(jobs.items()))
+
+
+def load_district_aliases(path: Path):
+    """district_code → postal_alias from the overrides table."""
+    if not path.exists():
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {
+            row["code"]: row["postal_alias"]
+            for row in csv.DictReader(f)
+            if row["level"] == "district"
+        }
+
+
+def load_checkpoint(path: Path):
+    """District codes already completed by a previous run."""
+    done = set()
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("status") == "done":
+                        done.add(entry["district_code"])
+    return done
+
+# ------------------------------------------------------------
+# Lookup
+# ------------------------------------------------------------
+
+def district_url(endpoint: str, job, aliases) -> str:
+    query = urlencode(
+        {
+            "district": aliases.get(job["district_code"], job["district_name"]),
+            "regency": job["regency_name"],
+            "province": job["province_name"],
+        }
+    )
+    return f"{endpoint}{'&' if '?' in endpoint else '?'}{query}"
+
+
+def match_villages(job, body: bytes):
+    """
+    Match a district response against the job's failed villages.
+
+    The response is a JSON list of {"village"/"village_name",
+    "postal_code"} objects for every village the lookup knows in that
+    district; villages are matched by normalized name. Names that
+    appear more than once on either side are ambiguous and skipped.
+    A body of any other shape raises ValueError, TypeError or
+    AttributeError.
+    """
+    rows = json.loads(body or b"[]")
+    by_name = {}
+    for row in rows:
+        name = row.get("village_name") or row.get("village") or ""
+        postal_code = str(row.get("postal_code") or "").strip()
+        if name and postal_code:
+            by_name.setdefault(normalize_name(name), set()).add(postal_code)
+
+    wanted = {}
+    for code, name in job["villages"].items():
+        wanted.setdefault(normalize_name(name), []).append(code)
+
+    return {
+        codes[0]: next(iter(by_name[key]))
+        for key, codes in wanted.items()
+        if len(codes) == 1 and len(by_name.get(key, ())) == 1
+    }
+
+
+class Stats:
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.done = 0
+        self.failed = 0
+        self.recovered = 0
+
+
+async def fetch_district(job, url, bucket, limiter, stats, retries, timeout, backoff):
+    """Matched {village_code: postal_code} for one district, or None."""
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        await limiter.acquire()
+        retry_after = None
+        ok = False
+        try:
+            stats.requests += 1
+            status, headers, body = await asyncio.wait_for(http_get(url), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError):
+            stats.errors += 1
+        else:
+            if status == 200:
+                try:
+                    matched = match_villages(job, body)
+                except (ValueError, TypeError, AttributeError) as exc:
+                    # A truncated or non-JSON page (e.g. an HTML error
+                    # page served as 200): retry like a transport error
+                    stats.errors += 1
+                    print(
+                        f"WARNING: district {job['district_code']}: "
+                        f"unreadable response ({type(exc).__name__})",
+                        file=sys.stderr,
+                    )
+                else:
+                    ok = True
+                    return matched
+            elif status in RETRY_STATUS:
+                stats.errors += 1
+            elif status == 404:
+                ok = True
+                return {}
+            elif status not in THROTTLE_STATUS:
+                ok = True
+                print(
+                    f"WARNING: district {job['district_code']}: HTTP {status}",
+                    file=sys.stderr,
+                )
+                return None
+            else:
+                stats.throttled += 1
+                retry_after = headers.get("retry-after")
+        finally:
+            # Whatever escapes, the slot goes back
+            await limiter.release(ok)
+
+        if attempt == retries:
+            break
+        if retry_after and retry_after.isdigit():
+            # The server asked every client to wait, not just this request
+            bucket.pause(float(retry_after))
+        await asyncio.sleep(
+            min(60.0, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        )
+    return None
+
+
+async def run(jobs, args, aliases, store):
+    bucket = TokenBucket(args.rate, args.burst)
+    limiter = AimdLimiter(args.concurrency, args.min_concurrency, args.max_concurrency)
+    stats = Stats()
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    checkpoint = open(args.checkpoint, "a", encoding="utf-8")
+
+    async def worker():
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            url = district_url(args.endpoint, job, aliases)
+            matched = await fetch_district(
+                job, url, bucket, limiter, stats,
+                args.retries, args.timeout, args.backoff,
+            )
+
+            # Results first, then the checkpoint line: a crash in
+            # between re-fetches the district, and later lines win.
+            if matched:
+                store.append(
+                    (
+                        {"village_code": village_code, "postal_code": postal_code}
+                        for village_code, postal_code in sorted(matched.items())
+                    ),
+                    save=False,
+                )
+            checkpoint.write(
+                json.dumps(
+                    {
+                        "district_code": job["district_code"],
+                        "status": "failed" if matched is None else "done",
+                        "villages": len(job["villages"]),
+                        "matched": len(matched or {}),
+                    }
+                )
+                + "\n"
+            )
+            checkpoint.flush()
+
+            if matched is None:
+                stats.failed += 1
+            else:
+                stats.done += 1
+                stats.recovered += len(matched)
+
+    # One worker per possible slot; the limiter decides how many run
+    try:
+        await asyncio.gather(*(worker() for _ in range(args.max_concurrency)))
+    finally:
+        store.save_index()
+        checkpoint.close()
+    return stats, limiter
+
+# ------------------------------------------------------------
+# Main
+# ------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-ingest failed villages from the postal lookup, one request per district"
+    )
+    parser.add_argument(
+        "--endpoint",
+        required=True,
+        help="District lookup URL (queried with district, regency, province)",
+    )
+    parser.add_argument(
+        "--failed",
+        action="append",
+        type=Path,
+        help=f"Failed villages JSONL (repeatable; default: {FAILED_FILE})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OUTPUT_FILE,
+        help="Ingestion JSONL to append results to",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=CHECKPOINT_FILE,
+        help="Progress checkpoint JSONL (completed districts are skipped)",
+    )
+    parser.add_argument(
+        "--overrides",
+        type=Path,
+        default=OVERRIDES_FILE,
+        help="Name overrides CSV (district aliases are used as query names)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=5.0,
+        help="Max requests per second",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=5,
+        help="Token bucket size",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Initial concurrency",
+    )
+    parser.add_argument(
+        "--min-concurrency",
+        type=int,
+        default=1,
+        help="Lower bound for adaptive concurrency",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=32,
+        help="Upper bound for adaptive concurrency",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        help="Retries per district",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=1.0,
+        help="Base backoff in seconds (doubled per retry, with jitter)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Per-request timeout in seconds",
+    )
+
+    args = parser.parse_args()
+    if args.min_concurrency < 1:
+        die("--min-concurrency must be at least 1")
+    if not args.min_concurrency <= args.concurrency <= args.max_concurrency:
+        die("--concurrency must be between --min-concurrency and --max-concurrency")
+
+    jobs = load_failed(args.failed or [FAILED_FILE])
+    total = sum(len(job["villages"]) for job in jobs.values())
+
+    # Villages that gained a postal code since the failed list was made
+    store = JsonlStore(args.output)
+    for job in jobs.values():
+        job["villages"] = {
+            code: name
+            for code, name in job["villages"].items()
+            if not (store.get(code) or {}).get("postal_code")
+        }
+    remaining = sum(len(job["villages"]) for job in jobs.values())
+
+    done = load_checkpoint(args.checkpoint)
+    pending = [
+        job for code, job in jobs.items() if code not in done and job["villages"]
+    ]
+    aliases = load_district_aliases(args.overrides)
+
+    print(f"Failed villages : {total} ({total - remaining} already ingested)")
+    print(f"Districts       : {len(pending)} pending of {len(jobs)}")
+
+    started = time.monotonic()
+    stats, limiter = asyncio.run(run(pending, args, aliases, store))
+    elapsed = time.monotonic() - started
+
+    print("Re-ingestion complete")
+    print(f"- Districts done   : {stats.done}")
+    print(f"- Districts failed : {stats.failed}")
+    print(f"- Villages found   : {stats.recovered}")
+    print(f"- Requests         : {stats.requests} ({stats.throttled} throttled, {stats.errors} errors)")
+    print(f"- Concurrency      : peak {limiter.peak:.1f}, final {limiter.limit:.1f}")
+    print(f"- Elapsed          : {elapsed:.1f}s")
+    print(f"→ {args.output}")
+    print(f"→ {args.checkpoint}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from postal_lookup import IndexBuilder, open_binary, write_binary
+from validate_schema import csv_converters
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+SCHEMA_PATH = Path("schema/postal_code.schema.json")
+
+DELTA_FORMAT = 1
+
+# Columns of a build_sqlite.py postal_codes row that a delta can change
+SQLITE_FIELDS = ("postal_code", "source", "confidence", "year", "status")
+SQLITE_VILLAGE_FIELDS = (
+    "village_name",
+    "village_type",
+    "district_code",
+    "district_name",
+    "regency_code",
+    "regency_name",
+    "province_code",
+    "province_name",
+)
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _open_delta(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+# ============================================================
+# ARTIFACT READERS
+# ============================================================
+
+def artifact_fields(path: Path):
+    """Field names of a CSV/JSON artifact, in file order."""
+    if path.suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+    with path.open(encoding="utf-8") as f:
+        records = json.load(f)
+    return list(records[0]) if records else []
+
+
+def iter_records(path: Path, converters):
+    """
+    Records of a CSV/JSON artifact with JSON types, checking that they
+    are sorted by village_code (the merge relies on it).
+    """
+    if path.suffix == ".csv":
+        f = path.open(newline="", encoding="utf-8")
+        rows = (
+            {k: converters.get(k, str)(v) for k, v in row.items()}
+            for row in csv.DictReader(f)
+        )
+    elif path.suffix == ".json":
+        f = None
+        with path.open(encoding="utf-8") as fh:
+            rows = iter(json.load(fh))
+    else:
+        die(f"Unsupported artifact type: {path}")
+
+    previous = None
+    try:
+        for record in rows:
+            code = record["village_code"]
+            if previous is not None and code <= previous:
+                die(f"{path}: village_code {code} not after {previous}")
+            previous = code
+            yield record
+    finally:
+        if f is not None:
+            f.close()
+
+# ============================================================
+# DIFF
+# ============================================================
+
+def diff_records(old, new):
+    """
+    Sorted merge of two record streams by village_code.
+    Returns (added records, removed codes, changed {village_code, field: new}).
+    """
+    added, removed, changed = [], [], []
+    old = iter(old)
+    new = iter(new)
+    o = next(old, None)
+    n = next(new, None)
+
+    while o is not None or n is not None:
+        if n is None or (o is not None and o["village_code"] < n["village_code"]):
+            removed.append(o["village_code"])
+            o = next(old, None)
+        elif o is None or n["village_code"] < o["village_code"]:
+            added.append(n)
+            n = next(new, None)
+        else:
+            fields = {k: v for k, v in n.items() if o.get(k) != v}
+            if fields:
+                changed.append({"village_code": n["village_code"], **fields})
+            o = next(old, None)
+            n = next(new, None)
+
+    return added, removed, changed
+
+
+def make_delta(old_path: Path, new_path: Path, converters):
+    added, removed, changed = diff_records(
+        iter_records(old_path, converters), iter_records(new_path, converters)
+    )
+    return {
+        "format": DELTA_FORMAT,
+        "from": {"artifact": old_path.name, "sha256": sha256(old_path)},
+        "to": {"artifact": new_path.name, "sha256": sha256(new_path)},
+        "fields": artifact_fields(new_path),
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+    }
+
+# ============================================================
+# APPLY
+# ============================================================
+
+class DeltaConflict(Exception):
+    pass
+
+
+def patch_records(records, delta):
+    """
+    Apply ``delta`` to a sorted record stream, yielding the patched
+    records in village_code order.
+    """
+    removed = set(delta["removed"])
+    changed = {c["village_code"]: c for c in delta["changed"]}
+    added = delta["added"]
+    a = 0
+    seen = 0
+
+    for record in records:
+        code = record["village_code"]
+        while a < len(added) and added[a]["village_code"] < code:
+            yield added[a]
+            a += 1
+        if a < len(added) and added[a]["village_code"] == code:
+            raise DeltaConflict(f"added village {code} already present")
+
+        if code in removed:
+            seen += 1
+            continue
+        if code in changed:
+            seen += 1
+            record = {**record, **changed[code]}
+        yield record
+
+    yield from added[a:]
+
+    if seen != len(removed) + len(changed):
+        raise DeltaConflict("removed/changed villages missing from the target")
+
+
+def apply_text(target: Path, delta, converters):
+    """Rewrite a CSV/JSON artifact (via a temp file, then replace)."""
+    fields = artifact_fields(target) or delta["fields"]
+    writer = CsvArtifact if target.suffix == ".csv" else JsonArrayArtifact
+    with writer(target, fields) as out:
+        for record in patch_records(iter_records(target, converters), delta):
+            out.write(record)
+    return out.count
+
+
+def apply_binary(target: Path, delta):
+    """Rebuild a binary index from its own records plus the delta."""
+    index = open_binary(target)
+    builder = IndexBuilder()
+    records = (index.record(i) for i in range(len(index)))
+    try:
+        for record in patch_records(records, delta):
+            builder.add(record)
+    except KeyError as exc:
+        raise DeltaConflict(f"delta record lacks field {exc} needed by {target}")
+    rebuilt = builder.build()
+    del index, records
+
+    tmp = target.with_name(target.name + ".tmp")
+    write_binary(tmp, rebuilt)
+    tmp.replace(target)
+    return len(rebuilt)
+
+
+def apply_sqlite(target: Path, delta, release: str):
+    """Patch one release of a build_sqlite.py database in one transaction."""
+    conn = sqlite3.connect(target, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+
+        def exists(code):
+            return conn.execute(
+                "SELECT 1 FROM postal_codes WHERE release = ? AND village_code = ?",
+                (release, code),
+            ).fetchone() is not None
+
+        def village(code):
+            return conn.execute(
+                "SELECT district_code, regency_code FROM villages WHERE village_code = ?",
+                (code,),
+            ).fetchone()
+
+        for code in delta["removed"]:
+            if not exists(code):
+                raise DeltaConflict(f"removed village {code} not in release {release}")
+            conn.execute(
+                "DELETE FROM postal_codes WHERE release = ? AND village_code = ?",
+                (release, code),
+            )
+
+        for change in delta["changed"]:
+            code = change["village_code"]
+            if not exists(code):
+                raise DeltaConflict(f"changed village {code} not in release {release}")
+            row = {k: v for k, v in change.items() if k in SQLITE_FIELDS}
+            if row:
+                conn.execute(
+                    f"UPDATE postal_codes SET {', '.join(f'{k} = ?' for k in row)} "
+                    "WHERE release = ? AND village_code = ?",
+                    (*row.values(), release, code),
+                )
+            meta = {k: v for k, v in change.items() if k in SQLITE_VILLAGE_FIELDS}
+            if meta:
+                conn.execute(
+                    f"UPDATE villages SET {', '.join(f'{k} = ?' for k in meta)} "
+                    "WHERE village_code = ?",
+                    (*meta.values(), code),
+                )
+
+        for record in delta["added"]:
+            code = record["village_code"]
+            if exists(code):
+                raise DeltaConflict(f"added village {code} already in release {release}")
+            if village(code) is None:
+                if not all(k in record for k in SQLITE_VILLAGE_FIELDS):
+                    raise DeltaConflict(
+                        f"added village {code} is not in the villages table and "
+                        "the delta has no administrative fields for it"
+                    )
+                conn.execute(
+                    "INSERT INTO villages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (code, *(record[k] for k in SQLITE_VILLAGE_FIELDS)),
+                )
+            district_code, regency_code = village(code)
+            conn.execute(
+                "INSERT INTO postal_codes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    release,
+                    code,
+                    record.get("postal_code"),
+                    record["source"],
+                    float(record["confidence"]),
+                    int(record["year"]),
+                    record["status"],
+                    district_code,
+                    regency_code,
+                ),
+            )
+
+        key = f"{release}_sha256"
+        recorded = conn.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)
+        ).fetchone()
+        if recorded and recorded[0] == delta["from"]["sha256"]:
+            conn.execute(
+                "UPDATE metadata SET value = ? WHERE key = ?",
+                (delta["to"]["sha256"], key),
+            )
+
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    return len(delta["added"]) + len(delta["removed"]) + len(delta["changed"])
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def load_schema(path: Path):
+    if not path.exists():
+        die(f"Missing schema file: {path}")
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cmd_diff(args):
+    old_path, new_path, output = Path(args.old), Path(args.new), Path(args.output)
+    for path in (old_path, new_path):
+        if not path.exists():
+            die(f"Missing artifact: {path}")
+
+    converters = csv_converters(load_schema(Path(args.schema)))
+    delta = make_delta(old_path, new_path, converters)
+
+    with _open_delta(output, "w") as f:
+        json.dump(delta, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+    print("Delta complete")
+    print(f"- From    : {old_path} sha256:{delta['from']['sha256']}")
+    print(f"- To      : {new_path} sha256:{delta['to']['sha256']}")
+    print(f"- Added   : {len(delta['added'])}")
+    print(f"- Removed : {len(delta['removed'])}")
+    print(f"- Changed : {len(delta['changed'])}")
+    print(f"- Delta   : {output} ({output.stat().st_size} bytes)")
+
+
+def cmd_apply(args):
+    delta_path, target = Path(args.delta), Path(args.target)
+    for path in (delta_path, target):
+        if not path.exists():
+            die(f"Missing file: {path}")
+
+    with _open_delta(delta_path, "r") as f:
+        delta = json.load(f)
+    if delta.get("format") != DELTA_FORMAT:
+        die(f"Unsupported delta format: {delta.get('format')}")
+
+    text = target.suffix in (".csv", ".json")
+    if text:
+        before = sha256(target)
+        if before != delta["from"]["sha256"] and not args.force:
+            die(
+                f"{target} is not the delta's base artifact "
+                f"({delta['from']['artifact']}); use --force to apply anyway"
+            )
+
+    try:
+        if text:
+            converters = csv_converters(load_schema(Path(args.schema)))
+            count = apply_text(target, delta, converters)
+        elif target.suffix == ".bin":
+            count = apply_binary(target, delta)
+        elif target.suffix in (".sqlite", ".db"):
+            count = apply_sqlite(target, delta, args.release)
+        else:
+            die(f"Unsupported target: {target}")
+    except DeltaConflict as exc:
+        die(f"{target}: delta does not apply: {exc}")
+
+    print("Delta applied")
+    print(f"- Target  : {target}")
+    print(f"- Records : {count}")
+    print(f"- sha256  : {sha256(target)}")
+    if text and before == delta["from"]["sha256"]:
+        if sha256(target) != delta["to"]["sha256"]:
+            die(f"{target} does not match {delta['to']['artifact']} after applying")
+        print(f"- Matches : {delta['to']['artifact']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff two release artifacts and apply the delta to older copies"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    diff = sub.add_parser("diff", help="Write the delta between two artifacts")
+    diff.add_argument("old", help="Older postal_codes*.csv / .json")
+    diff.add_argument("new", help="Newer artifact of the same kind")
+    diff.add_argument(
+        "--output",
+        default="postal_codes.delta.json.gz",
+        help="Delta output (.json or .json.gz)",
+    )
+    diff.add_argument(
+        "--schema",
+        default=str(SCHEMA_PATH),
+        help="Schema used to type CSV values",
+    )
+    diff.set_defaults(run=cmd_diff)
+
+    apply = sub.add_parser("apply", help="Patch an artifact in place")
+    apply.add_argument("delta", help="Delta written by `diff`")
+    apply.add_argument("target", help="Artifact to patch: .csv, .json, .bin or .sqlite")
+    apply.add_argument(
+        "--release",
+        default="derived",
+        help="postal_codes.release to patch in a SQLite target",
+    )
+    apply.add_argument(
+        "--schema",
+        default=str(SCHEMA_PATH),
+        help="Schema used to type CSV values",
+    )
+    apply.add_argument(
+        "--force",
+        action="store_true",
+        help="Apply to a CSV/JSON target that is not the delta's base",
+    )
+    apply.set_defaults(run=cmd_apply)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from release_delta import artifact_fields, iter_records, load_schema
+from validate_schema import csv_converters
+
+# ============================================================
+# MULTI-RELEASE HISTORY STORE
+#
+# Every vYYYYQn release of one artifact kind lives in a single SQLite
+# database. Each distinct record (all fields, village_code included) is
+# stored once in `records`, keyed by the sha256 of its canonical JSON.
+# A release does not list its records; instead `spans` says which
+# record a village had from one release (first_seq) up to another
+# (last_seq, NULL while still current):
+#
+#   village 3201010001: record 17 for seq 1-3, record 912 from seq 4 on
+#
+# Adding a release only touches villages whose record changed: their
+# open span is closed and a new one opened (reusing the record if the
+# village returns to an earlier state). Unchanged villages cost nothing,
+# so the store grows with the amount of change, not with the number of
+# releases.
+#
+# Queries are index seeks:
+#   - a village as of a release: the span on (village_code, first_seq)
+#     covering the release's seq
+#   - changed between A and B: only villages with a span starting or
+#     ending between the two releases can differ
+# Exported releases are byte-identical to the artifacts they came from;
+# the sha256 of each is recorded to check that.
+# ============================================================
+
+STORE_FILE = Path("postal_codes_history.sqlite")
+SCHEMA_PATH = Path("schema/postal_code.schema.json")
+
+STORE_FORMAT = 1
+
+RELEASE_RE = re.compile(r"v\d{4}Q[1-4]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS releases (
+    seq      INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL UNIQUE,
+    artifact TEXT NOT NULL,
+    sha256   TEXT NOT NULL,
+    fields   TEXT NOT NULL,
+    records  INTEGER NOT NULL,
+    changed  INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS records (
+    id           INTEGER PRIMARY KEY,
+    digest       BLOB NOT NULL UNIQUE,
+    village_code TEXT NOT NULL,
+    postal_code  TEXT,
+    status       TEXT,
+    body         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS spans (
+    village_code TEXT NOT NULL,
+    first_seq    INTEGER NOT NULL REFERENCES releases (seq),
+    last_seq     INTEGER REFERENCES releases (seq),
+    record_id    INTEGER NOT NULL REFERENCES records (id),
+    PRIMARY KEY (village_code, first_seq)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_spans_first_seq ON spans (first_seq);
+CREATE INDEX IF NOT EXISTS idx_spans_last_seq ON spans (last_seq);
+"""
+
+# The span of a village that covers release :seq
+AS_OF = """
+SELECT r.body FROM spans s JOIN records r ON r.id = s.record_id
+WHERE s.village_code = :code AND s.first_seq <= :seq
+  AND (s.last_seq IS NULL OR s.last_seq >= :seq)
+ORDER BY s.first_seq DESC LIMIT 1
+"""
+
+RELEASE_RECORDS = """
+SELECT r.body FROM spans s JOIN records r ON r.id = s.record_id
+WHERE s.first_seq <= :seq AND (s.last_seq IS NULL OR s.last_seq >= :seq)
+ORDER BY s.village_code
+"""
+
+# Villages whose span changes between :lo and :hi, with their record at
+# each end (NULL where absent)
+CHANGED = """
+WITH candidates AS (
+    SELECT village_code FROM spans WHERE first_seq > :lo AND first_seq <= :hi
+    UNION
+    SELECT village_code FROM spans WHERE last_seq >= :lo AND last_seq < :hi
+)
+SELECT c.village_code, ra.postal_code, ra.status, rb.postal_code, rb.status
+FROM candidates c
+LEFT JOIN spans sa ON sa.village_code = c.village_code
+    AND sa.first_seq <= :a AND (sa.last_seq IS NULL OR sa.last_seq >= :a)
+LEFT JOIN records ra ON ra.id = sa.record_id
+LEFT JOIN spans sb ON sb.village_code = c.village_code
+    AND sb.first_seq <= :b AND (sb.last_seq IS NULL OR sb.last_seq >= :b)
+LEFT JOIN records rb ON rb.id = sb.record_id
+WHERE ra.postal_code IS NOT rb.postal_code OR (sa.record_id IS NULL) != (sb.record_id IS NULL)
+ORDER BY c.village_code
+"""
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def canonical(record) -> str:
+    """Record as compact JSON, in artifact field order."""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+# ============================================================
+# STORE
+# ============================================================
+
+class HistoryError(Exception):
+    pass
+
+
+class ReleaseHistory:
+    """
+    Usage:
+      with ReleaseHistory(path) as history:
+          history.add("v2025Q1", Path("postal_codes.csv"), converters)
+          history.as_of("3201010001", "v2025Q1")     # record dict or None
+          history.changed("v2025Q1", "v2025Q2")       # [(code, old, new)]
+          history.export("v2025Q1", Path("out.csv"))
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+        row = self.conn.execute(
+            "SELECT value FROM metadata WHERE key = 'store_format'"
+        ).fetchone()
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO metadata VALUES ('store_format', ?)", (str(STORE_FORMAT),)
+            )
+        elif row[0] != str(STORE_FORMAT):
+            self.conn.close()
+            raise HistoryError(f"{self.path}: unsupported store format {row[0]}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- releases ----------------
+
+    def releases(self):
+        """(seq, name, artifact, sha256, records, changed) in release order."""
+        return self.conn.execute(
+            "SELECT seq, name, artifact, sha256, records, changed FROM releases ORDER BY seq"
+        ).fetchall()
+
+    def seq(self, name) -> int:
+        row = self.conn.execute("SELECT seq FROM releases WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise HistoryError(f"Unknown release: {name}")
+        return row[0]
+
+    def latest(self):
+        row = self.conn.execute(
+            "SELECT seq, name FROM releases ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+        return row or (0, None)
+
+    def add(self, name, artifact: Path, converters):
+        """
+        Append release ``name`` from a CSV/JSON artifact. Only villages
+        whose record differs from the latest release are written.
+        Returns the number of villages that changed.
+        """
+        if not RELEASE_RE.fullmatch(name):
+            raise HistoryError(f"Release name must look like v2025Q1, not {name!r}")
+        previous_seq, previous_name = self.latest()
+        if previous_name is not None and name <= previous_name:
+            raise HistoryError(f"Release {name} is not after the latest, {previous_name}")
+        seq = previous_seq + 1
+
+        conn = self.conn
+        current = dict(
+            conn.execute(
+                "SELECT s.village_code, r.digest FROM spans s "
+                "JOIN records r ON r.id = s.record_id WHERE s.last_seq IS NULL"
+            )
+        )
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                "INSERT INTO releases VALUES (?, ?, ?, ?, ?, 0, 0)",
+                (seq, name, artifact.name, sha256(artifact), json.dumps(artifact_fields(artifact))),
+            )
+            count = changed = 0
+            for record in iter_records(artifact, converters):
+                count += 1
+                code = record["village_code"]
+                body = canonical(record)
+                digest = hashlib.sha256(body.encode("utf-8")).digest()
+                if current.pop(code, None) == digest:
+                    continue
+                changed += 1
+                conn.execute(
+                    "UPDATE spans SET last_seq = ? WHERE village_code = ? AND last_seq IS NULL",
+                    (previous_seq, code),
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO records (digest, village_code, postal_code, status, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, code, record.get("postal_code"), record.get("status"), body),
+                )
+                conn.execute(
+                    "INSERT INTO spans SELECT ?, ?, NULL, id FROM records WHERE digest = ?",
+                    (code, seq, digest),
+                )
+
+            # Villages missing from this release end with the previous one
+            conn.executemany(
+                "UPDATE spans SET last_seq = ? WHERE village_code = ? AND last_seq IS NULL",
+                ((previous_seq, code) for code in current),
+            )
+            changed += len(current)
+            conn.execute(
+                "UPDATE releases SET records = ?, changed = ? WHERE seq = ?",
+                (count, changed, seq),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return changed
+
+    # ---------------- queries ----------------
+
+    def as_of(self, village_code, release):
+        """The village's record in ``release``, or None if it had none."""
+        row = self.conn.execute(
+            AS_OF, {"code": str(village_code), "seq": self.seq(release)}
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def changed(self, a, b):
+        """
+        Villages whose postal code differs between releases ``a`` and
+        ``b``, or that are in only one of them, as (village_code,
+        (postal_code, status) in a, (postal_code, status) in b); a side
+        is None where the village is absent.
+        """
+        seq_a, seq_b = self.seq(a), self.seq(b)
+        rows = self.conn.execute(
+            CHANGED,
+            {"a": seq_a, "b": seq_b, "lo": min(seq_a, seq_b), "hi": max(seq_a, seq_b)},
+        )
+        return [
+            (code, None if sa is None else (pa, sa), None if sb is None else (pb, sb))
+            for code, pa, sa, pb, sb in rows
+        ]
+
+    def records(self, release):
+        """Records of ``release`` in village_code order."""
+        for (body,) in self.conn.execute(RELEASE_RECORDS, {"seq": self.seq(release)}):
+            yield json.loads(body)
+
+    def export(self, release, output: Path):
+        """Write ``release`` as a CSV/JSON artifact; returns (records, sha256 matches)."""
+        seq = self.seq(release)
+        fields, recorded = self.conn.execute(
+            "SELECT fields, sha256 FROM releases WHERE seq = ?", (seq,)
+        ).fetchone()
+        writer = CsvArtifact if output.suffix == ".csv" else JsonArrayArtifact
+        with writer(output, json.loads(fields)) as out:
+            for record in self.records(release):
+                out.write(record)
+        return out.count, sha256(output) == recorded
+
+    def size(self):
+        """(distinct records, spans) stored across all releases."""
+        return tuple(
+            self.conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("records", "spans")
+        )
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def cmd_add(history, args):
+    artifact = Path(args.artifact)
+    if not artifact.exists():
+        die(f"Missing artifact: {artifact}")
+    if artifact.suffix not in (".csv", ".json"):
+        die(f"Unsupported artifact type: {artifact}")
+    converters = csv_converters(load_schema(Path(args.schema)))
+    changed = history.add(args.release, artifact, converters)
+    records, spans = history.size()
+
+    print(f"Release added: {args.release}")
+    print(f"- Artifact : {artifact} sha256:{sha256(artifact)}")
+    print(f"- Changed  : {changed} villages")
+    print(f"- Stored   : {records} records, {spans} spans in {history.path}")
+
+
+def cmd_releases(history, args):
+    records, spans = history.size()
+    for seq, name, artifact, digest, count, changed in history.releases():
+        print(f"{name}  {count:>7} records  {changed:>7} changed  {artifact} sha256:{digest}")
+    print(f"Stored: {records} records, {spans} spans")
+
+
+def cmd_get(history, args):
+    release = args.release or history.latest()[1]
+    if release is None:
+        die("History store has no releases")
+    record = history.as_of(args.village_code, release)
+    if record is None:
+        die(f"Village {args.village_code} is not in release {release}")
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+
+
+def cmd_changed(history, args):
+    rows = history.changed(args.a, args.b)
+    for code, old, new in rows:
+        old = "-" if old is None else f"{old[0] or 'null'} {old[1]}"
+        new = "-" if new is None else f"{new[0] or 'null'} {new[1]}"
+        print(f"{code}  {old} → {new}")
+    print(f"{len(rows)} villages changed postal code between {args.a} and {args.b}")
+
+
+def cmd_export(history, args):
+    output = Path(args.output)
+    count, matches = history.export(args.release, output)
+    print(f"Release exported: {args.release}")
+    print(f"- Output  : {output} sha256:{sha256(output)}")
+    print(f"- Records : {count}")
+    if not matches:
+        die(f"{output} does not match the artifact added as {args.release}")
+    print("- Matches : artifact added to the store")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Versioned store of all vYYYYQn releases with point-in-time queries"
+    )
+    parser.add_argument(
+        "--store",
+        default=str(STORE_FILE),
+        help="History store (SQLite)",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Append a release to the store")
+    add.add_argument("release", help="Release name, e.g. v2025Q1")
+    add.add_argument("artifact", help="postal_codes*.csv / .json of the release")
+    add.add_argument(
+        "--schema",
+        default=str(SCHEMA_PATH),
+        help="Schema used to type CSV values",
+    )
+    add.set_defaults(run=cmd_add)
+
+    releases = sub.add_parser("releases", help="List stored releases")
+    releases.set_defaults(run=cmd_releases)
+
+    get = sub.add_parser("get", help="A village's record as of a release")
+    get.add_argument("village_code", help="region-id village_code")
+    get.add_argument(
+        "--release",
+        help="Release name (default: latest)",
+    )
+    get.set_defaults(run=cmd_get)
+
+    changed = sub.add_parser("changed", help="Villages whose postal code changed between two releases")
+    changed.add_argument("a", help="Older release")
+    changed.add_argument("b", help="Newer release")
+    changed.set_defaults(run=cmd_changed)
+
+    export = sub.add_parser("export", help="Write a stored release back out as an artifact")
+    export.add_argument("release", help="Release name")
+    export.add_argument("output", help="Output .csv or .json")
+    export.set_defaults(run=cmd_export)
+
+    args = parser.parse_args()
+    if args.command != "add" and not Path(args.store).exists():
+        die(f"Missing history store: {args.store}")
+
+    try:
+        with ReleaseHistory(Path(args.store)) as history:
+            args.run(history, args)
+    except HistoryError as exc:
+        die(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import hashlib
+import json
+import shutil
+import sys
+import urllib.request
+from bisect import bisect_right
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+from postal_lookup import IndexBuilder, open_binary, write_binary
+
+# ============================================================
+# PROVINCE SHARDS
+#
+# Next to the national artifacts a build can write one CSV / JSON /
+# binary shard per province_code (from regions_id.csv), plus a
+# manifest listing every shard's record count, village_code range and
+# per-file size and sha256. Records arrive in village_code order and
+# the province is the code's leading digits, so each province is one
+# contiguous run and shards are written one at a time.
+#
+# ShardedIndex reads only the manifest up front. A shard is fetched
+# (from a directory or an http(s) base URL), checked against its sha256
+# and memory-mapped the first time a lookup needs it, and only the
+# provinces a deployment asks for can be loaded at all.
+# ============================================================
+
+SHARD_MANIFEST = "manifest.json"
+FORMAT = 1
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = PROJECT_ROOT / ".cache" / "shards"
+
+# ============================================================
+# UTILITIES
+# ============================================================
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_url(location: str) -> bool:
+    return urlsplit(str(location)).scheme in ("http", "https")
+
+# ============================================================
+# WRITER
+# ============================================================
+
+class ShardWriter:
+    """
+    Splits a village_code-ordered stream of enriched records into
+    per-province shards under ``directory``.
+
+    Usage:
+      with ShardWriter(directory, "postal_codes_x", CORE_FIELDS) as shards:
+          for record in records:
+              shards.write(record)
+    """
+
+    def __init__(self, directory: Path, stem: str, fields):
+        self.directory = Path(directory)
+        self.stem = stem
+        self.fields = list(fields)
+        self.manifest_path = self.directory / SHARD_MANIFEST
+        self.shards = []
+        self._province = None
+        self._stack = None
+        self._files = None
+        self._last_code = None
+
+    def __enter__(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            if self._stack is not None:
+                self._stack.close()
+            return
+        self._close()
+        self._write_manifest()
+
+    def _paths(self, province):
+        base = f"{self.stem}_{province}"
+        return {
+            "csv": self.directory / f"{base}.csv",
+            "json": self.directory / f"{base}.json",
+            "bin": self.directory / f"{base}.bin",
+        }
+
+    def _open(self, record):
+        province = record["province_code"]
+        if any(s["province_code"] == province for s in self.shards):
+            raise ValueError(f"Records of province {province} are not contiguous")
+        self._province = province
+        self._files = self._paths(province)
+        self._stack = contextlib.ExitStack()
+        self._csv = self._stack.enter_context(
+            CsvArtifact(self._files["csv"], self.fields)
+        )
+        self._json = self._stack.enter_context(
+            JsonArrayArtifact(self._files["json"], self.fields)
+        )
+        self._index = IndexBuilder()
+        self._entry = {
+            "province_code": province,
+            "province_name": record["province_name"],
+            "first_village_code": record["village_code"],
+        }
+
+    def _close(self):
+        if self._stack is None:
+            return
+        self._stack.close()
+        write_binary(self._files["bin"], self._index.build())
+        self._entry["last_village_code"] = self._last_code
+        self._entry["records"] = self._csv.count
+        self._entry["files"] = {
+            kind: {
+                "path": path.name,
+                "bytes": path.stat().st_size,
+                "sha256": sha256(path),
+            }
+            for kind, path in self._files.items()
+        }
+        self.shards.append(self._entry)
+        self._stack = None
+
+    def write(self, record, fragments=None):
+        """
+        Add one record. ``fragments`` are its (csv, json) bytes over
+        ``fields`` when already serialised, e.g. by a parallel build.
+        """
+        if record["province_code"] != self._province:
+            self._close()
+            self._open(record)
+        if fragments is None:
+            self._csv.write(record)
+            self._json.write(record)
+        else:
+            self._csv.write_fragment(record["village_code"], fragments[0])
+            self._json.write_fragment(record["village_code"], fragments[1])
+        self._index.add(record)
+        self._last_code = record["village_code"]
+
+    def _write_manifest(self):
+        manifest = {
+            "format": FORMAT,
+            "stem": self.stem,
+            "fields": self.fields,
+            "records": sum(s["records"] for s in self.shards),
+            "shards": self.shards,
+        }
+        tmp = self.manifest_path.with_name(SHARD_MANIFEST + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        tmp.replace(self.manifest_path)
+
+        # Drop shards of provinces that no longer have records
+        current = {
+            f["path"] for s in self.shards for f in s["files"].values()
+        }
+        for path in self.directory.glob(f"{self.stem}_*"):
+            if path.suffix in (".csv", ".json", ".bin") and path.name not in current:
+                path.unlink()
+
+# ============================================================
+# LAZY LOADER
+# ============================================================
+
+class ShardedIndex:
+    """
+    Lookups over the province shards listed in a shard manifest.
+
+    Usage:
+      index = ShardedIndex("shards/pos_indonesia/manifest.json", provinces=["32"])
+      index.get("3201010001")     # maps shard 32 on first use
+    """
+
+    def __init__(self, manifest, provinces=None, cache_dir: Path = CACHE_DIR, verify=True):
+        self.location = str(manifest)
+        self.cache_dir = Path(cache_dir)
+        self.verify = verify
+
+        if _is_url(self.location):
+            with urllib.request.urlopen(self.location) as response:
+                data = json.load(response)
+        else:
+            with open(self.location, encoding="utf-8") as f:
+                data = json.load(f)
+        if data.get("format") != FORMAT:
+            raise ValueError(f"Unsupported shard manifest format: {data.get('format')}")
+
+        self.manifest = data
+        self.shards = {s["province_code"]: s for s in data["shards"]}
+        self.allowed = set(self.shards) if provinces is None else {str(p) for p in provinces}
+        unknown = self.allowed - set(self.shards)
+        if unknown:
+            raise KeyError(f"No shard for province(s): {', '.join(sorted(unknown))}")
+
+        # Routing table: shards ordered by their first village_code
+        ordered = sorted(data["shards"], key=lambda s: int(s["first_village_code"]))
+        self._firsts = [int(s["first_village_code"]) for s in ordered]
+        self._order = [s["province_code"] for s in ordered]
+        self._loaded = {}
+
+    # ---------------- shard access ----------------
+
+    def _fetch(self, file):
+        """Local path of a shard file, downloaded and checked as needed."""
+        name = file["path"]
+        if _is_url(self.location):
+            path = self.cache_dir / f"{file['sha256'][:16]}-{name}"
+            if not path.exists():
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                with urllib.request.urlopen(urljoin(self.location, name)) as response:
+                    with tmp.open("wb") as f:
+                        shutil.copyfileobj(response, f)
+                if sha256(tmp) != file["sha256"]:
+                    tmp.unlink()
+                    raise ValueError(f"sha256 mismatch for downloaded shard {name}")
+                tmp.replace(path)
+            return path
+
+        path = Path(self.location).parent / name
+        if self.verify and sha256(path) != file["sha256"]:
+            raise ValueError(f"sha256 mismatch for shard {path}")
+        return path
+
+    def shard(self, province_code):
+        """PostalCodeIndex of one province, loaded on first access."""
+        province_code = str(province_code)
+        index = self._loaded.get(province_code)
+        if index is None:
+            if province_code not in self.allowed:
+                raise KeyError(f"Province {province_code} is not loaded by this index")
+            index = open_binary(self._fetch(self.shards[province_code]["files"]["bin"]))
+            self._loaded[province_code] = index
+        return index
+
+    def loaded(self):
+        """Province codes whose shards are mapped so far."""
+        return sorted(self._loaded)
+
+    def province_of(self, village_code):
+        """Province code of the shard whose code range covers ``village_code``, or None."""
+        try:
+            code = int(village_code)
+        except (TypeError, ValueError):
+            return None
+        i = bisect_right(self._firsts, code) - 1
+        if i < 0:
+            return None
+        province = self._order[i]
+        if code > int(self.shards[province]["last_village_code"]):
+            return None
+        return province
+
+    # ---------------- lookups ----------------
+
+    def get(self, village_code):
+        """Record for ``village_code``, or None."""
+        province = self.province_of(village_code)
+        if province is None:
+            return None
+        return self.shard(province).get(village_code)
+
+    def postal_code(self, village_code):
+        province = self.province_of(village_code)
+        if province is None:
+            return None
+        return self.shard(province).postal_code(village_code)
+
+    def villages_by_postal_code(self, postal_code):
+        """Records sharing ``postal_code`` in every allowed province."""
+        found = []
+        for province in sorted(self.allowed):
+            found.extend(self.shard(province).villages_by_postal_code(postal_code))
+        return found
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Look up villages in province shards, loading only the shards needed"
+    )
+    parser.add_argument(
+        "manifest",
+        help="Shard manifest.json (path or http(s) URL)",
+    )
+    parser.add_argument(
+        "--province",
+        action="append",
+        help="Province code this deployment serves (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--village",
+        nargs="*",
+        default=[],
+        help="Village codes",
+    )
+    parser.add_argument(
+        "--postal",
+        nargs="*",
+        default=[],
+        help="Postal codes",
+    )
+
+    args = parser.parse_args()
+    try:
+        index = ShardedIndex(args.manifest, provinces=args.province)
+        result = {
+            "villages": {code: index.get(code) for code in args.village},
+            "postal_codes": {
+                code: index.villages_by_postal_code(code) for code in args.postal
+            },
+        }
+    except (KeyError, ValueError) as exc:
+        die(exc.args[0])
+    result["loaded_shards"] = index.loaded()
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
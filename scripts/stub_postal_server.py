@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from regions_id import load_regions_id, normalize_name
+
+# ------------------------------------------------------------
+# Stub district lookup
+#
+# Local stand-in for the postal lookup used by reingest.py. Answers
+# GET /?district=..&regency=..&province=.. with a JSON list of
+# {"village_name", "postal_code"} for that district, taken from a
+# village_postal_codes.jsonl. Can inject latency, errors and 429s.
+# ------------------------------------------------------------
+
+def load_districts(regions_path: Path, postal_path: Path):
+    """(district, regency) normalized names → response rows."""
+    postal = {}
+    with open(postal_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                obj = json.loads(line)
+                postal[obj["village_code"]] = obj["postal_code"]
+
+    regions = load_regions_id(regions_path)
+    districts = {}
+    for i, code in enumerate(regions.codes()):
+        if code not in postal:
+            continue
+        v = regions.village(i)
+        key = (normalize_name(v["district_name"]), normalize_name(v["regency_name"]))
+        districts.setdefault(key, []).append(
+            {"village_name": v["village_name"], "postal_code": postal[code]}
+        )
+    return districts
+
+
+class StubServer:
+    def __init__(self, districts, capacity, latency, error_rate):
+        self.districts = districts
+        self.capacity = capacity
+        self.latency = latency
+        self.error_rate = error_rate
+        self.window = []
+        self.served = 0
+        self.rejected = 0
+
+    def over_capacity(self) -> bool:
+        """Already ``capacity`` requests admitted in the last second."""
+        now = time.monotonic()
+        self.window = [t for t in self.window if now - t < 1.0]
+        if self.capacity > 0 and len(self.window) >= self.capacity:
+            return True
+        self.window.append(now)
+        return False
+
+    async def handle(self, reader, writer):
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+
+        target = request_line.split()[1].decode("ascii") if request_line else "/"
+        query = {k: v[0] for k, v in parse_qs(urlsplit(target).query).items()}
+
+        if self.over_capacity():
+            self.rejected += 1
+            status, body, extra = 429, b"[]", "Retry-After: 1\r\n"
+        elif random.random() < self.error_rate:
+            status, body, extra = 503, b"[]", ""
+        else:
+            await asyncio.sleep(self.latency)
+            key = (
+                normalize_name(query.get("district", "")),
+                normalize_name(query.get("regency", "")),
+            )
+            rows = self.districts.get(key)
+            status = 200 if rows is not None else 404
+            body = json.dumps(rows or [], ensure_ascii=False).encode("utf-8")
+            extra = ""
+            self.served += 1
+
+        writer.write(
+            (
+                f"HTTP/1.1 {status} STUB\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"{extra}"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+
+async def serve(args):
+    stub = StubServer(
+        load_districts(Path(args.regions), Path(args.postal)),
+        args.capacity,
+        args.latency,
+        args.error_rate,
+    )
+    server = await asyncio.start_server(stub.handle, args.host, args.port)
+    print(f"Stub postal lookup on http://{args.host}:{args.port}/")
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            print(f"- Served   : {stub.served}")
+            print(f"- Rejected : {stub.rejected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stub of the district postal lookup, for testing reingest.py"
+    )
+    parser.add_argument(
+        "--regions",
+        default="regions_id.csv",
+        help="Path to regions_id.csv",
+    )
+    parser.add_argument(
+        "--postal",
+        required=True,
+        help="village_postal_codes.jsonl holding the answers",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Listen address",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Listen port",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=20,
+        help="Requests per second before answering 429 (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Seconds per answered request",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 503",
+    )
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import heapq
+import json
+import sys
+from collections import Counter
+from itertools import chain
+from pathlib import Path
+
+from regions_id import normalize_name
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+OVERRIDES_FILE = Path(
+    "data/sources/kodepos-posindonesia-co-id/postal_ingest_name_overrides.csv"
+)
+FAILED_FILE = Path("failed_villages_pos_indonesia.jsonl")
+
+# Overrides are district rows only: the lookup is queried per district
+# (reingest.py), so a district alias is the only name it can use.
+OVERRIDE_FIELDS = ["level", "code", "canonical_name", "postal_alias", "match_mode"]
+
+# Suggestions file: the overrides columns, then the candidate's rank for
+# its district (1 = best) and its similarity. Candidates of a district
+# are consecutive, best first. A reviewer keeps at most one row per
+# district and drops rank and score before appending it to the
+# overrides file (the loader keeps the last row of a district).
+SUGGESTION_FIELDS = OVERRIDE_FIELDS + ["rank", "score"]
+
+# ------------------------------------------------------------
+# Utilities
+# ------------------------------------------------------------
+
+def die(msg):
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def trigrams(name: str):
+    """Distinct character trigrams of a normalized name, padded at both ends."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ------------------------------------------------------------
+# Trigram index
+# ------------------------------------------------------------
+
+class TrigramIndex:
+    """
+    Inverted index from character trigram to alias ids.
+
+    A query only touches the postings of its own trigrams, so ranking
+    one name costs O(postings hit) instead of a scan of every alias.
+    Similarity is the Dice coefficient over trigram sets.
+    """
+
+    def __init__(self, names):
+        self.names = []
+        self.sizes = []
+        self.postings = {}
+        seen = {}
+        for name in names:
+            key = normalize_name(name)
+            if not key or key in seen:
+                continue
+            seen[key] = len(self.names)
+            grams = trigrams(key)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(len(self.names))
+            self.names.append(name.strip())
+            self.sizes.append(len(grams))
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, name: str, limit: int = 5, min_score: float = 0.0):
+        """Top ``limit`` (score, alias) pairs for ``name``, best first."""
+        grams = trigrams(normalize_name(name))
+        if not grams:
+            return []
+        shared = Counter(
+            chain.from_iterable(
+                self.postings[g] for g in grams if g in self.postings
+            )
+        )
+        size = len(grams)
+        scored = (
+            (2 * hits / (size + self.sizes[i]), i) for i, hits in shared.items()
+        )
+        best = heapq.nlargest(
+            limit,
+            (s for s in scored if s[0] >= min_score),
+            key=lambda s: (s[0], -s[1]),
+        )
+        return [(round(score, 4), self.names[i]) for score, i in best]
+
+# ------------------------------------------------------------
+# Loaders
+# ------------------------------------------------------------
+
+def load_overrides(path: Path):
+    if not path.exists():
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def load_failed(path: Path):
+    if not path.exists():
+        die(f"Missing failed villages JSONL: {path}")
+    failed = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                failed.append(json.loads(line))
+    return failed
+
+
+def load_vocabulary(path: Path):
+    """
+    Alias names known to the postal lookup, one per CSV row / JSONL
+    object (``name`` or ``postal_alias`` field) or plain text line.
+    """
+    if not path.exists():
+        die(f"Missing vocabulary file: {path}")
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            rows = csv.DictReader(f)
+            return [r.get("name") or r.get("postal_alias") or "" for r in rows]
+        if path.suffix == ".jsonl":
+            rows = (json.loads(line) for line in f if line.strip())
+            return [r.get("name") or r.get("postal_alias") or "" for r in rows]
+        return [line.strip() for line in f]
+
+# ------------------------------------------------------------
+# Suggestions
+# ------------------------------------------------------------
+
+def failed_names(failed, overridden):
+    """
+    Unique (code, name) of the districts of failed villages, skipping
+    districts that already have an override.
+    """
+    names = {}
+    for v in failed:
+        code = str(v.get("district_code") or "")
+        name = v.get("district_name") or ""
+        if code and name and code not in overridden:
+            names.setdefault(code, name)
+    return sorted(names.items())
+
+
+def suggest(index, targets, match_mode, limit, min_score):
+    """Up to ``limit`` ranked alias rows per failed district, best first."""
+    # Many districts share a name; rank each name once
+    ranked = {}
+    for code, name in targets:
+        key = normalize_name(name)
+        if key not in ranked:
+            ranked[key] = index.search(name, limit, min_score)
+        for rank, (score, alias) in enumerate(ranked[key], 1):
+            yield {
+                "level": "district",
+                "code": code,
+                "canonical_name": name,
+                "postal_alias": alias,
+                "match_mode": match_mode,
+                "rank": rank,
+                "score": score,
+            }
+
+# ------------------------------------------------------------
+# Main
+# ------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Suggest district postal_alias overrides for failed Pos Indonesia villages"
+    )
+    parser.add_argument(
+        "--failed",
+        default=str(FAILED_FILE),
+        help="Failed villages JSONL (from coverage_pos_indonesia.py)",
+    )
+    parser.add_argument(
+        "--vocabulary",
+        action="append",
+        default=[],
+        help="Pos lookup alias vocabulary file (.csv / .jsonl / .txt, repeatable)",
+    )
+    parser.add_argument(
+        "--overrides",
+        default=str(OVERRIDES_FILE),
+        help="Existing overrides CSV (its aliases join the vocabulary)",
+    )
+    parser.add_argument(
+        "--output",
+        default="postal_ingest_name_overrides.suggested.csv",
+        help="Ranked suggestions CSV for review (overrides columns + rank, score)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=3,
+        help="Candidates per failed district",
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=0.3,
+        help="Minimum trigram similarity (0–1)",
+    )
+    parser.add_argument(
+        "--match-mode",
+        default="district_village",
+        help="match_mode written on suggested rows",
+    )
+
+    args = parser.parse_args()
+
+    overrides = load_overrides(Path(args.overrides))
+    vocabulary = [row["postal_alias"] for row in overrides]
+    for path in args.vocabulary:
+        vocabulary.extend(load_vocabulary(Path(path)))
+
+    index = TrigramIndex(vocabulary)
+    if not len(index):
+        die("Empty alias vocabulary (pass --vocabulary)")
+
+    overridden = {row["code"] for row in overrides if row["level"] == "district"}
+    targets = failed_names(load_failed(Path(args.failed)), overridden)
+
+    resolved = set()
+    written = 0
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUGGESTION_FIELDS)
+        writer.writeheader()
+        for row in suggest(index, targets, args.match_mode, args.limit, args.min_score):
+            writer.writerow(row)
+            resolved.add(row["code"])
+            written += 1
+
+    print("Override suggestions")
+    print(f"- Alias vocabulary : {len(index)}")
+    print(f"- Failed districts : {len(targets)}")
+    print(f"- With candidates  : {len(resolved)}")
+    print(f"- Suggested rows   : {written}")
+    print(f"→ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,459 @@
 #!/usr/bin/env python3
 
+import argparse
+import csv
+import io
 import json
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from jsonschema import Draft202012Validator
+
+from byte_ranges import read_range, split_ranges
 
 
 SCHEMA_PATH = Path("schema/postal_code.schema.json")
 DATA_PATH = Path("postal_codes.json")
+REPORT_PATH = Path("validation_report.json")
+
+# Ranges are only farmed out to worker processes above this size
+PARALLEL_MIN_BYTES = 4 << 20
+
+# Examples kept per rule in the report
+MAX_EXAMPLES = 10
+
+# Keywords the compiled validator understands; anything else falls back
+# to jsonschema's Draft202012Validator
+COMPILED_KEYWORDS = {
+    "$schema",
+    "$id",
+    "title",
+    "description",
+    "type",
+    "required",
+    "properties",
+    "additionalProperties",
+    "enum",
+    "pattern",
+    "minimum",
+    "maximum",
+}
+
+# Layout written by artifact_writers.JsonArrayArtifact: one record per
+# "\n  {" so the array can be split without a full parse
+JSON_RECORD_BOUNDARY = b"\n  {"
 
 
 def die(msg):
     print(f"SCHEMA VALIDATION FAILED: {msg}", file=sys.stderr)
     sys.exit(1)
 
+# ============================================================
+# COMPILED VALIDATOR
+# ============================================================
+
+class UnsupportedSchema(Exception):
+    pass
+
+
+_TYPE_TESTS = {
+    "string": "type({v}) is str",
+    "null": "{v} is None",
+    "boolean": "type({v}) is bool",
+    "integer": "(type({v}) is int or (type({v}) is float and {v}.is_integer()))",
+    "number": "type({v}) in (int, float)",
+    "object": "type({v}) is dict",
+    "array": "type({v}) is list",
+}
+
+
+def _error(rule, var, suffix):
+    """Generated line appending one (rule, message) error."""
+    return f"    errors.append(({rule!r}, repr({var}) + {suffix!r}))"
+
+
+def compile_schema(schema):
+    """
+    Compile a flat record schema into a straight-line Python function
+    ``check(record) -> [(rule, message), ...]``.
+    Raises UnsupportedSchema for keywords outside COMPILED_KEYWORDS.
+    """
+    def supported(node, where):
+        unknown = set(node) - COMPILED_KEYWORDS
+        if unknown:
+            raise UnsupportedSchema(f"{where}: {', '.join(sorted(unknown))}")
+
+    supported(schema, "root")
+    if schema.get("type") != "object":
+        raise UnsupportedSchema("root: type must be object")
+
+    properties = schema.get("properties", {})
+    env = {"MISSING": object(), "PROPERTIES": frozenset(properties)}
+    lines = [
+        "def check(record):",
+        "    if type(record) is not dict:",
+        "        return [('type', 'record is not an object')]",
+        "    errors = []",
+    ]
+
+    for name in schema.get("required", []):
+        lines += [
+            f"    if {name!r} not in record:",
+            f"        errors.append(('required', {name + ' is required'!r}))",
+        ]
+
+    if schema.get("additionalProperties") is False:
+        lines += [
+            "    for key in record:",
+            "        if key not in PROPERTIES:",
+            "            errors.append(('additionalProperties', 'unexpected property ' + repr(key)))",
+        ]
+    elif "additionalProperties" in schema and schema["additionalProperties"] is not True:
+        raise UnsupportedSchema("root: additionalProperties must be a boolean")
+
+    for n, (name, prop) in enumerate(properties.items()):
+        supported(prop, name)
+        v = f"v{n}"
+        lines.append(f"    {v} = record.get({name!r}, MISSING)")
+        lines.append(f"    if {v} is not MISSING:")
+        body = []
+
+        types = prop.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            if any(t not in _TYPE_TESTS for t in types):
+                raise UnsupportedSchema(f"{name}: type {types}")
+            test = " or ".join(_TYPE_TESTS[t].format(v=v) for t in types)
+            body += [
+                f"if not ({test}):",
+                _error(name + ".type", v, " is not of type " + "/".join(types)),
+            ]
+
+        if "enum" in prop:
+            env[f"ENUM{n}"] = prop["enum"]
+            body += [
+                f"if {v} not in ENUM{n}:",
+                _error(name + ".enum", v, f" is not one of {prop['enum']}"),
+            ]
+
+        if "pattern" in prop:
+            env[f"RE{n}"] = re.compile(prop["pattern"])
+            body += [
+                f"if type({v}) is str and not RE{n}.search({v}):",
+                _error(name + ".pattern", v, f" does not match {prop['pattern']}"),
+            ]
+
+        for keyword, op in (("minimum", "<"), ("maximum", ">")):
+            if keyword in prop:
+                env[f"{keyword.upper()}{n}"] = prop[keyword]
+                body += [
+                    f"if type({v}) in (int, float) and {v} {op} {keyword.upper()}{n}:",
+                    _error(f"{name}.{keyword}", v, f" violates {keyword} {prop[keyword]}"),
+                ]
+
+        lines += ["        " + line for line in body] or ["        pass"]
+
+    lines.append("    return errors")
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, "<compiled postal_code schema>", "exec"), env)
+    return env["check"]
+
+
+def fallback_validator(schema):
+    """jsonschema-backed check with the same return shape."""
+    from jsonschema import Draft202012Validator
+
+    validator = Draft202012Validator(schema)
+
+    def check(record):
+        errors = []
+        for err in validator.iter_errors(record):
+            path = ".".join(str(p) for p in err.absolute_path)
+            rule = f"{path}.{err.validator}" if path else err.validator
+            errors.append((rule, err.message))
+        return errors
+
+    return check
+
+
+def build_checker(schema):
+    try:
+        return compile_schema(schema)
+    except UnsupportedSchema:
+        return fallback_validator(schema)
+
+# ============================================================
+# RECORD SOURCES
+# ============================================================
+
+def csv_converters(schema):
+    """Per-column converters from CSV text to the schema's JSON types."""
+    converters = {}
+    for name, prop in schema.get("properties", {}).items():
+        types = prop.get("type", [])
+        types = [types] if isinstance(types, str) else types
+        converters[name] = _csv_converter(types)
+    return converters
+
+
+def _csv_converter(types):
+    def convert(value):
+        if value == "" and "null" in types:
+            return None
+        if "integer" in types:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        if "number" in types:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        return value
+
+    return convert
+
+
+def parse_json_chunk(data: bytes):
+    """Records in one range of a JSON array artifact."""
+    text = data.decode("utf-8").strip()
+    if text.startswith("["):
+        text = text[1:]
+    text = text.strip()
+    if text.endswith("]"):
+        text = text[:-1]
+    text = text.strip().rstrip(",")
+    return json.loads(f"[{text}]") if text else []
+
+
+def parse_csv_chunk(data: bytes, header, converters):
+    """Records in one range of a CSV artifact (header excluded)."""
+    records = []
+    # newline="" keeps quoted line breaks inside their field, and only
+    # \r / \n end a row (str.splitlines() also splits on \x0b, \x85, ...)
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+        if len(row) != len(header):
+            records.append({"__row__": row})
+            continue
+        records.append(
+            {
+                name: converters[name](value)
+                for name, value in zip(header, row)
+                if name in converters
+            }
+        )
+    return records
+
+# ============================================================
+# WORKER
+# ============================================================
+
+_worker = {}
+
+
+def _init_worker(schema):
+    _worker["schema"] = schema
+    _worker["check"] = build_checker(schema)
+    _worker["converters"] = csv_converters(schema)
+
+
+def check_range(task):
+    """
+    Validate one byte range. Returns (count, first_code, last_code,
+    errors) where errors are (local_index, village_code, rule, message).
+    """
+    path, kind, start, end, header = task
+    data = read_range(path, start, end)
+    if kind == "json":
+        records = parse_json_chunk(data)
+    else:
+        records = parse_csv_chunk(data, header, _worker["converters"])
+
+    check = _worker["check"]
+    errors = []
+    previous = None
+    for idx, record in enumerate(records):
+        if "__row__" in record:
+            errors.append((idx, None, "csv.columns", f"expected {len(header)} columns"))
+            continue
+        code = record.get("village_code")
+        for rule, message in check(record):
+            errors.append((idx, code, rule, message))
+        if isinstance(code, str):
+            if previous is not None and code <= previous:
+                errors.append((idx, code, "village_code.order", f"{code} not after {previous}"))
+            previous = code
+
+    codes = [r.get("village_code") for r in records if "__row__" not in r]
+    first = codes[0] if codes else None
+    last = codes[-1] if codes else None
+    return len(records), first, last, errors
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+def _whole_csv_rows(path: Path, ranges):
+    """
+    Merge ranges that end inside a quoted field (a line break in a
+    value), found by an odd count of quote characters so far; escaped
+    quotes are doubled and do not change the parity.
+    """
+    merged = []
+    quotes = 0
+    for start, end in ranges:
+        quotes += read_range(path, start, end).count(b'"')
+        if merged and merged[-1][2]:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end, False])
+        merged[-1][2] = quotes % 2 == 1
+    return [(start, end) for start, end, _ in merged]
+
+
+def plan_tasks(path: Path, workers: int):
+    """Split an artifact into (path, kind, start, end, header) tasks."""
+    size = path.stat().st_size
+    parts = workers * 4 if size >= PARALLEL_MIN_BYTES else 1
+
+    if path.suffix == ".csv":
+        with path.open("rb") as f:
+            first_line = f.readline()
+        header = next(csv.reader([first_line.decode("utf-8")]), [])
+        ranges = split_ranges(path, parts, b"\n", start=len(first_line))
+        ranges = _whole_csv_rows(path, ranges)
+        return [(str(path), "csv", s, e, header) for s, e in ranges], header
+
+    if path.suffix == ".json":
+        with path.open("rb") as f:
+            head = f.read(len(JSON_RECORD_BOUNDARY) + 1)
+        if not head.lstrip().startswith(b"["):
+            die(f"{path} must be an array of records")
+        if head.startswith(b"[" + JSON_RECORD_BOUNDARY) or head.strip() == b"[]":
+            ranges = split_ranges(path, parts, JSON_RECORD_BOUNDARY, skip=3)
+        else:
+            ranges = [(0, size)]  # not the artifact layout: parse whole
+        return [(str(path), "json", s, e, None) for s, e in ranges], None
+
+    die(f"Unsupported artifact type: {path}")
+
+
+def validate_artifact(path: Path, schema, workers: int):
+    """Validate one artifact; returns its report section."""
+    tasks, header = plan_tasks(path, workers)
+    if header is not None:
+        unchecked = [c for c in header if c not in schema.get("properties", {})]
+    else:
+        unchecked = []
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(schema,)
+        ) as pool:
+            results = list(pool.map(check_range, tasks))
+    else:
+        _init_worker(schema)
+        results = [check_range(task) for task in tasks]
+
+    rules = {}
+    offset = 0
+    previous_last = None
+
+    def add(idx, code, rule, message):
+        entry = rules.setdefault(rule, {"count": 0, "examples": []})
+        entry["count"] += 1
+        if len(entry["examples"]) < MAX_EXAMPLES:
+            entry["examples"].append(
+                {"record": idx, "village_code": code, "message": message}
+            )
+
+    for count, first, last, errors in results:
+        for idx, code, rule, message in errors:
+            add(offset + idx, code, rule, message)
+        if isinstance(first, str) and previous_last is not None and first <= previous_last:
+            add(offset, first, "village_code.order", f"{first} not after {previous_last}")
+        if isinstance(last, str):
+            previous_last = last
+        offset += count
+
+    return {
+        "path": str(path),
+        "records": offset,
+        "errors": sum(r["count"] for r in rules.values()),
+        "rules": dict(sorted(rules.items())),
+        "unchecked_columns": unchecked,
+    }
+
 
 def main():
-    if not SCHEMA_PATH.exists():
-        die(f"Missing schema file: {SCHEMA_PATH}")
+    parser = argparse.ArgumentParser(
+        description="Validate JSON/CSV artifacts against the postal code schema"
+    )
+    parser.add_argument(
+        "artifacts",
+        nargs="*",
+        default=[str(DATA_PATH)],
+        help="postal_codes*.json / *.csv artifacts (default: postal_codes.json)",
+    )
+    parser.add_argument("--schema", default=str(SCHEMA_PATH), help="Record schema")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes",
+    )
+    parser.add_argument(
+        "--report",
+        default=str(REPORT_PATH),
+        help="Full error report output (JSON)",
+    )
 
-    if not DATA_PATH.exists():
-        die(f"Missing data file: {DATA_PATH}")
+    args = parser.parse_args()
 
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+    schema_path = Path(args.schema)
+    if not schema_path.exists():
+        die(f"Missing schema file: {schema_path}")
+
+    with open(schema_path, "r", encoding="utf-8") as f:
         record_schema = json.load(f)
 
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    sections = []
+    for artifact in map(Path, args.artifacts):
+        if not artifact.exists():
+            die(f"Missing data file: {artifact}")
+        try:
+            sections.append(validate_artifact(artifact, record_schema, args.workers))
+        except ValueError as exc:
+            die(f"{artifact}: {exc}")
 
-    if not isinstance(data, list):
-        die("postal_codes.json must be an array of records")
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"schema": str(schema_path), "artifacts": sections}, f, ensure_ascii=False, indent=2)
 
-    validator = Draft202012Validator(record_schema)
+    failed = False
+    for section in sections:
+        if not section["errors"]:
+            continue
+        if not failed:
+            print("Schema violations found:", file=sys.stderr)
+        failed = True
+        print(f"- {section['path']}: {section['errors']} errors", file=sys.stderr)
+        for rule, entry in section["rules"].items():
+            example = entry["examples"][0]
+            print(
+                f"  {rule}: {entry['count']} "
+                f"(e.g. record #{example['record']} ({example['village_code']}): {example['message']})",
+                file=sys.stderr,
+            )
 
-    error_count = 0
-    for idx, record in enumerate(data):
-        for err in validator.iter_errors(record):
-            if error_count == 0:
-                print("Schema violations found:", file=sys.stderr)
-            print(f"- Record #{idx} ({record.get('village_code')}): {err.message}", file=sys.stderr)
-            error_count += 1
-            if error_count >= 10:
-                print("... more errors omitted", file=sys.stderr)
-                sys.exit(1)
-
-    if error_count > 0:
+    if failed:
+        print(f"Full report: {args.report}", file=sys.stderr)
         sys.exit(1)
 
     print("Schema validation passed ✔")
-    print(f"- Records validated: {len(data)}")
+    for section in sections:
+        print(f"- Records validated: {section['records']} ({section['path']})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+
+import csv
+import io
+import re
+from array import array
+from json.encoder import encode_basestring
+from pathlib import Path
+
+import numpy as np
+
+from batch_validate import INVALID, encode_codes
+from postal_lookup import LEVELS, NO_POSTAL_CODE, PostalCodeIndex, StringTable
+
+# ============================================================
+# VECTORIZED BUILD ENGINE
+#
+# Village codes are int64 and postal codes uint32 columns end to end.
+# A source is a sorted, de-duplicated pair of columns; joining it onto
+# region-id is one searchsorted over the VillageTable village_code
+# column. Every village gets a tier (OFFICIAL, AUGMENTED, ...) assigned
+# with masks, highest precedence last, and source / status / year are
+# gathered from the tier. Confidence is per tier or per village.
+#
+# Python objects are only created when a chunk of rows is serialised:
+# every distinct value of a low-cardinality field is encoded once per
+# chunk and rows are formatted from a template. Fragments are byte-for-
+# byte what CsvArtifact / JsonArrayArtifact serialise for the same
+# records, and index() builds the same PostalCodeIndex as IndexBuilder.
+# ============================================================
+
+UNASSIGNED = ("UNASSIGNED", "NONE")
+
+# Rows serialised per batch
+CHUNK_ROWS = 1 << 14
+
+# A value VillageTable codes can never take: no digits at all
+NO_DIGITS = -2
+
+# Text csv.writer (QUOTE_MINIMAL) writes unquoted: no delimiter, quote or
+# line break, no surrounding whitespace. Anything else goes through
+# csv.writer itself.
+_csv_plain = re.compile(r'(?!\s)[^,"\r\n]+(?<!\s)').fullmatch
+
+# ============================================================
+# ENCODING
+# ============================================================
+
+def normalize_codes(values) -> np.ndarray:
+    """
+    Vectorized normalize_kemendagri_code() + integer encoding: the
+    digits of every value (separators dropped) as int64. NO_DIGITS for
+    values without digits, INVALID where the digits cannot be a
+    region-id village_code (leading zero, more than 18 digits).
+    """
+    values = np.asarray(values, dtype=str)
+    if values.size == 0:
+        return np.zeros(values.shape, dtype=np.int64)
+    width = values.dtype.itemsize // 4
+    chars = values.view(np.uint32).reshape(-1, width)
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    lengths = is_digit.sum(axis=1)
+
+    out = np.zeros(len(chars), dtype=np.int64)
+    for j in range(width):
+        digit = chars[:, j].astype(np.int64) - ord("0")
+        out = np.where(is_digit[:, j], out * 10 + digit, out)
+
+    first = chars[np.arange(len(chars)), is_digit.argmax(axis=1)]
+    out[(lengths > 18) | (first == ord("0"))] = INVALID
+    out[lengths == 0] = NO_DIGITS
+    return out.reshape(values.shape)
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+class Source:
+    """
+    village_code → postal_code as two columns sorted by village_code.
+
+    ``postal`` is INVALID where the source value is not a 5-digit postal
+    code (``bad`` keeps the raw value); ``unmatchable`` counts distinct
+    codes that cannot occur in region-id.
+    """
+
+    def __init__(self, codes, postal, bad=None, unmatchable=0):
+        self.codes = codes
+        self.postal = postal
+        self.bad = bad or {}
+        self.unmatchable = unmatchable
+        self.rejected = []  # source rows skipped by the reader
+
+    def __len__(self):
+        return len(self.codes) + self.unmatchable
+
+    def items(self, chunk=1 << 16):
+        """
+        (village_code, postal_code) string pairs in village_code order,
+        decoded a chunk at a time rather than materialised.
+        """
+        for start in range(0, len(self.codes), chunk):
+            codes = self.codes[start:start + chunk].tolist()
+            postal = self.postal[start:start + chunk].tolist()
+            for code, value in zip(codes, postal):
+                if value == INVALID:
+                    yield str(code), self.bad[code]
+                else:
+                    yield str(code), f"{value:05d}"
+
+    @classmethod
+    def from_columns(cls, codes, postal_text, unmatchable=0):
+        """
+        Build from parallel columns in input order; a code listed more
+        than once keeps its last postal code, as with dict assignment.
+        """
+        postal = encode_codes(postal_text, digits=5)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        last = np.ones(len(codes), dtype=bool)
+        last[:-1] = codes[1:] != codes[:-1]
+        order = order[last]
+        codes = codes[last]
+        postal = postal[order]
+
+        bad_rows = np.flatnonzero(postal == INVALID)
+        bad = {
+            int(codes[i]): str(postal_text[order[i]]) for i in bad_rows.tolist()
+        }
+        return cls(codes, postal, bad, unmatchable)
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Build from a village_code → postal_code dict (str keys and values)."""
+        if not mapping:
+            return cls(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        codes = encode_codes(np.array(list(mapping)))
+        postal = np.array(list(mapping.values()))
+        valid = codes != INVALID
+        return cls.from_columns(
+            codes[valid], postal[valid], unmatchable=int((~valid).sum())
+        )
+
+
+def read_opendata_jabar(path: Path) -> Source:
+    """
+    OpenData Jabar CSV as a Source, with load_opendata_jabar() semantics:
+    codes are normalised, empty and "0" postal codes are skipped, and
+    rows with any other non-5-digit postal code are skipped and listed
+    in ``rejected`` as (where, village_code, postal_code).
+    """
+    with Path(path).open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        required = ("kemendagri_kode_desa_kelurahan", "kode_pos")
+        missing = [c for c in required if c not in header]
+        if missing:
+            raise ValueError(
+                f"OpenData Jabar CSV missing columns: {', '.join(sorted(missing))}"
+            )
+        code_col, postal_col = (header.index(c) for c in required)
+        raw_codes = []
+        raw_postal = []
+        lines = array("Q")
+        for row in reader:
+            raw_codes.append(row[code_col] if code_col < len(row) else "")
+            raw_postal.append(row[postal_col] if postal_col < len(row) else "")
+            lines.append(reader.line_num)
+
+    codes = normalize_codes(raw_codes)
+    postal = np.char.strip(np.asarray(raw_postal, dtype=str))
+    keep = (codes != NO_DIGITS) & (postal != "") & (postal != "0")
+
+    bad_postal = keep & (encode_codes(postal, digits=5) == INVALID)
+    rejected = [
+        (f"line {lines[i]}", re.sub(r"\D", "", raw_codes[i]), str(postal[i]))
+        for i in np.flatnonzero(bad_postal).tolist()
+    ]
+    keep &= ~bad_postal
+
+    invalid = keep & (codes == INVALID)
+    unmatchable = len({re.sub(r"\D", "", raw_codes[i]) for i in np.flatnonzero(invalid)})
+    keep &= ~invalid
+    source = Source.from_columns(codes[keep], postal[keep], unmatchable)
+    source.rejected = rejected
+    return source
+
+# ============================================================
+# JOIN
+# ============================================================
+
+class Tier:
+    """
+    Records taken from one source, with the attributes they get.
+    ``confidence`` is a number, or an array with one value per
+    VillageTable row.
+    """
+
+    def __init__(self, source: Source, status, source_name, confidence, year):
+        self.source = source
+        self.status = status
+        self.source_name = source_name
+        self.confidence = confidence
+        self.year = year
+
+
+def lookup(sorted_codes, keys):
+    """(hit mask over ``keys``, position of each hit in ``sorted_codes``)."""
+    if not len(sorted_codes):
+        return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.int64)
+    pos = np.searchsorted(sorted_codes, keys)
+    pos[pos == len(sorted_codes)] = 0
+    return sorted_codes[pos] == keys, pos
+
+
+def join(villages, tiers, year, keep_unassigned=True):
+    """
+    Release over every VillageTable row (or only matched rows, without
+    ``keep_unassigned``). Earlier tiers take precedence.
+    """
+    codes = np.frombuffer(villages.village_codes, dtype=np.int64)
+    unassigned = len(tiers)
+    tier = np.full(len(codes), unassigned, dtype=np.uint8)
+    postal = np.full(len(codes), NO_POSTAL_CODE, dtype=np.int64)
+    confidence = np.zeros(len(codes), dtype=np.float64)
+    unmatched = []
+
+    for t in reversed(range(len(tiers))):
+        source = tiers[t].source
+        hit, pos = lookup(source.codes, codes)
+        tier[hit] = t
+        postal[hit] = source.postal[pos[hit]]
+        confidence[hit] = np.broadcast_to(tiers[t].confidence, len(codes))[hit]
+        unmatched.insert(0, len(source) - int(hit.sum()))
+
+    rows = np.arange(len(codes)) if keep_unassigned else np.flatnonzero(tier != unassigned)
+    tier = tier[rows]
+    postal = postal[rows]
+    confidence = confidence[rows]
+
+    bad = np.flatnonzero(postal == INVALID)
+    if len(bad):
+        code = int(codes[rows[bad[0]]])
+        raise ValueError(f"Invalid postal_code: {tiers[tier[bad[0]]].source.bad[code]!r}")
+
+    counts = np.bincount(tier, minlength=unassigned + 1)
+    return Release(
+        villages,
+        rows,
+        postal.astype(np.uint32),
+        tier,
+        confidence,
+        [(t.status, t.source_name, t.year) for t in tiers] + [UNASSIGNED + (year,)],
+        matched=[int(n) for n in counts[:unassigned]],
+        unassigned=int(counts[unassigned]),
+        unmatched=unmatched,
+    )
+
+# ============================================================
+# RELEASE
+# ============================================================
+
+def _categories(values, encode):
+    """Encode a low-cardinality column: each distinct value once."""
+    uniq, inverse = np.unique(values, return_inverse=True)
+    encoded = np.array([encode(u) for u in uniq.tolist()], dtype=object)
+    return encoded[inverse].tolist()
+
+
+def _csv_text(value: str) -> str:
+    if _csv_plain(value):
+        return value
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([value, ""])
+    return buffer.getvalue()[:-3]  # drop ",\r\n"
+
+
+def _to_array(typecode, values) -> array:
+    column = array(typecode)
+    column.frombytes(np.ascontiguousarray(values, dtype=np.dtype(typecode)).tobytes())
+    return column
+
+
+def _first_seen(values):
+    """Distinct ``values`` in order of first appearance, and each value's rank."""
+    uniq, first = np.unique(values, return_index=True)
+    ordered = uniq[np.argsort(first)]
+    rank = np.zeros(int(uniq[-1]) + 1 if len(uniq) else 0, dtype=np.int64)
+    rank[ordered] = np.arange(len(ordered))
+    return ordered, rank
+
+
+class Release:
+    """
+    Columns of one built release, one row per output record:
+      rows        VillageTable row of each record
+      postal      uint32 postal code (NO_POSTAL_CODE when unassigned)
+      tier        index into ``attributes``: (status, source, year)
+      confidence  float64 confidence of each record
+    """
+
+    def __init__(
+        self, villages, rows, postal, tier, confidence, attributes, matched, unassigned, unmatched
+    ):
+        self.villages = villages
+        self.rows = rows
+        self.postal = postal
+        self.tier = tier
+        self.confidence = confidence
+        self.attributes = attributes
+        self.matched = matched
+        self.unassigned = unassigned
+        self.unmatched = unmatched
+
+        self.codes = np.frombuffer(villages.village_codes, dtype=np.int64)[rows]
+        self.district = np.frombuffer(villages.village_district, dtype=np.uint32)[rows]
+        self.regency = np.frombuffer(villages.district_regency, dtype=np.uint32)[self.district]
+        self.province = np.frombuffer(villages.regency_province, dtype=np.uint32)[self.regency]
+        self.year = np.array([a[2] for a in attributes], dtype=np.uint16)[tier]
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ---------------- serialisation ----------------
+
+    def _field(self, field, chunk, kind):
+        """Encoded values of ``field`` for the rows in slice ``chunk``."""
+        v = self.villages
+        text = _csv_text if kind == "csv" else encode_basestring
+        if field == "postal_code":
+            missing = "" if kind == "csv" else "null"
+            return _categories(
+                self.postal[chunk],
+                lambda p: missing if p == NO_POSTAL_CODE else text(f"{p:05d}"),
+            )
+        if field == "village_code":
+            # Digit strings: never quoted in CSV, never escaped in JSON
+            codes = self.codes[chunk].astype(str)
+            if kind == "json":
+                codes = np.char.add(np.char.add('"', codes), '"')
+            return codes.tolist()
+        if field == "village_name":
+            names = v.village_names
+            if kind == "json":
+                return [text(names[i]) for i in self.rows[chunk].tolist()]
+            plain = _csv_plain
+            return [
+                name if plain(name) else text(name)
+                for name in map(names.__getitem__, self.rows[chunk].tolist())
+            ]
+        if field == "village_type":
+            types = np.frombuffer(v.village_type_index, dtype=np.uint8)[self.rows[chunk]]
+            return _categories(types, lambda t: text(v.village_types[t]))
+        if field in ("status", "source"):
+            k = 0 if field == "status" else 1
+            return _categories(self.tier[chunk], lambda t: text(self.attributes[t][k]))
+        if field in ("confidence", "year"):
+            return _categories(getattr(self, field)[chunk], repr)
+
+        level, _, part = field.partition("_")
+        if level in LEVELS and part in ("code", "name"):
+            areas = getattr(self, level)[chunk]
+            values = getattr(v, f"{level}_{part}s")
+            return _categories(areas, lambda a: text(str(values[a])))
+        raise KeyError(f"Unknown field: {field}")
+
+    def chunks(self):
+        """Row slices to serialise one at a time."""
+        for start in range(0, len(self), CHUNK_ROWS):
+            yield slice(start, start + CHUNK_ROWS)
+
+    def fragments(self, fields, kind, chunk=slice(None)):
+        """
+        Records of the rows in ``chunk``, each serialised as
+        CsvArtifact(fields) or JsonArrayArtifact(fields) would.
+        """
+        if kind == "csv":
+            template = ",".join(["%s"] * len(fields)) + "\r\n"
+        elif kind == "json":
+            template = "{\n    " + ",\n    ".join(
+                f"{encode_basestring(f)}: %s" for f in fields
+            ) + "\n  }"
+        else:
+            raise ValueError(f"Unknown fragment kind: {kind}")
+
+        columns = [self._field(f, chunk, kind) for f in fields]
+        return [(template % values).encode("utf-8") for values in zip(*columns)]
+
+    # ---------------- binary index ----------------
+
+    def index(self, enriched=True) -> PostalCodeIndex:
+        """The PostalCodeIndex IndexBuilder builds from this release's records."""
+        v = self.villages
+        n = len(self)
+        types = np.frombuffer(v.village_type_index, dtype=np.uint8)[self.rows]
+        type_order, type_rank = _first_seen(types)
+        tier_order, tier_rank = _first_seen(self.tier)
+        statuses = [self.attributes[t][0] for t in tier_order.tolist()]
+        sources = [self.attributes[t][1] for t in tier_order.tolist()]
+        status_order = list(dict.fromkeys(statuses))
+        source_order = list(dict.fromkeys(sources))
+        status_index = np.array([status_order.index(s) for s in statuses], dtype=np.uint8)
+        source_index = np.array([source_order.index(s) for s in sources], dtype=np.uint8)
+
+        columns = {
+            "village_codes": _to_array("q", self.codes),
+            "postal_codes": _to_array("I", self.postal),
+            "confidence": _to_array("d", self.confidence),
+            "year": _to_array("H", self.year),
+            "type_index": _to_array("B", type_rank[types]),
+            "source_index": _to_array("B", source_index[tier_rank[self.tier]] if n else []),
+            "status_index": _to_array("B", status_index[tier_rank[self.tier]] if n else []),
+            "village_names": StringTable.build(v.village_names[i] for i in self.rows.tolist()),
+        }
+        columns.update(self._reverse_index("postal", self.postal, "I"))
+
+        if enriched:
+            order = {}
+            rank = {}
+            for level in LEVELS:
+                order[level], rank[level] = _first_seen(getattr(self, level))
+            columns["district_index"] = _to_array("I", rank["district"][self.district])
+            parents = {
+                "district": np.frombuffer(v.district_regency, dtype=np.uint32),
+                "regency": np.frombuffer(v.regency_province, dtype=np.uint32),
+            }
+            for i, level in enumerate(LEVELS):
+                areas = order[level]
+                codes = np.asarray(getattr(v, f"{level}_codes"), dtype=np.int64)
+                names = getattr(v, f"{level}_names")
+                columns[f"{level}_codes"] = _to_array("q", codes[areas])
+                columns[f"{level}_names"] = StringTable.build(names[a] for a in areas.tolist())
+                if level in parents:
+                    parent = LEVELS[i + 1]
+                    columns[f"{level}_parent"] = _to_array(
+                        "I", rank[parent][parents[level][areas]]
+                    )
+                columns.update(
+                    self._reverse_index(level, codes[getattr(self, level)], "q")
+                )
+
+        vocab = {
+            "village_type": [v.village_types[t] for t in type_order.tolist()],
+            "source": source_order,
+            "status": status_order,
+        }
+        return PostalCodeIndex(columns, vocab)
+
+    @staticmethod
+    def _reverse_index(name, keys, typecode):
+        rows = np.argsort(keys, kind="stable")
+        return {
+            f"{name}_keys": _to_array(typecode, keys[rows]),
+            f"{name}_rows": _to_array("I", rows),
+        }
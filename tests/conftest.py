@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = PROJECT_ROOT / "scripts"
+
+sys.path.insert(0, str(SCRIPTS))
+
+from benchmark import generate_inputs  # noqa: E402
+
+# Small enough to build in a second, large enough to span every province
+FIXTURE_VILLAGES = 2000
+FIXTURE_SEED = 7
+
+OPENDATA_PATH = Path("data/sources/opendata-jabar/dispusipda-kode_pos_kab_kota_indonesia_data.csv")
+POS_PATH = Path("data/sources/kodepos-posindonesia-co-id/village_postal_codes.jsonl")
+
+OPENDATA_OUTPUTS = [
+    "postal_codes_opendata_jabar.csv",
+    "postal_codes_opendata_jabar.json",
+    "postal_codes_opendata_jabar.bin",
+]
+POS_OUTPUTS = [
+    "postal_codes_pos_indonesia.csv",
+    "postal_codes_pos_indonesia.json",
+    "postal_codes_pos_indonesia_enriched.csv",
+    "postal_codes_pos_indonesia.bin",
+    "postal_codes_pos_indonesia_agreement.json",
+]
+DERIVED_OUTPUTS = [
+    "postal_codes.csv",
+    "postal_codes.json",
+    "postal_codes_enriched.csv",
+    "postal_codes.bin",
+    "postal_codes_agreement.json",
+]
+
+RELEASE_ARTIFACTS = [
+    "postal_codes_pos_indonesia.csv",
+    "postal_codes_pos_indonesia.json",
+    "postal_codes_pos_indonesia.bin",
+]
+
+
+def sha256(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class Workspace:
+    """
+    A copy of scripts/ and schema/ next to generated inputs laid out as
+    in the repository, so builds write their outputs, manifests and
+    caches under a temporary directory.
+    """
+
+    def __init__(self, root: Path, inputs):
+        self.root = root
+        shutil.copytree(SCRIPTS, root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copytree(PROJECT_ROOT / "schema", root / "schema")
+        shutil.copy(inputs / "regions_id.csv", root / "regions_id.csv")
+        for source, target in (
+            ("opendata_jabar.csv", OPENDATA_PATH),
+            ("village_postal_codes.jsonl", POS_PATH),
+        ):
+            (root / target).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(inputs / source, root / target)
+
+    def path(self, name) -> Path:
+        return self.root / name
+
+    def run(self, script, *args, **env):
+        """Run scripts/<script> in the workspace; returns the completed process."""
+        result = subprocess.run(
+            [sys.executable, str(self.root / "scripts" / script), *map(str, args)],
+            cwd=self.root,
+            env={**os.environ, "BUILD_WORKERS": "1", **env},
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        return result
+
+    def checksums(self, names):
+        return {name: sha256(self.root / name) for name in names}
+
+    def manifest(self, name):
+        with (self.root / name).open(encoding="utf-8") as f:
+            return json.load(f)
+
+
+def next_postal_code(postal_code):
+    return f"{(int(postal_code) + 1) % 90000 + 10000:05d}"
+
+
+def change_postal_codes(workspace, count=3):
+    """
+    Move ``count`` villages of each source to a new postal code: the
+    Pos Indonesia JSONL only grows, the OpenData Jabar CSV is rewritten.
+    """
+    path = workspace.path(POS_PATH)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    with path.open("a", encoding="utf-8") as f:
+        for line in lines[:count]:
+            obj = json.loads(line)
+            obj["postal_code"] = next_postal_code(obj["postal_code"])
+            f.write(json.dumps(obj) + "\n")
+
+    path = workspace.path(OPENDATA_PATH)
+    header, *rows = path.read_text(encoding="utf-8").splitlines()
+    for i in range(count):
+        row_id, village_code, postal_code = rows[i].split(",")
+        rows[i] = ",".join((row_id, village_code, next_postal_code(postal_code)))
+    path.write_text("\n".join([header, *rows]) + "\n", encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def inputs(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("inputs")
+    generate_inputs(directory, FIXTURE_VILLAGES, FIXTURE_SEED)
+    return directory
+
+
+@pytest.fixture
+def workspace(tmp_path, inputs):
+    return Workspace(tmp_path / "workspace", inputs)
+
+
+@pytest.fixture
+def releases(workspace):
+    """Two consecutive Pos Indonesia builds, copied to old/ and new/."""
+    for name in ("old", "new"):
+        if name == "new":
+            change_postal_codes(workspace)
+        workspace.run("build_from_pos_indonesia.py")
+        directory = workspace.path(name)
+        directory.mkdir()
+        for artifact in RELEASE_ARTIFACTS:
+            shutil.copy(workspace.path(artifact), directory / artifact)
+    return workspace
+
+
+@pytest.fixture
+def make_workspace(tmp_path, inputs):
+    """Factory for several independent workspaces in one test."""
+    def make(name):
+        return Workspace(tmp_path / name, inputs)
+    return make
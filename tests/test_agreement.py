@@ -0,0 +1,36 @@
+import csv
+
+from conftest import OPENDATA_PATH
+
+AGREEMENT = "postal_codes_pos_indonesia_agreement.json"
+
+
+def confidences(workspace):
+    with workspace.path("postal_codes_pos_indonesia.csv").open(encoding="utf-8") as f:
+        return {float(row["confidence"]) for row in csv.DictReader(f)}
+
+
+def test_pos_build_scores_within_augmented_range(workspace):
+    workspace.run("build_from_pos_indonesia.py")
+    assert confidences(workspace) <= {x / 100 for x in range(30, 61)}
+    assert workspace.manifest(AGREEMENT)["both"] > 0
+
+
+def test_pos_build_without_opendata_is_unscored(workspace):
+    workspace.run("build_from_pos_indonesia.py")
+    workspace.path(OPENDATA_PATH).unlink()
+
+    result = workspace.run("build_from_pos_indonesia.py")
+    assert "no agreement signal" in result.stderr
+    assert confidences(workspace) == {0.3}
+    assert not workspace.path(AGREEMENT).exists()
+
+
+def test_pos_build_without_numpy_is_unscored(workspace):
+    blocker = workspace.path("no_numpy")
+    blocker.mkdir()
+    (blocker / "numpy.py").write_text('raise ImportError("numpy blocked for the test")\n')
+
+    result = workspace.run("build_from_pos_indonesia.py", PYTHONPATH=str(blocker))
+    assert "numpy is not installed" in result.stderr
+    assert confidences(workspace) == {0.3}
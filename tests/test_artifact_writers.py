@@ -0,0 +1,85 @@
+import csv
+import json
+
+import pytest
+
+from artifact_writers import CsvArtifact, JsonArrayArtifact
+
+FIELDS = ["postal_code", "village_code", "village_name", "confidence", "aliases"]
+
+RECORDS = [
+    {
+        "postal_code": "23111",
+        "village_code": "1101012001",
+        "village_name": "Lhôk Nga",
+        "confidence": 0.7,
+        "aliases": [],
+    },
+    {
+        "postal_code": None,
+        "village_code": "1101012002",
+        "village_name": "Kampung \"Baru\", Ujung",
+        "confidence": 0.0,
+        "aliases": ["Ujông", "Kampung Baru"],
+    },
+    {
+        "postal_code": "23112",
+        "village_code": "1101012003",
+        "village_name": "Gampông\nBaroh",
+        "confidence": 0.45,
+        "aliases": [{}],
+    },
+]
+
+
+def dict_writer_bytes(path, records):
+    """What the builds wrote before streaming: csv.DictWriter over the list."""
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+    return path.read_bytes()
+
+
+def json_dump_bytes(path, records):
+    """What the builds wrote before streaming: one json.dump of the list."""
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    return path.read_bytes()
+
+
+def streamed_bytes(artifact, records, batched):
+    with artifact as out:
+        if batched:
+            codes = [r["village_code"] for r in records]
+            out.write_fragments(codes, [out.serialize(r) for r in records])
+        else:
+            for record in records:
+                out.write(record)
+    return artifact.path.read_bytes()
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["write", "write_fragments"])
+@pytest.mark.parametrize("count", [0, 1, len(RECORDS)])
+def test_csv_matches_dict_writer(tmp_path, count, batched):
+    records = RECORDS[:count]
+    streamed = streamed_bytes(CsvArtifact(tmp_path / "out.csv", FIELDS), records, batched)
+    assert streamed == dict_writer_bytes(tmp_path / "ref.csv", records)
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["write", "write_fragments"])
+@pytest.mark.parametrize("count", [0, 1, len(RECORDS)])
+def test_json_matches_json_dump(tmp_path, count, batched):
+    records = RECORDS[:count]
+    streamed = streamed_bytes(JsonArrayArtifact(tmp_path / "out.json"), records, batched)
+    assert streamed == json_dump_bytes(tmp_path / "ref.json", records)
+
+
+def test_fragment_offsets_cover_each_record(tmp_path):
+    with JsonArrayArtifact(tmp_path / "out.json") as out:
+        for record in RECORDS:
+            out.write(record)
+    data = out.path.read_bytes()
+    for record, start, end in zip(RECORDS, out.starts, out.ends):
+        fragment = data[start:end].decode("utf-8").replace("\n  ", "\n")
+        assert json.loads(fragment) == record
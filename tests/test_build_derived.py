@@ -0,0 +1,35 @@
+from build_derived import MergeStats, merge_join
+from regions_id import load_regions_id
+from vector_engine import Source
+
+REGIONS = (
+    "province_code,province_name,regency_code,regency_name,district_code,"
+    "district_name,village_code,village_name,village_type\n"
+    "32,Jawa Barat,3201,Bogor,320101,Cibinong,3201012001,Pakansari,village\n"
+    "32,Jawa Barat,3201,Bogor,320101,Cibinong,3201012002,Sukahati,village\n"
+    "32,Jawa Barat,3201,Bogor,320101,Cibinong,3201012003,Tengah,village\n"
+)
+
+
+def test_merge_join_streams_sorted_columns(tmp_path):
+    path = tmp_path / "regions_id.csv"
+    path.write_text(REGIONS, encoding="utf-8")
+    villages = load_regions_id(path, cache_dir=None)
+    official = Source.from_mapping({"3201012001": "16915", "3201999999": "16999"})
+    augmented = Source.from_mapping(
+        {"3201012002": "16914", "3201012001": "16900", "not-a-code": "16000"}
+    )
+
+    stats = MergeStats()
+    records = list(
+        merge_join(villages, official.items(), augmented.items(), {"3201012002": 0.45}, stats)
+    )
+    assert [(r["village_code"], r["postal_code"], r["status"]) for r in records] == [
+        ("3201012001", "16915", "OFFICIAL"),
+        ("3201012002", "16914", "AUGMENTED"),
+        ("3201012003", None, "UNASSIGNED"),
+    ]
+    assert records[1]["confidence"] == 0.45
+    assert (stats.official, stats.augmented, stats.unassigned) == (1, 1, 1)
+    assert stats.unmatched_official == 1
+    assert augmented.unmatchable == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import DERIVED_OUTPUTS, OPENDATA_OUTPUTS, POS_OUTPUTS, POS_PATH, change_postal_codes
+
+BUILDS = [
+    ("build_from_opendata_jabar.py", OPENDATA_OUTPUTS, "build_manifest_opendata_jabar.json"),
+    ("build_from_pos_indonesia.py", POS_OUTPUTS, "build_manifest_pos_indonesia.json"),
+    ("build_derived.py", DERIVED_OUTPUTS, "build_manifest_derived.json"),
+]
+
+
+@pytest.mark.parametrize("script, outputs, manifest", BUILDS)
+def test_incremental_build_matches_full(workspace, script, outputs, manifest):
+    workspace.run(script)
+    change_postal_codes(workspace)
+    workspace.run(script)
+    incremental = workspace.checksums(outputs)
+
+    workspace.path(manifest).unlink()
+    workspace.run(script)
+    assert workspace.checksums(outputs) == incremental
+
+
+def test_incremental_build_reuses_records(workspace):
+    workspace.run("build_from_pos_indonesia.py")
+    change_postal_codes(workspace)
+    workspace.run("build_from_pos_indonesia.py")
+    rebuild = workspace.manifest("build_manifest_pos_indonesia.json")["rebuild"]
+    assert rebuild["mode"] == "incremental"
+    # Agreement rates move too, so more villages than the edited ones change
+    assert rebuild["changed_villages"] > 0
+    assert rebuild["reused_records"] > 0
+
+
+def test_unchanged_build_is_up_to_date(workspace):
+    workspace.run("build_derived.py")
+    assert "up to date" in workspace.run("build_derived.py").stdout
+
+
+@pytest.mark.parametrize("script, manifest", [(b[0], b[2]) for b in BUILDS[1:]])
+def test_overrides_change_forces_full_rebuild(workspace, script, manifest):
+    workspace.run(script)
+    overrides = workspace.path(POS_PATH).with_name("postal_ingest_name_overrides.csv")
+    overrides.write_text(
+        "level,code,canonical_name,postal_alias,match_mode\n"
+        "district,110101,Kulon,Kulon Indah,district_only\n",
+        encoding="utf-8",
+    )
+    assert "up to date" not in workspace.run(script).stdout
+    assert workspace.manifest(manifest)["rebuild"]["mode"] == "full"
+
+    overrides.unlink()
+    workspace.run(script)
+    assert workspace.manifest(manifest)["rebuild"]["mode"] == "full"
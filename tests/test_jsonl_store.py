@@ -0,0 +1,96 @@
+import json
+
+from jsonl_store import JsonlStore, _line_entry
+from pos_indonesia import read_pos_indonesia_jsonl
+
+LINES = [
+    {"village_code": "3201012003", "postal_code": "16110"},
+    {"village_code": "3201012001", "postal_code": "16111"},
+    {"village_code": "3201012002", "postal_code": "16112"},
+    # A later null or invalid line must not shadow the usable one
+    {"village_code": "3201012001", "postal_code": None},
+    {"village_code": "3201012002", "postal_code": "16119"},
+    {"village_code": "3201012002", "postal_code": "5074"},
+    # Never usable
+    {"village_code": "3201012004", "postal_code": None},
+]
+
+
+def write_lines(path, objs):
+    with path.open("w", encoding="utf-8") as f:
+        for obj in objs:
+            f.write(json.dumps(obj) + "\n")
+
+
+def test_index_follows_the_loader(tmp_path):
+    path = tmp_path / "village_postal_codes.jsonl"
+    write_lines(path, LINES)
+    store = JsonlStore(path)
+
+    loaded = read_pos_indonesia_jsonl(path)
+    assert set(store.codes()) == set(loaded)
+    assert {code: store.get(code)["postal_code"] for code in store.codes()} == loaded
+    assert store.get("3201012004") is None
+    assert [v["postal_code"] for v in store.versions("3201012002")] == ["16112", "16119", "5074"]
+
+
+def test_index_survives_reopen_and_append(tmp_path):
+    path = tmp_path / "village_postal_codes.jsonl"
+    write_lines(path, LINES[:3])
+    JsonlStore(path).append(LINES[3:])
+
+    store = JsonlStore(path)
+    assert store.index_path.exists()
+    assert store.get("3201012001")["postal_code"] == "16111"
+    assert sorted(store.duplicates()) == ["3201012001", "3201012002"]
+
+
+def test_compact_keeps_what_the_builds_load(tmp_path):
+    path = tmp_path / "village_postal_codes.jsonl"
+    write_lines(path, LINES)
+    before = read_pos_indonesia_jsonl(path)
+
+    summary, conflicts = JsonlStore(path).compact(tmp_path / "report.json")
+    assert read_pos_indonesia_jsonl(path) == before
+    assert summary["villages"] == 4
+    assert summary["duplicates_dropped"] == 3
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [row["village_code"] for row in rows] == sorted(row["village_code"] for row in rows)
+    assert {c["village_code"]: c["kept"] for c in conflicts} == {"3201012002": "16119"}
+
+    store = JsonlStore(path)
+    assert store.duplicates() == []
+    assert store.get("3201012001")["postal_code"] == "16111"
+
+
+def test_nested_keys_do_not_shadow_the_top_level():
+    line = json.dumps(
+        {
+            "metadata": {"village_code": "9999999999", "postal_code": "99999"},
+            "village_code": "3201012001",
+            "postal_code": None,
+        }
+    ).encode("utf-8") + b"\n"
+    assert _line_entry(line) == ("3201012001", False)
+
+    line = json.dumps(
+        {"village_code": "3201012001", "postal_code": "16111", "source": {"postal_code": "x"}}
+    ).encode("utf-8") + b"\n"
+    assert _line_entry(line) == ("3201012001", True)
+
+
+def test_compact_keeps_a_partial_last_line(tmp_path):
+    path = tmp_path / "village_postal_codes.jsonl"
+    write_lines(path, LINES)
+    partial = b'{"village_code": "3201012005", "postal'
+    with path.open("ab") as f:
+        f.write(partial)
+
+    summary, _ = JsonlStore(path).compact()
+    assert summary["partial_tail_bytes"] == len(partial)
+    assert path.read_bytes().endswith(b"\n" + partial)
+
+    with path.open("ab") as f:
+        f.write(b'_code": "16115"}\n')
+    assert JsonlStore(path).get("3201012005")["postal_code"] == "16115"
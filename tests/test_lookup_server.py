@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import lookup_server
+from lookup_server import LookupService, handle
+
+RECORD = {"village_code": "3201012001", "postal_code": "16110"}
+
+
+class Index:
+    """Just the lookups LookupService calls."""
+
+    def get(self, code):
+        return RECORD if code == RECORD["village_code"] else None
+
+    def villages_by_postal_code(self, code):
+        return [RECORD] if code == RECORD["postal_code"] else []
+
+
+async def exchange(*requests):
+    """Send each raw request on its own connection; returns the status lines."""
+    service = LookupService(Index(), "test", cache_size=16)
+    server = await asyncio.start_server(lambda r, w: handle(service, r, w), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    statuses = []
+    async with server:
+        for request in requests:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            statuses.append((await reader.readline()).decode("ascii").strip())
+            writer.close()
+    return statuses
+
+
+def test_lookup():
+    statuses = asyncio.run(
+        exchange(
+            b"GET /villages/3201012001 HTTP/1.1\r\nConnection: close\r\n\r\n",
+            b"GET /villages/0000000000 HTTP/1.1\r\nConnection: close\r\n\r\n",
+        )
+    )
+    assert statuses == ["HTTP/1.1 200 OK", "HTTP/1.1 404 Not Found"]
+
+
+@pytest.mark.parametrize(
+    "request_bytes",
+    [
+        b"POST /batch HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+        b"POST /batch HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+        b"GET /healthz HTTP/1.1\r\nX-Padding: " + b"a" * 100_000 + b"\r\n\r\n",
+        b"GET /" + b"a" * 100_000 + b" HTTP/1.1\r\n\r\n",
+    ],
+    ids=["non-integer-length", "negative-length", "long-header", "long-request-line"],
+)
+def test_malformed_request_gets_400(request_bytes):
+    statuses = asyncio.run(
+        exchange(request_bytes, b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n")
+    )
+    assert statuses == ["HTTP/1.1 400 Bad Request", "HTTP/1.1 200 OK"]
+
+
+@pytest.mark.parametrize(
+    "request_bytes",
+    [
+        b"GET /healthz HTTP/1.1\r\nX-Slow: a",
+        b"POST /batch HTTP/1.1\r\nContent-Length: 100\r\n\r\n{",
+    ],
+    ids=["headers", "body"],
+)
+def test_trickled_request_times_out(monkeypatch, request_bytes):
+    monkeypatch.setattr(lookup_server, "IDLE_TIMEOUT", 0.2)
+    statuses = asyncio.run(
+        exchange(request_bytes, b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n")
+    )
+    assert statuses == ["HTTP/1.1 408 Request Timeout", "HTTP/1.1 200 OK"]
@@ -0,0 +1,18 @@
+import pytest
+
+from conftest import OPENDATA_OUTPUTS, POS_OUTPUTS
+
+PARALLEL_BUILDS = [
+    ("build_from_opendata_jabar.py", OPENDATA_OUTPUTS, "build_report_opendata_jabar.json"),
+    ("build_from_pos_indonesia.py", POS_OUTPUTS, "build_report_pos_indonesia.json"),
+]
+
+
+@pytest.mark.parametrize("script, outputs, report", PARALLEL_BUILDS)
+def test_parallel_build_matches_sequential(make_workspace, script, outputs, report):
+    sequential = make_workspace("sequential")
+    parallel = make_workspace("parallel")
+    sequential.run(script)
+    parallel.run(script, BUILD_WORKERS="4")
+    assert parallel.manifest(report)["workers"] == 4
+    assert parallel.checksums(outputs) == sequential.checksums(outputs)
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from conftest import POS_PATH
+from postal_lookup import encode_postal_code, is_postal_code, load_index, open_binary
+
+
+@pytest.mark.parametrize("value", ["5074", "123456", "12a45", "", None, 40115, "４０１１５"])
+def test_invalid_postal_codes(value):
+    assert not is_postal_code(value)
+
+
+def test_valid_postal_code():
+    assert is_postal_code("40115")
+    assert encode_postal_code("40115") == 40115
+
+
+def test_binary_index_matches_csv(workspace):
+    workspace.run("build_from_pos_indonesia.py")
+    from_csv = load_index(workspace.path("postal_codes_pos_indonesia_enriched.csv"))
+    from_bin = open_binary(workspace.path("postal_codes_pos_indonesia.bin"))
+    assert len(from_bin) == len(from_csv)
+    for i in range(0, len(from_csv), 97):
+        assert from_bin.record(i) == from_csv.record(i)
+
+
+def test_invalid_postal_code_is_skipped(workspace):
+    with workspace.path(POS_PATH).open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"village_code": "1101012001", "postal_code": "5074"}) + "\n")
+    result = workspace.run("build_from_pos_indonesia.py")
+    assert "'5074'" in result.stderr
+    for name in ("postal_codes_pos_indonesia.csv", "postal_codes_pos_indonesia.bin"):
+        assert workspace.path(name).exists()
@@ -0,0 +1,38 @@
+import pytest
+
+from regions_id import REQUIRED_COLUMNS, VILLAGE_COLUMNS, load_regions_id, normalize_name
+
+VILLAGES_ONLY = (
+    "village_code,village_name,village_type\n"
+    "3201012002,Sukamaju,village\n"
+    "3201011001,Cibinong,urban_village\n"
+)
+
+
+def test_loads_only_the_required_columns(tmp_path):
+    path = tmp_path / "regions_id.csv"
+    path.write_text(VILLAGES_ONLY, encoding="utf-8")
+
+    table = load_regions_id(path, cache_dir=tmp_path / "cache", required=VILLAGE_COLUMNS)
+    assert list(table.codes()) == ["3201011001", "3201012002"]
+    village = table.village(1)
+    assert (village["village_name"], village["village_type"]) == ("Sukamaju", "village")
+    assert village["district_name"] == ""
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_missing_required_columns_die(tmp_path, cache):
+    path = tmp_path / "regions_id.csv"
+    path.write_text(VILLAGES_ONLY, encoding="utf-8")
+    cache_dir = tmp_path / "cache" if cache else None
+    # A cached table must not bypass the column check
+    load_regions_id(path, cache_dir=cache_dir, required=VILLAGE_COLUMNS)
+    with pytest.raises(SystemExit):
+        load_regions_id(path, cache_dir=cache_dir, required=REQUIRED_COLUMNS)
+
+
+def test_normalize_name():
+    assert normalize_name("Tanjungbalai  Utara") == "tanjungbalai utara"
+    assert normalize_name("Gampông Lhôk-Nga") == "gampong lhok nga"
+    assert normalize_name(None) == ""
@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+
+from reingest import AimdLimiter, HttpError, Stats, TokenBucket, fetch_district, http_get
+
+JOB = {
+    "district_code": "320101",
+    "villages": {"3201012001": "Cibeber", "3201012002": "Sukamaju"},
+}
+VALID = json.dumps(
+    [
+        {"village_name": "Cibeber", "postal_code": "16110"},
+        {"village_name": "Sukamaju", "postal_code": "16111"},
+    ]
+).encode("utf-8")
+
+
+def response(status, body, headers=""):
+    return (
+        f"HTTP/1.1 {status} X\r\n{headers}"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    ).encode("ascii") + body
+
+
+async def serve(responses):
+    """Local server answering each connection with the next canned response."""
+    responses = iter(responses)
+
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        writer.write(next(responses))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/"
+
+
+async def fetch(responses, retries=4, limiter=None):
+    server, url = await serve(responses)
+    stats = Stats()
+    limiter = limiter or AimdLimiter(2, 1, 4)
+    async with server:
+        matched = await fetch_district(
+            JOB, url, TokenBucket(1000, 10), limiter, stats,
+            retries, timeout=5, backoff=0.001,
+        )
+    assert limiter.in_flight == 0
+    return matched, stats
+
+
+def test_unreadable_and_server_errors_are_retried():
+    matched, stats = asyncio.run(
+        fetch(
+            [
+                response(200, b"<html>maintenance</html>"),
+                response(500, b"oops"),
+                response(200, b'{"unexpected": 1}'),
+                response(200, VALID),
+            ]
+        )
+    )
+    assert matched == {"3201012001": "16110", "3201012002": "16111"}
+    assert stats.requests == 4
+    assert stats.errors == 3
+
+
+def test_retries_give_up():
+    matched, stats = asyncio.run(fetch([response(500, b"")] * 3, retries=2))
+    assert matched is None
+    assert stats.errors == 3
+
+
+def test_missing_district_is_final():
+    matched, stats = asyncio.run(fetch([response(404, b"")]))
+    assert matched == {}
+    assert stats.requests == 1
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_malformed_content_length(length):
+    async def get():
+        server, url = await serve(
+            [f"HTTP/1.1 200 OK\r\nContent-Length: {length}\r\n\r\n".encode("ascii")]
+        )
+        async with server:
+            return await http_get(url)
+
+    with pytest.raises(HttpError):
+        asyncio.run(get())
+
+
+def test_overlong_header_line_is_retried():
+    long_header = "X-Padding: " + "a" * 100_000 + "\r\n"
+    matched, stats = asyncio.run(
+        fetch([response(200, VALID, long_header), response(200, VALID)])
+    )
+    assert matched == {"3201012001": "16110", "3201012002": "16111"}
+    assert stats.errors == 1
+
+
+def test_limiter_released_when_cancelled():
+    async def cancelled():
+        # A server that never answers: the request is cancelled mid-flight
+        server = await asyncio.start_server(
+            lambda reader, writer: asyncio.sleep(60), "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        limiter = AimdLimiter(2, 1, 4)
+        async with server:
+            task = asyncio.create_task(
+                fetch_district(
+                    JOB, f"http://127.0.0.1:{port}/", TokenBucket(1000, 10),
+                    limiter, Stats(), 1, timeout=60, backoff=0.001,
+                )
+            )
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return limiter
+
+    assert asyncio.run(cancelled()).in_flight == 0
+
@@ -0,0 +1,24 @@
+import shutil
+
+import pytest
+
+from conftest import sha256
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".json"])
+def test_delta_round_trip(releases, suffix):
+    old = releases.path("old/postal_codes_pos_indonesia" + suffix)
+    new = releases.path("new/postal_codes_pos_indonesia" + suffix)
+    assert sha256(old) != sha256(new)
+    delta = releases.path("delta" + suffix + ".json.gz")
+    releases.run("release_delta.py", "diff", old, new, "--output", delta)
+
+    patched = releases.path("patched" + suffix)
+    shutil.copy(old, patched)
+    releases.run("release_delta.py", "apply", delta, patched)
+    assert sha256(patched) == sha256(new)
+
+    binary = releases.path("patched.bin")
+    shutil.copy(releases.path("old/postal_codes_pos_indonesia.bin"), binary)
+    releases.run("release_delta.py", "apply", delta, binary)
+    assert sha256(binary) == sha256(releases.path("new/postal_codes_pos_indonesia.bin"))
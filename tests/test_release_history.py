@@ -0,0 +1,19 @@
+from conftest import sha256
+
+
+def test_history_export_round_trip(releases):
+    store = releases.path("history.sqlite")
+    added = {
+        "v2025Q1": releases.path("old/postal_codes_pos_indonesia.csv"),
+        "v2025Q2": releases.path("new/postal_codes_pos_indonesia.json"),
+    }
+    for release, artifact in added.items():
+        releases.run("release_history.py", "--store", store, "add", release, artifact)
+
+    for release, artifact in added.items():
+        output = releases.path("export-" + release + artifact.suffix)
+        releases.run("release_history.py", "--store", store, "export", release, output)
+        assert sha256(output) == sha256(artifact)
+
+    changed = releases.run("release_history.py", "--store", store, "changed", "v2025Q1", "v2025Q2")
+    assert not changed.stdout.startswith("0 villages")
@@ -0,0 +1,47 @@
+import csv
+import json
+import subprocess
+import sys
+
+from conftest import SCRIPTS
+from suggest_overrides import OVERRIDE_FIELDS, TrigramIndex, suggest
+
+ALIASES = ["Tanjung Balai Utara", "Tanjung Balai Selatan", "STM Hulu", "Lebong Atas"]
+
+
+def test_ranks_aliases_per_failed_district():
+    rows = list(
+        suggest(TrigramIndex(ALIASES), [("127402", "Tanjungbalai Utara")], "district_village", 3, 0.3)
+    )
+    assert [row["rank"] for row in rows] == list(range(1, len(rows) + 1))
+    assert rows[0]["postal_alias"] == "Tanjung Balai Utara"
+    assert [row["score"] for row in rows] == sorted((row["score"] for row in rows), reverse=True)
+    assert {row["level"] for row in rows} == {"district"}
+
+
+def test_vocabulary_is_the_lookup_aliases_only(tmp_path):
+    overrides = tmp_path / "overrides.csv"
+    with overrides.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(OVERRIDE_FIELDS)
+        writer.writerow(["district", "127401", "Tanjungbalai Selatan", "Tanjung Balai Selatan", "district_village"])
+    failed = tmp_path / "failed.jsonl"
+    failed.write_text(
+        json.dumps({"village_code": "1274021001", "village_name": "Sei Raja",
+                    "district_code": "127402", "district_name": "Tanjungbalai Utara"}) + "\n",
+        encoding="utf-8",
+    )
+    vocabulary = tmp_path / "aliases.txt"
+    vocabulary.write_text("Tanjung Balai Utara\n", encoding="utf-8")
+    output = tmp_path / "suggested.csv"
+    subprocess.run(
+        [sys.executable, str(SCRIPTS / "suggest_overrides.py"), "--failed", failed,
+         "--overrides", overrides, "--vocabulary", vocabulary, "--output", output],
+        cwd=tmp_path, check=True, capture_output=True,
+    )
+    with output.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["rank"] == "1"
+    assert rows[0]["postal_alias"] == "Tanjung Balai Utara"
+    # Never another district's canonical region-id name
+    assert "Tanjungbalai Selatan" not in {row["postal_alias"] for row in rows}
@@ -0,0 +1,34 @@
+import csv
+import json
+
+import pytest
+
+import validate_schema
+from conftest import PROJECT_ROOT
+
+NAMES = ["Gampông\nBaroh", "Kota\x0bLama", "Sukamaju\x85", "Tanjung Priok", "Ujung\x0cBatu", 'Kampung "Baru"']
+
+
+@pytest.fixture
+def schema():
+    with (PROJECT_ROOT / "schema" / "postal_code.schema.json").open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_csv_names_with_line_breaks_validate(workspace, schema, monkeypatch, workers):
+    workspace.run("build_from_opendata_jabar.py")
+    path = workspace.path("postal_codes_opendata_jabar.csv")
+    with path.open(newline="", encoding="utf-8") as f:
+        header, *rows = list(csv.reader(f))
+    name = header.index("village_name")
+    for i, row in enumerate(rows):
+        row[name] = NAMES[i % len(NAMES)]
+    with path.open("w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([header, *rows])
+
+    # Split even a small file so ranges can start inside a quoted name
+    monkeypatch.setattr(validate_schema, "PARALLEL_MIN_BYTES", 0)
+    section = validate_schema.validate_artifact(path, schema, workers)
+    assert section["records"] == len(rows)
+    assert section["errors"] == 0, section["rules"]
@@ -0,0 +1,11 @@
+from conftest import DERIVED_OUTPUTS
+
+
+def test_vectorized_engine_matches_records(make_workspace):
+    records = make_workspace("records")
+    vectorized = make_workspace("vectorized")
+    records.run("build_derived.py", BUILD_ENGINE="records")
+    vectorized.run("build_derived.py", BUILD_ENGINE="vectorized")
+    assert vectorized.checksums(DERIVED_OUTPUTS) == records.checksums(DERIVED_OUTPUTS)
+    rebuild = vectorized.manifest("build_manifest_derived.json")["rebuild"]
+    assert rebuild["mode"] == "full"